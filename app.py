@@ -1,7 +1,142 @@
-import streamlit as st
-from scrape_youtube import extract_video_id, get_transcript, extract_metadata, download_thumbnail
-from summarize_text import summarize_text
+import logging
 import os
+import time
+
+import streamlit as st
+import compare
+from chunking import EXTRACTIVE_BUDGET
+from pipeline import Prefetch, STAGES
+from summarize_text import summarize_text_stream
+import hedging
+import jobs
+import providers
+import scrape_youtube
+import search_index
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# 작업 서비스 주소 (예: http://127.0.0.1:8600). 있으면 요약을 서비스에 맡기고 진행 상황을 폴링한다
+JOB_SERVICE_URL = os.getenv("YTS_JOB_SERVICE_URL")
+
+
+def search_page():
+    # 지금까지 처리한 자막/요약 전문 검색 (영상, 챕터, 타임스탬프 링크)
+    st.subheader("Search transcripts and summaries")
+    index = search_index.get_index()
+    if index is None:
+        st.warning("Search index is disabled.")
+        return
+    query = st.text_input("Search")
+    kinds = st.multiselect("Match in", search_index.KINDS, default=list(search_index.KINDS))
+    if not query:
+        stats = index.stats()
+        st.caption(f"{stats['videos']} videos indexed")
+        return
+    results = index.search(query, limit=50, kinds=kinds)
+    if not results:
+        st.info("No matches.")
+    for r in results:
+        stamp = f"[{r['timestamp']}] " if r["timestamp"] else ""
+        chapter = f" · {r['label']}" if r["label"] else ""
+        st.markdown(f"**{stamp}[{r['title'] or r['video_id']}]({r['link']})**{chapter} · _{r['kind']}_")
+        st.write(r["text"][:400])
+
+def performance_panel(request_trace):
+    # 이번 요청의 단계별 소요 시간(span)과 카운터 (접어 둔 상태로 표시)
+    with st.expander(f"Performance · {request_trace.duration:.2f}s", expanded=False):
+        rows = [{
+            "stage": "\u00a0\u00a0" * row["depth"] + row["name"],
+            "start (s)": round(row["start"], 3),
+            "duration (s)": round(row["duration"], 3),
+            "error": row["error"] or "",
+        } for row in request_trace.breakdown()]
+        st.table(rows)
+        if request_trace.counters:
+            st.table([{"counter": name, "value": value} for name, value in sorted(request_trace.counters.items())])
+
+def show_summary_meta(summary_meta, timings, llm_started, compaction):
+    # 캐시/hedge/TTFT/단계별 소요 시간/자막 압축 결과 캡션
+    if summary_meta["cached"]:
+        st.caption(f"Served from cache ({summary_meta['provider']} / {summary_meta['model']})")
+    if summary_meta.get("coalesced"):
+        st.caption("Shared with an identical request that was already in progress")
+    if summary_meta.get("hedge"):
+        hedge = summary_meta["hedge"]
+        st.caption(f"Answered by {hedge['provider']} (tried: {', '.join(hedge['attempts'])})")
+    if summary_meta["ttft"] is not None:
+        st.caption(f"Time to first token: {summary_meta['ttft']:.2f}s · total: {summary_meta['total']:.2f}s")
+    fetched = " · ".join(f"{stage} {timings[stage]:.2f}s" for stage in STAGES if stage in timings)
+    st.caption(f"Fetch: {fetched} · LLM started at {llm_started:.2f}s")
+    if compaction:
+        st.caption(f"Transcript compaction saved {compaction['tokens_saved']} tokens "
+                   f"({compaction['tokens_before']} -> {compaction['tokens_after']})")
+    extraction = summary_meta.get("extractive")
+    if extraction and extraction["ratio"] < 1:
+        st.caption(f"Extractive pre-summary kept {extraction['ratio']:.0%} of the transcript "
+                   f"({extraction['tokens_before']} -> {extraction['tokens_after']} tokens, "
+                   f"{extraction['seconds']:.2f}s)")
+
+def show_comparison_meta(result):
+    # 비교 모드의 공급자 한 열: 오류/캐시/지연/토큰/비용
+    if result["error"]:
+        st.error(result["error"])
+        return
+    if result["cached"]:
+        st.caption("Served from cache")
+    elif result.get("coalesced"):
+        st.caption("Shared with an identical request that was already in progress")
+    if result["ttft"] is not None:
+        st.caption(f"TTFT {result['ttft']:.2f}s · total {result['total']:.2f}s")
+    estimated = " (estimated)" if result["estimated"] else ""
+    st.caption(f"Tokens: {result['prompt_tokens']} in / {result['completion_tokens']} out{estimated} · "
+               f"${result['cost']:.4f}")
+
+def show_prompt_cache(counters):
+    # 공급자 프롬프트 캐시에서 읽은 입력 토큰 (같은 자막을 다른 모드/언어로 다시 요약할 때)
+    prompt_tokens = sum(value for name, value in counters.items() if name.startswith("llm_prompt_tokens{"))
+    cached_tokens = sum(value for name, value in counters.items() if name.startswith("llm_cached_prompt_tokens{"))
+    if cached_tokens:
+        st.caption(f"Provider prompt cache: {cached_tokens} of {prompt_tokens} input tokens")
+
+def show_job(client, job_id, show_performance):
+    # 작업 서비스에 맡긴 요약: 진행 상황(partial)을 폴링해서 그리고, 끝나면 결과를 그린다.
+    # job ID는 URL(?job=...)에 남아 있어 새로고침해도 이어서 본다
+    st.caption(f"Job {job_id}")
+    status_slot = st.empty()
+    st.subheader("Title:")
+    title_slot = st.empty()
+    st.subheader("Channel:")
+    channel_slot = st.empty()
+    thumbnail_slot = st.empty()
+    st.subheader("Video Summary:")
+    summary_slot = st.empty()
+    try:
+        for job in client.wait(job_id):
+            progress = job["progress"]
+            status_slot.caption(f"{job['status']} · {progress.get('stage', '')}")
+            if progress.get("title"):
+                title_slot.write(progress["title"])
+                channel_slot.write(progress["channel"])
+            if progress.get("partial"):
+                summary_slot.markdown(progress["partial"])
+    except KeyError:
+        st.error("Unknown job.")
+        return
+    if job["status"] == "error":
+        st.error(f"Summarization failed: {job['error']}")
+        return
+    result = client.result(job_id)
+    status_slot.empty()
+    title_slot.write(result["title"])
+    channel_slot.write(result["channel"])
+    thumbnail_slot.image(scrape_youtube.THUMBNAIL_URL.format(video_id=result["video_id"], name="hqdefault"),
+                         caption='Thumbnail', use_column_width=True)
+    summary_slot.markdown(result["summary"])
+    show_summary_meta(result["metadata"], result["timings"], result["timings"]["llm_started"], result["compaction"])
+    show_prompt_cache(result["trace"]["counters"])
+    if show_performance:
+        performance_panel(tracing.Trace.from_dict(result["trace"]))
 
 def main():       
     # Define the title text and image URL
@@ -18,26 +153,62 @@ def main():
 
     # Display the HTML code using markdown
     st.markdown(html_code, unsafe_allow_html=True)
+
+    # YTS_METRICS_PORT가 있으면 /metrics (Prometheus) 서버를 한 번 띄운다
+    tracing.serve_metrics_from_env()
+
+    page = st.sidebar.radio("Page", ("Summarize", "Search"))
+    if page == "Search":
+        search_page()
+        return
     
-    def get_thumbnail_from_url(url):
-        video_id = extract_video_id(url)
-        download_thumbnail(video_id)
-    
-    # Function to get transcript from URL
-    def get_transcript_from_url(url):
-        video_id = extract_video_id(url)
-        transcript, chapters = get_transcript(video_id, url)
-        return transcript, chapters
-
-    # Function to summarize text
-    def summarize_transcript(transcript, lang, title, chapters, api_choice, summarize_way): 
-        if summarize_way == 'Chapters':
-            summary = summarize_text(transcript, lang=lang, title=title, chapters=chapters, api_choice=api_choice, summarize_way='Chapters')
-        elif summarize_way == 'Detailed':
-            summary = summarize_text(transcript, lang=lang, title=title, chapters=chapters,api_choice=api_choice, summarize_way='detailed')
-        elif summarize_way == 'syukaworld':
-            summary = summarize_text(transcript, lang=lang, title=title, chapters=chapters, api_choice=api_choice, summarize_way='syukaworld')
-        return summary
+    # Function to summarize text (텍스트 조각을 도착하는 대로 화면에 그린다)
+    def summarize_transcript(transcript, lang, title, chapters, api_choice, summarize_way, use_cache=True,
+                             on_delta=None, video_id=None, extractive_budget=None):
+        stats = {}
+        deltas = summarize_text_stream(
+            transcript, lang=lang, title=title, chapters=chapters, api_choice=api_choice,
+            summarize_way=summarize_way, use_cache=use_cache, stats=stats, video_id=video_id,
+            extractive_budget=extractive_budget,
+        )
+
+        def render():
+            # 조각을 넘겨준 뒤 다음 조각을 요청받을 때까지가 화면 그리기 시간
+            for delta in deltas:
+                if on_delta is not None:
+                    on_delta()
+                handed_over = time.perf_counter()
+                yield delta
+                tracing.count("render_seconds", time.perf_counter() - handed_over)
+
+        with tracing.span("render"):
+            summary = st.write_stream(render())
+        return summary, stats
+
+    # 공급자 비교: 같은 프롬프트를 동시에 보내고 공급자마다 한 열에 도착하는 대로 그린다
+    def compare_transcript(transcript, lang, title, chapters, api_choices, summarize_way, use_cache=True,
+                           on_delta=None, extractive_budget=None):
+        stats = {}
+        columns = st.columns(len(api_choices))
+        slots, texts = {}, {}
+        for column, name in zip(columns, api_choices):
+            column.markdown(f"**{name}** · {providers.MODELS[name]}")
+            slots[name] = column.empty()
+            texts[name] = ""
+        events = compare.compare_stream(
+            transcript, api_choices, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way,
+            use_cache=use_cache, stats=stats, extractive_budget=extractive_budget,
+        )
+        with tracing.span("render"):
+            for name, delta in events:
+                if on_delta is not None:
+                    on_delta()
+                texts[name] += delta
+                slots[name].markdown(texts[name])
+        for column, name in zip(columns, api_choices):
+            with column:
+                show_comparison_meta(stats["providers"][name])
+        return texts, stats
 
     # Interface components
     st.subheader("Enter YouTube URL:")
@@ -48,7 +219,13 @@ def main():
     language = st.radio("Select language to output:", ('English', 'Spanish', 'Korean'))
 
     # AI API Selection
-    api_choice = st.radio("Select AI API:", ('Gemini','Anthropic', 'OpenAI', 'x.ai'))
+    # Fastest: 가장 빠른 공급자에 보내고 느리면 다른 공급자에 hedge (API 키가 있는 공급자만)
+    # Compare: 같은 프롬프트를 선택한 공급자 모두에 동시에 보내고 나란히 비교
+    api_choice = st.radio("Select AI API:", ('Gemini','Anthropic', 'OpenAI', 'x.ai', 'Fastest', compare.COMPARE))
+    compare_choices = []
+    if api_choice == compare.COMPARE:
+        compare_choices = st.multiselect("Providers to compare", list(providers.MODELS),
+                                         default=hedging.available_providers() or list(providers.MODELS))
 
     # summarize way selection
     summarize_way = st.radio("Select summarize way:", ('Chapters', 'Detailed','syukaworld')) 
@@ -56,32 +233,99 @@ def main():
     # detailed way write the chapters
     detailed_way = st.text_area("Write the chapters manually")
 
+    # 요약 캐시 사용 여부 (끄면 항상 API를 새로 호출)
+    use_cache = st.checkbox("Use cached summary if available", value=True)
+
+    # 자막 압축 시 간투사(um, eh, 음 ...)까지 제거할지 여부
+    remove_fillers = st.checkbox("Remove filler words from transcript", value=False)
+
+    # 긴 자막을 LLM에 보내기 전에 로컬 추출 요약(TF-IDF + TextRank)으로 토큰 예산까지 줄일지 여부
+    extractive_budget = None
+    if st.checkbox("Pre-summarize long transcripts locally (extractive)", value=False):
+        extractive_budget = st.slider("Transcript token budget", 2_000, 64_000, EXTRACTIVE_BUDGET, step=1_000)
+
+    show_performance = st.sidebar.checkbox("Show performance panel", value=False)
+
     if st.button("Summarize"):
-        if url:
+        if url and api_choice == compare.COMPARE and not compare_choices:
+            st.warning("Select at least one provider to compare.")
+        elif url and JOB_SERVICE_URL and api_choice != compare.COMPARE:
+            client = jobs.JobClient(JOB_SERVICE_URL)
+            try:
+                job_id = client.submit(url, lang=language, api_choice=api_choice, summarize_way=summarize_way,
+                                       use_cache=use_cache, remove_fillers=remove_fillers, chapters=detailed_way,
+                                       extractive_budget=extractive_budget)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            st.query_params["job"] = job_id
+            show_job(client, job_id, show_performance)
+        elif url:
             # After Button is Clicked
-            # Display Title and Channel Names
-            title, channel = extract_metadata(url)
-            st.subheader("Title:")
-            st.write(title)
-            st.subheader("Channel:")
-            st.write(channel)
-            
-            # Display Thumbnail
-            get_thumbnail_from_url(url)
-            st.image(os.path.join(os.getcwd(), "thumbnail.jpg"), caption='Thumbnail', use_column_width=True) 
-            
-            # Display Summary
-            transcript, chapters = get_transcript_from_url(url)
-            # if chapters is not empty, then use the chapters
-            if chapters:
-                summary = summarize_transcript(transcript, language, chapters, title, api_choice, summarize_way)
-            else:
-                print(detailed_way)
-                summary = summarize_transcript(transcript, language, detailed_way, title, api_choice, summarize_way)
-            st.subheader("Video Summary:")
-            st.write(summary)
+            # 요청 하나를 트레이스로 묶는다 (YTS_TRACE_FILE이 있으면 JSONL로 기록)
+            with tracing.trace("summarize", url=url, api=api_choice, way=summarize_way) as request_trace:
+                # 메타데이터, 썸네일, 자막+챕터를 동시에 받기 시작하고 도착하는 대로 그린다
+                prefetch = Prefetch(url, remove_fillers=remove_fillers)
+                st.subheader("Title:")
+                title_slot = st.empty()
+                st.subheader("Channel:")
+                channel_slot = st.empty()
+                thumbnail_slot = st.empty()
+                st.subheader("Video Summary:")
+
+                def render(stage):
+                    if stage == "metadata":
+                        title, channel = prefetch.result("metadata")
+                        title_slot.write(title)
+                        channel_slot.write(channel)
+                    elif stage == "thumbnail":
+                        # 썸네일은 부가 정보: 받기에 실패해도 요약은 계속한다
+                        try:
+                            thumbnail = prefetch.result("thumbnail")
+                        except Exception:
+                            logger.warning("thumbnail fetch failed for %s", prefetch.video_id, exc_info=True)
+                            thumbnail = None
+                        if thumbnail:
+                            thumbnail_slot.image(thumbnail, caption='Thumbnail', use_column_width=True)
+
+                # 프롬프트에는 제목과 자막+챕터만 필요하다 (썸네일은 기다리지 않음)
+                for stage in prefetch.as_completed():
+                    render(stage)
+                    if prefetch.done("metadata") and prefetch.done("transcript"):
+                        break
+                title, channel = prefetch.result("metadata")
+                transcript, chapters = prefetch.result("transcript")
+                llm_started = prefetch.elapsed()
+
+                # 요약 스트리밍 중에 도착한 단계(썸네일 등)도 바로 그린다
+                def render_ready():
+                    for stage in prefetch.ready():
+                        render(stage)
+
+                render_ready()
+                if api_choice == compare.COMPARE:
+                    _, compare_stats = compare_transcript(transcript, language, title, chapters or detailed_way, compare_choices, summarize_way, use_cache, render_ready, extractive_budget)
+                    st.caption(f"Wall time {compare_stats['total']:.2f}s (slowest provider)")
+                    extraction = compare_stats.get("extractive")
+                    if extraction and extraction["ratio"] < 1:
+                        st.caption(f"Extractive pre-summary kept {extraction['ratio']:.0%} of the transcript "
+                                   f"({extraction['tokens_before']} -> {extraction['tokens_after']} tokens)")
+                # if chapters is not empty, then use the chapters
+                elif chapters:
+                    summary, summary_meta = summarize_transcript(transcript, language, title, chapters, api_choice, summarize_way, use_cache, render_ready, prefetch.video_id, extractive_budget)
+                else:
+                    summary, summary_meta = summarize_transcript(transcript, language, title, detailed_way, api_choice, summarize_way, use_cache, render_ready, prefetch.video_id, extractive_budget)
+                for stage in prefetch.as_completed():
+                    render(stage)
+                if api_choice != compare.COMPARE:
+                    show_summary_meta(summary_meta, prefetch.timings, llm_started, prefetch.compaction)
+                show_prompt_cache(request_trace.counters)
+            if show_performance:
+                performance_panel(request_trace)
         else:
             st.warning("Please enter a YouTube URL.")
+    elif JOB_SERVICE_URL and "job" in st.query_params:
+        show_job(jobs.JobClient(JOB_SERVICE_URL), st.query_params["job"], show_performance)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,300 @@
+# batch.py
+"""
+헤드리스 배치 요약 CLI.
+
+URL 목록(파일 또는 stdin)을 읽어 scrape -> transcript -> summarize를 실행한다.
+- I/O 단계(watch 페이지, 자막)는 스레드 풀(--io-workers)
+- LLM 단계는 공용 이벤트 루프에서 세마포어(--llm-workers)로 동시 실행
+- 결과는 한 줄씩 JSONL로 바로 기록(전용 스레드에서 flush + fsync)되며, 이 파일이 체크포인트 역할을 한다.
+  중단된 실행을 같은 출력 파일로 다시 시작하면 성공한 영상은 건너뛴다.
+- 영상마다 트레이스(tracing)를 하나씩 만든다. YTS_TRACE_FILE이 있으면 JSONL로 기록되고
+  결과 레코드의 trace_id로 찾을 수 있다. YTS_METRICS_PORT가 있으면 /metrics를 띄운다
+
+Usage:
+    python batch.py urls.txt -o results.jsonl --api Gemini --way syukaworld
+    cat urls.txt | python batch.py - -o results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import hedging
+import providers
+import tracing
+from chunking import estimate_tokens
+from compaction import compact_transcript
+from scrape_youtube import extract_metadata, extract_video_id, get_transcript_segments, index_transcript
+from summarize_text import summarize_text_async
+
+
+def read_urls(source):
+    """
+    한 줄에 URL 하나. 빈 줄과 '#' 주석은 무시
+    """
+    lines = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def load_checkpoint(path):
+    """
+    기존 출력 파일에서 성공적으로 끝난 video_id 집합을 읽는다.
+    충돌로 마지막 줄이 잘려 있으면 그 줄은 무시한다.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                done.add(record["video_id"])
+    return done
+
+
+class JsonlWriter:
+    """
+    스레드 안전한 append 전용 JSONL 기록기 (레코드마다 flush + fsync).
+    write()는 큐에 넣기만 하고 전용 스레드가 디스크에 쓴다. 요약 완료 콜백은 공용 이벤트 루프
+    스레드에서 불리므로, fsync가 진행 중인 다른 요약을 막지 않게 한다. close()가 남은 줄을 모두 쓴다
+    """
+
+    def __init__(self, path):
+        self._lines = queue.Queue()
+        self._error = None
+        self._file = open(path, "a+", encoding="utf-8")
+        # 잘린 마지막 줄 뒤에 이어 쓰지 않도록 줄바꿈 보정
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+        self._thread = threading.Thread(target=self._run, name="batch-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        self._lines.put(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _run(self):
+        while True:
+            line = self._lines.get()
+            if line is None:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                # 첫 오류를 close()에서 다시 발생시킨다 (나머지 줄도 계속 시도)
+                self._error = self._error or e
+
+    def close(self):
+        self._lines.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+
+class BatchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.ok = 0
+        self.failed = 0
+        self.skipped = 0
+        self.tokens = 0
+
+    def record(self, ok, tokens=0):
+        with self._lock:
+            if ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+            self.tokens += tokens
+
+    def report(self):
+        minutes = max(time.perf_counter() - self.started, 1e-9) / 60
+        return {
+            "ok": self.ok,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_sec": round(minutes * 60, 2),
+            "videos_per_min": round(self.ok / minutes, 2),
+            "tokens_per_min": round(self.tokens / minutes, 1),
+        }
+
+
+def scrape_video(url, remove_fillers=False):
+    """
+    I/O 단계: 메타데이터 + 타임스탬프 자막(압축) + 챕터
+    """
+    video_id = extract_video_id(url)
+    title, channel = extract_metadata(url)
+    transcript, chapters = get_transcript_segments(video_id, url)
+    transcript, compaction = compact_transcript(transcript, remove_fillers)
+    return {"video_id": video_id, "title": title, "channel": channel,
+            "transcript": transcript, "chapters": chapters, "compaction": compaction}
+
+
+async def summarize_video(scraped, semaphore, lang, api_choice, summarize_way, use_cache):
+    """
+    LLM 단계
+    """
+    async with semaphore:
+        return await summarize_text_async(
+            scraped["transcript"], lang=lang, title=scraped["title"], chapters=scraped["chapters"],
+            api_choice=api_choice, summarize_way=summarize_way, use_cache=use_cache,
+            video_id=scraped["video_id"],
+        )
+
+
+async def _make_semaphore(limit):
+    return asyncio.Semaphore(limit)
+
+
+def run_batch(urls, output, lang='English', api_choice='Gemini', summarize_way='syukaworld',
+              io_workers=8, llm_workers=4, use_cache=True, remove_fillers=False):
+    """
+    배치 실행. 이미 output에 성공 기록이 있는 영상은 건너뛴다.
+
+    Returns:
+        dict: BatchStats.report()
+    """
+    hedging.check_api_choice(api_choice)
+    done = load_checkpoint(output)
+    stats = BatchStats()
+
+    pending = []
+    seen = set()
+    for url in urls:
+        try:
+            video_id = extract_video_id(url)
+        except ValueError:
+            video_id = None
+        if video_id in done or (video_id is not None and video_id in seen):
+            stats.skipped += 1
+            continue
+        seen.add(video_id)
+        pending.append((url, video_id))
+
+    writer = JsonlWriter(output)
+    llm_semaphore = providers.run(_make_semaphore(llm_workers))
+    loop = providers.get_background_loop()
+    # 스크랩은 끝났지만 요약을 기다리는 자막이 메모리에 쌓이지 않도록 동시 처리 영상 수 제한
+    in_flight = threading.BoundedSemaphore(io_workers + llm_workers * 2)
+    remaining = [len(pending)]
+    remaining_lock = threading.Lock()
+    all_done = threading.Event()
+    if not pending:
+        all_done.set()
+
+    def finish(record, video_trace, tokens=0):
+        tracing.finish(video_trace)
+        record["trace_id"] = video_trace.trace_id
+        writer.write(record)
+        stats.record(record["status"] == "ok", tokens)
+        in_flight.release()
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                all_done.set()
+
+    def on_scraped(url, video_id, started, video_trace, context, future):
+        try:
+            scraped = future.result()
+        except Exception as e:
+            finish({"url": url, "video_id": video_id, "status": "error", "stage": "scrape", "error": repr(e)},
+                   video_trace)
+            return
+
+        def on_summarized(llm_future):
+            try:
+                summary, metadata = llm_future.result()
+            except Exception as e:
+                finish({"url": url, "video_id": video_id, "status": "error", "stage": "summarize",
+                        "error": repr(e)}, video_trace)
+                return
+            transcript_text = scraped["transcript"].text
+            finish({
+                "url": url,
+                "video_id": scraped["video_id"],
+                "status": "ok",
+                "title": scraped["title"],
+                "channel": scraped["channel"],
+                "chapters": len(scraped["chapters"]),
+                "transcript_chars": len(transcript_text),
+                "tokens_saved": scraped.get("compaction", {}).get("tokens_saved", 0),
+                "lang": lang,
+                "api_choice": api_choice,
+                "summarize_way": summarize_way,
+                "cached": metadata.get("cached", False),
+                "elapsed_sec": round(time.perf_counter() - started, 3),
+                "summary": summary,
+            }, video_trace, tokens=0 if metadata.get("cached") else estimate_tokens(transcript_text) + estimate_tokens(summary))
+
+        # 태스크는 예약하는 쪽의 컨텍스트를 복사하므로 영상의 트레이스 컨텍스트 안에서 예약한다
+        context.run(
+            asyncio.run_coroutine_threadsafe,
+            summarize_video(scraped, llm_semaphore, lang, api_choice, summarize_way, use_cache), loop,
+        ).add_done_callback(on_summarized)
+        # 검색 색인은 요약과 겹쳐서 (압축된 자막과 이미 받은 제목/채널 재사용)
+        io_pool.submit(
+            context.run, index_transcript, scraped["video_id"], scraped["transcript"], scraped["chapters"],
+            scraped["title"], scraped["channel"], True,
+        )
+
+    with ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="batch-io") as io_pool:
+        for url, video_id in pending:
+            in_flight.acquire()
+            started = time.perf_counter()
+            video_trace, context = tracing.start("batch.video", url=url)
+            future = io_pool.submit(context.run, scrape_video, url, remove_fillers)
+            future.add_done_callback(
+                lambda f, url=url, video_id=video_id, started=started, video_trace=video_trace, context=context:
+                    on_scraped(url, video_id, started, video_trace, context, f)
+            )
+        all_done.wait()
+    writer.close()
+    return stats.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize many YouTube videos into a JSONL file.")
+    parser.add_argument("source", help="URL 목록 파일 경로 ('-'이면 stdin)")
+    parser.add_argument("-o", "--output", required=True, help="결과 JSONL (체크포인트 겸용)")
+    parser.add_argument("--lang", default="English")
+    parser.add_argument("--api", dest="api_choice", default="Gemini", choices=sorted(providers.MODELS) + [hedging.FASTEST],
+                        help=f"공급자 ({hedging.FASTEST}: hedged request + failover)")
+    parser.add_argument("--way", dest="summarize_way", default="syukaworld",
+                        choices=("Chapters", "Detailed", "syukaworld"))
+    parser.add_argument("--io-workers", type=int, default=8)
+    parser.add_argument("--llm-workers", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true", help="요약 캐시를 쓰지 않음")
+    parser.add_argument("--remove-fillers", action="store_true", help="자막 압축 시 간투사(um, eh, 음 ...)도 제거")
+    args = parser.parse_args(argv)
+    tracing.serve_metrics_from_env()
+
+    report = run_batch(
+        read_urls(args.source), args.output, lang=args.lang, api_choice=args.api_choice,
+        summarize_way=args.summarize_way, io_workers=args.io_workers, llm_workers=args.llm_workers,
+        use_cache=not args.no_cache, remove_fillers=args.remove_fillers,
+    )
+    print(json.dumps(report), file=sys.stderr)
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
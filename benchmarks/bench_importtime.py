@@ -0,0 +1,91 @@
+# benchmarks/bench_importtime.py
+"""
+app.py 콜드 스타트 import 비용 가드.
+
+`python -X importtime -c "import app"`를 새 프로세스로 여러 번 실행해
+누적 import 시간(중앙값)과 가장 비싼 모듈을 보여 주고,
+- 누적 시간이 --budget-ms를 넘거나
+- 공급자 SDK(anthropic, openai, google.generativeai)나 numpy가 시작 시점에 로드되면
+종료 코드 1을 반환한다.
+
+Usage:
+    python -m benchmarks.bench_importtime [--module app] [--budget-ms 1500] [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 시작 시점에 import 되면 안 되는 모듈: 공급자 SDK (처음 선택될 때 providers.load_sdk가 import),
+# numpy (처음 추출 요약할 때 extractive가 import)
+LAZY_MODULES = ("anthropic", "openai", "google.generativeai", "numpy")
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime 출력 -> {모듈: (self_us, cumulative_us)}
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def run(module="app", repeat=5):
+    samples = [measure(module) for _ in range(repeat)]
+    totals = [s[module][1] / 1000 for s in samples]
+    last = samples[-1]
+    loaded_lazy = sorted(m for m in LAZY_MODULES if m in last)
+    top = sorted(last.items(), key=lambda item: item[1][1], reverse=True)[:15]
+    return {
+        "module": module,
+        "median_ms": statistics.median(totals),
+        "samples_ms": totals,
+        "eagerly_loaded_sdks": loaded_lazy,
+        "top_cumulative_ms": [(name, cum / 1000) for name, (_, cum) in top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    result = run(args.module, args.repeat)
+    print(f"import {result['module']}: median {result['median_ms']:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, ms in result["top_cumulative_ms"]:
+        print(f"  {ms:8.1f} ms  {name}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    failed = False
+    if result["eagerly_loaded_sdks"]:
+        print(f"FAIL: lazy modules imported at startup: {', '.join(result['eagerly_loaded_sdks'])}")
+        failed = True
+    if result["median_ms"] > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
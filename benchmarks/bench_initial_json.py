@@ -0,0 +1,109 @@
+# benchmarks/bench_initial_json.py
+"""
+ytInitialPlayerResponse 추출 벤치마크.
+
+예전 경로(non-greedy 정규식 + json.loads, 설명 챕터용 BeautifulSoup 파싱)와
+단일 패스 raw_decode 추출기(extract_initial_json + WatchPage)를
+저장된 fixture 페이지에서 시간/최대 메모리로 비교한다.
+
+Usage:
+    python -m benchmarks.bench_initial_json [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fixtures import load_watch_pages
+from scrape_youtube import WatchPage
+
+
+def legacy_chapters(html):
+    """
+    예전 extract_chapters_from_html + extract_chapters_from_description 경로
+    """
+    chapters = []
+    match = re.search(r"ytInitialPlayerResponse\s*=\s*(\{.*?\});", html, re.DOTALL)
+    if match:
+        try:
+            data = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            data = {}
+        chapters_data = (
+            data.get("playerOverlays", {}).get("playerOverlayRenderer", {})
+            .get("decoratedPlayerBarRenderer", {}).get("decoratedPlayerBarRenderer", {})
+            .get("playerBar", {}).get("chapteredPlayerBarRenderer", {}).get("chapters", [])
+        )
+        for ch in chapters_data:
+            title = ch.get("title", {}).get("simpleText", None)
+            start_ms = ch.get("timeRangeStartMillis")
+            if title and start_ms is not None:
+                chapters.append((int(start_ms) / 1000, title))
+    if chapters:
+        return chapters
+
+    soup = BeautifulSoup(html, "html.parser")
+    desc_meta = soup.find("meta", itemprop="description")
+    description = desc_meta.get("content", "") if desc_meta else ""
+    for line in description.split("\n"):
+        match = re.match(r"^(\d+:\d+)\s+(.*)$", line)
+        if match:
+            chapters.append((match.group(1), match.group(2)))
+    return chapters
+
+
+def single_pass_chapters(html):
+    return WatchPage("https://www.youtube.com/watch?v=fixture", html=html).chapters()
+
+
+def measure(func, html, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "peak_kib": peak / 1024,
+        "chapters": len(result),
+    }
+
+
+def run(repeat=5):
+    results = {}
+    for name, html in load_watch_pages().items():
+        results[name] = {
+            "size_mb": len(html) / 1e6,
+            "legacy": measure(legacy_chapters, html, repeat),
+            "single_pass": measure(single_pass_chapters, html, repeat),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(f"{'page':<12} {'MB':>5}  {'legacy ms':>10} {'new ms':>8}  {'legacy KiB':>11} {'new KiB':>9}  chapters")
+    for name, r in results.items():
+        old, new = r["legacy"], r["single_pass"]
+        print(f"{name:<12} {r['size_mb']:>5.2f}  {old['median_ms']:>10.1f} {new['median_ms']:>8.1f}  "
+              f"{old['peak_kib']:>11.0f} {new['peak_kib']:>9.0f}  {old['chapters']} -> {new['chapters']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
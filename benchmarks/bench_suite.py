@@ -0,0 +1,364 @@
+# benchmarks/bench_suite.py
+"""
+오프라인 벤치마크 묶음: 단계별 마이크로 벤치마크 + 동시성 하의 end-to-end 지연/처리량.
+
+네트워크 없이 녹화된 fixture(watch 페이지, 자막 페이로드)와 로컬 가짜 서버만 쓴다.
+- FakeYouTubeServer: watch 페이지/썸네일/자막을 HTTP로 (공유 세션, 실제 파싱 경로 그대로)
+- FakeLLMServer: OpenAI/Anthropic/Gemini 호환, 지연과 스트리밍 조각 간격 조절 (SDK는 base_url만 바꿈)
+
+마이크로 벤치마크 (fixture별 중앙값/p95, ms):
+    extract_metadata, extract_chapters_from_html, extract_chapters_from_description,
+    transcript_from_segments, compact_transcript, build_prompt[syukaworld|Detailed|Chapters]
+end-to-end (동시성별):
+    Prefetch(메타데이터/썸네일/자막) -> 스트리밍 요약까지 영상당 지연 p50/p90/p99, TTFT, 처리량,
+    트레이스(tracing)에서 모은 span별 중앙값
+
+결과는 JSON으로 저장하고, --compare로 이전 커밋의 결과와 비교한다.
+
+Usage:
+    python -m benchmarks.bench_suite --json bench.json
+    python -m benchmarks.bench_suite --concurrency 1,8,32 --videos 64 --llm-latency 0.3 --json after.json --compare before.json
+    python -m benchmarks.bench_suite --skip-e2e --repeat 50
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cache
+import providers
+import ratelimit
+import scrape_youtube
+import search_index
+import singleflight
+import tracing
+from benchmarks.fake_llm_server import FakeLLMServer
+from benchmarks.fake_youtube_server import FakeYouTubeServer
+from benchmarks.fixtures import load_transcripts, load_watch_pages
+from compaction import compact_transcript
+from pipeline import Prefetch
+from summarize_text import build_prompt, summarize_text_stream
+from transcript import Transcript, normalize_chapters
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROMPT_WAYS = ("syukaworld", "Detailed", "Chapters")
+
+# 비교 시 이보다 큰 변화만 표시
+REGRESSION_THRESHOLD = 0.10
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summary(seconds):
+    return {
+        "median_ms": round(statistics.median(seconds) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 0.95) * 1000, 3),
+        "min_ms": round(min(seconds) * 1000, 3),
+        "runs": len(seconds),
+    }
+
+
+def measure(func, repeat, setup=None):
+    """
+    func(setup())를 repeat번 실행한 시간 요약 (setup 시간은 제외)
+    """
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return _summary(timings)
+
+
+def _fresh_page(video_id, html):
+    # 파싱 결과를 재사용하지 않도록 매번 새 WatchPage를 프로세스 캐시에 넣는다
+    url = scrape_youtube.WATCH_URL.format(video_id=video_id)
+    page = scrape_youtube.WatchPage(url, html=html)
+    with scrape_youtube._watch_pages_lock:
+        scrape_youtube._watch_pages[video_id] = (time.monotonic(), page)
+    return url
+
+
+def run_micro(repeat=20, pages=None, transcripts=None):
+    """
+    디스크 캐시를 끈 상태에서 잰다 (캐시 적중이 아닌 실제 파싱 비용).
+
+    Returns:
+        dict: {벤치마크 이름: {fixture 이름: 시간 요약}}
+    """
+    pages = pages or load_watch_pages()
+    transcripts = transcripts or load_transcripts()
+    disk_cache = cache.get_cache()
+    cache.set_cache(None)
+    try:
+        return _run_micro(repeat, pages, transcripts)
+    finally:
+        cache.set_cache(disk_cache)
+
+
+def _run_micro(repeat, pages, transcripts):
+    results = {}
+
+    scrape_stages = {
+        "extract_metadata": scrape_youtube.extract_metadata,
+        "extract_chapters_from_html": scrape_youtube.extract_chapters_from_html,
+        "extract_chapters_from_description": scrape_youtube.extract_chapters_from_description,
+    }
+    for stage, func in scrape_stages.items():
+        results[stage] = {
+            name: measure(func, repeat, setup=lambda name=name, html=html: _fresh_page(f"{name}_bench", html))
+            for name, html in pages.items()
+        }
+
+    parsed = {name: Transcript.from_segments(segments) for name, segments in transcripts.items()}
+    results["transcript_from_segments"] = {
+        name: measure(lambda _, segments=segments: Transcript.from_segments(segments), repeat)
+        for name, segments in transcripts.items()
+    }
+    results["compact_transcript"] = {
+        name: measure(lambda _, t=t: compact_transcript(t), repeat) for name, t in parsed.items()
+    }
+
+    for way in PROMPT_WAYS:
+        rows = {}
+        for name, t in parsed.items():
+            html = pages.get(name)
+            chapters = []
+            if html is not None:
+                page = scrape_youtube.WatchPage("https://www.youtube.com/watch?v=bench", html=html)
+                chapters = normalize_chapters(page.chapters())
+                title = page.title
+            else:
+                title = name
+            text = compact_transcript(t)[0].text
+            rows[name] = measure(
+                lambda _, text=text, title=title, chapters=chapters: build_prompt(
+                    text, lang="en", title=title, chapters=chapters, summarize_way=way),
+                repeat,
+            )
+        results[f"build_prompt[{way}]"] = rows
+    return results
+
+
+def _summarize_video(url, api_choice, summarize_way):
+    # app.py와 같은 경로: 단계 동시 prefetch -> 스트리밍 요약
+    with tracing.trace("bench.video", url=url) as video_trace:
+        started = time.perf_counter()
+        prefetch = Prefetch(url)
+        title, _ = prefetch.result("metadata")
+        transcript, chapters = prefetch.result("transcript")
+        stats = {}
+        # 같은 fixture를 여러 video_id로 받으므로 제목에 ID를 붙여 서로 다른 요청으로 만든다
+        # (같은 프롬프트의 동시 요청은 singleflight로 LLM 호출 하나가 된다)
+        summary = "".join(summarize_text_stream(
+            transcript, lang="English", title=f"{title} ({prefetch.video_id})", chapters=chapters, api_choice=api_choice,
+            summarize_way=summarize_way, use_cache=False, stats=stats,
+        ))
+        prefetch.result("thumbnail")
+        latency = time.perf_counter() - started
+    return {
+        "latency": latency,
+        "ttft": stats.get("ttft"),
+        "chars": len(summary),
+        "spans": video_trace.totals(),
+    }
+
+
+def run_e2e(concurrency=(1, 4, 16), videos=32, api_choice="Gemini", summarize_way="syukaworld",
+            youtube_latency=0.02, llm_latency=0.2, chunk_delay=0.02, chunks=8):
+    """
+    동시성 단계마다 videos개 영상을 요약하고 지연 백분위와 처리량을 잰다.
+    디스크/요약 캐시와 검색 색인은 끄고, rate limit은 측정에 걸리지 않도록 넉넉하게 둔다.
+
+    Returns:
+        dict: {str(concurrency): {"videos_per_sec", "latency_ms": {p50, p90, p99}, "ttft_ms": {...},
+                                  "llm_requests", "spans_median_ms": {span: ms}}}
+    """
+    saved_env = {name: os.environ.get(name) for name in
+                 list(providers.BASE_URL_ENV.values()) + [providers.API_KEY_ENV[api_choice], "YTS_RATE_LIMITS"]}
+    saved_caches = (cache.get_cache(), cache.get_summary_cache(), search_index.get_index(), singleflight.get_group())
+    results = {}
+    with FakeYouTubeServer(latency=youtube_latency) as youtube, \
+            FakeLLMServer(latency=llm_latency, chunk_delay=chunk_delay, chunks=chunks) as llm:
+        original = youtube.patch(scrape_youtube)
+        os.environ.update(llm.environ())
+        os.environ.setdefault(providers.API_KEY_ENV[api_choice], "bench")
+        os.environ["YTS_RATE_LIMITS"] = json.dumps({name: {"rpm": 1e9, "tpm": 1e12} for name in providers.MODELS})
+        cache.set_cache(None)
+        cache.set_summary_cache(None)
+        search_index.set_index(None)
+        singleflight.set_group(singleflight.Group())
+        ratelimit.set_backend(ratelimit.MemoryBackend())
+        providers.run(_drop_clients())  # 새 base_url로 클라이언트를 다시 만든다
+        names = sorted(youtube.pages)
+        try:
+            for level in concurrency:
+                scrape_youtube._watch_pages.clear()
+                before = len(llm.requests)
+                urls = [scrape_youtube.WATCH_URL.format(video_id=f"{names[i % len(names)]}_{level}x{i:04d}")
+                        for i in range(videos)]
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=level, thread_name_prefix="bench-e2e") as pool:
+                    rows = list(pool.map(lambda url: _summarize_video(url, api_choice, summarize_way), urls))
+                elapsed = time.perf_counter() - started
+                results[str(level)] = _e2e_summary(rows, elapsed, len(llm.requests) - before)
+        finally:
+            youtube.unpatch(scrape_youtube, original)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            cache.set_cache(saved_caches[0])
+            cache.set_summary_cache(saved_caches[1])
+            search_index.set_index(saved_caches[2])
+            singleflight.set_group(saved_caches[3])
+            ratelimit.set_backend(None)
+            providers.run(_drop_clients())
+    return results
+
+
+async def _drop_clients():
+    providers._state()["clients"].clear()
+
+
+def _e2e_summary(rows, elapsed, llm_requests):
+    latencies = [row["latency"] for row in rows]
+    ttfts = [row["ttft"] for row in rows if row["ttft"] is not None]
+    spans = {}
+    for row in rows:
+        for name, seconds in row["spans"].items():
+            spans.setdefault(name, []).append(seconds)
+
+    def pct(values):
+        return {f"p{q}": round(percentile(values, q / 100) * 1000, 1) for q in (50, 90, 99)} if values else {}
+
+    return {
+        "videos": len(rows),
+        "elapsed_sec": round(elapsed, 3),
+        "videos_per_sec": round(len(rows) / elapsed, 3),
+        "latency_ms": pct(latencies),
+        "ttft_ms": pct(ttfts),
+        "llm_requests": llm_requests,
+        "spans_median_ms": {name: round(statistics.median(v) * 1000, 2) for name, v in sorted(spans.items())},
+    }
+
+
+def environment():
+    """
+    비교용 실행 환경 정보 (커밋, 파이썬, 플랫폼)
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.time(),
+    }
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """
+    두 결과의 주요 수치(마이크로 중앙값, e2e p50/처리량) 변화율
+
+    Returns:
+        list: [(지표 이름, 이전 값, 새 값, 변화율), ...] (|변화율| >= threshold 만)
+    """
+    rows = []
+
+    def add(name, before, after, higher_is_better=False):
+        if not before or after is None:
+            return
+        change = (after - before) / before
+        if higher_is_better:
+            change = -change
+        if abs(change) >= threshold:
+            rows.append((name, before, after, round(change, 3)))
+
+    for bench, fixtures in new.get("micro", {}).items():
+        for name, result in fixtures.items():
+            before = old.get("micro", {}).get(bench, {}).get(name)
+            if before:
+                add(f"micro.{bench}.{name}.median_ms", before["median_ms"], result["median_ms"])
+    for level, result in new.get("e2e", {}).items():
+        before = old.get("e2e", {}).get(level)
+        if before:
+            add(f"e2e.c{level}.latency_p50_ms", before["latency_ms"].get("p50"), result["latency_ms"].get("p50"))
+            add(f"e2e.c{level}.videos_per_sec", before["videos_per_sec"], result["videos_per_sec"],
+                higher_is_better=True)
+    return rows
+
+
+def _print_micro(results):
+    for bench, fixtures in results.items():
+        cells = "  ".join(f"{name} {r['median_ms']:.2f}" for name, r in fixtures.items())
+        print(f"{bench:<36} {cells}")
+
+
+def _print_e2e(results):
+    print(f"{'conc':>4} {'videos/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'ttft p50':>9} {'llm req':>8}")
+    for level, r in results.items():
+        print(f"{level:>4} {r['videos_per_sec']:>9.2f} {r['latency_ms']['p50']:>8.0f} {r['latency_ms']['p90']:>8.0f} "
+              f"{r['latency_ms']['p99']:>8.0f} {r['ttft_ms'].get('p50', 0):>9.0f} {r['llm_requests']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="마이크로 벤치마크 반복 횟수")
+    parser.add_argument("--concurrency", default="1,4,16", help="end-to-end 동시성 단계 (쉼표 구분)")
+    parser.add_argument("--videos", type=int, default=32, help="동시성 단계마다 요약할 영상 수")
+    parser.add_argument("--api", dest="api_choice", default="Gemini", choices=sorted(providers.MODELS))
+    parser.add_argument("--way", dest="summarize_way", default="syukaworld", choices=PROMPT_WAYS)
+    parser.add_argument("--youtube-latency", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="가짜 LLM 첫 조각까지 지연 (초)")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="가짜 LLM 스트리밍 조각 간격 (초)")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-e2e", action="store_true")
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    results = {"environment": environment(), "args": vars(args)}
+    if not args.skip_micro:
+        results["micro"] = run_micro(args.repeat)
+        _print_micro(results["micro"])
+    if not args.skip_e2e:
+        results["e2e"] = run_e2e(
+            concurrency=[int(c) for c in args.concurrency.split(",") if c], videos=args.videos,
+            api_choice=args.api_choice, summarize_way=args.summarize_way,
+            youtube_latency=args.youtube_latency, llm_latency=args.llm_latency, chunk_delay=args.chunk_delay,
+        )
+        _print_e2e(results["e2e"])
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        changes = compare(old, results)
+        print(f"\nvs {old.get('environment', {}).get('commit') or args.compare}: "
+              f"{len(changes)} metrics changed by >= {REGRESSION_THRESHOLD:.0%} (positive = worse)")
+        for name, before, after, change in changes:
+            print(f"  {name:<60} {before:>10} -> {after:<10} {change:+.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
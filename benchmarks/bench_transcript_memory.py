@@ -0,0 +1,135 @@
+# benchmarks/bench_transcript_memory.py
+"""
+자막 표현 방식별 메모리 벤치마크.
+
+예전 경로(YouTubeTranscriptApi 세그먼트 dict 리스트 -> 문자열 리스트 -> join 문자열)와
+배열 기반 Transcript(array('d') + 단일 텍스트 버퍼 + 오프셋)를 합성한 긴 라이브 자막에서
+유지 메모리(tracemalloc)와 챕터 분할 비용, 캐시 직렬화 크기로 비교한다.
+
+Usage:
+    python -m benchmarks.bench_transcript_memory [--hours 5] [--chapters 40] [--json out.json]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from transcript import Transcript, align_chapters
+
+_WORDS = ("so", "today", "we", "are", "going", "to", "talk", "about", "caching", "latency",
+          "이번", "영상에서는", "캐시와", "지연", "시간을", "이야기합니다", "bueno", "vamos", "a", "ver")
+
+
+def make_segments(hours, seed=0):
+    """
+    자동 생성 자막과 비슷한 세그먼트 (약 2.5초, 6~10단어)
+    """
+    rng = random.Random(seed)
+    segments = []
+    start = 0.0
+    while start < hours * 3600:
+        duration = round(rng.uniform(1.5, 3.5), 3)
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 10)))
+        segments.append({"text": text, "start": start, "duration": duration})
+        start = round(start + duration, 3)
+    return segments
+
+
+def _retained(build):
+    # build()가 만든 객체가 유지하는 메모리 (입력 세그먼트는 측정 전에 이미 존재)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    value = build()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, after - before, peak - before
+
+
+def legacy_representation(segments):
+    # scrape_youtube 예전 경로: 세그먼트 dict 리스트(복사) + 텍스트 리스트 + join 결과
+    raw = [dict(s) for s in segments]
+    texts = [s["text"] for s in raw]
+    return raw, texts, " ".join(texts)
+
+
+def legacy_chapter_split(representation, bounds):
+    raw, _, _ = representation
+    return [" ".join(s["text"] for s in raw[lo:hi]) for lo, hi in bounds]
+
+
+def run(hours=5, chapter_count=40):
+    segments = make_segments(hours)
+    total = segments[-1]["start"] + segments[-1]["duration"]
+    chapters = [(i * total / chapter_count, f"chapter {i}") for i in range(chapter_count)]
+
+    legacy, legacy_bytes, legacy_peak = _retained(lambda: legacy_representation(segments))
+    compact, compact_bytes, compact_peak = _retained(lambda: Transcript.from_segments(segments))
+    assert legacy[2] == compact.text
+
+    bounds = []
+    for k, (start, _) in enumerate(chapters):
+        end = chapters[k + 1][0] if k + 1 < len(chapters) else total + 1
+        bounds.append((compact.index_at(start), compact.index_at(end)))
+
+    started = time.perf_counter()
+    _, legacy_split_bytes, _ = _retained(lambda: legacy_chapter_split(legacy, bounds))
+    legacy_split_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    _, view_split_bytes, _ = _retained(lambda: align_chapters(compact, chapters))
+    view_split_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    json_blob = json.dumps(segments, ensure_ascii=False).encode("utf-8")
+    json.loads(json_blob)
+    json_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    binary_blob = compact.to_bytes()
+    Transcript.from_bytes(binary_blob)
+    binary_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "hours": hours,
+        "segments": len(segments),
+        "text_chars": len(compact.text),
+        "legacy": {
+            "retained_mib": legacy_bytes / 2**20,
+            "peak_mib": legacy_peak / 2**20,
+            "chapter_split_mib": legacy_split_bytes / 2**20,
+            "chapter_split_ms": legacy_split_ms,
+            "cache_bytes": len(json_blob),
+            "cache_roundtrip_ms": json_ms,
+        },
+        "array": {
+            "retained_mib": compact_bytes / 2**20,
+            "peak_mib": compact_peak / 2**20,
+            "chapter_split_mib": view_split_bytes / 2**20,
+            "chapter_split_ms": view_split_ms,
+            "cache_bytes": len(binary_blob),
+            "cache_roundtrip_ms": binary_ms,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=5)
+    parser.add_argument("--chapters", type=int, default=40)
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    result = run(args.hours, args.chapters)
+    print(f"{result['hours']}h, {result['segments']} segments, {result['text_chars']} chars")
+    print(f"{'':<8} {'retained MiB':>13} {'peak MiB':>9} {'split MiB':>10} {'split ms':>9} "
+          f"{'cache KiB':>10} {'cache ms':>9}")
+    for name in ("legacy", "array"):
+        r = result[name]
+        print(f"{name:<8} {r['retained_mib']:>13.2f} {r['peak_mib']:>9.2f} {r['chapter_split_mib']:>10.2f} "
+              f"{r['chapter_split_ms']:>9.1f} {r['cache_bytes'] / 1024:>10.0f} {r['cache_roundtrip_ms']:>9.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# benchmarks/fake_llm_server.py
+"""
+로컬 가짜 LLM 공급자 서버 (테스트/벤치마크용).
+
+OpenAI(/v1/chat/completions), Anthropic(/v1/messages),
+Gemini(/v1beta/models/{model}:generateContent, :streamGenerateContent, /v1beta/cachedContents) 호환 엔드포인트를
+지연 시간, 오류 상태 코드, 스트리밍 조각 간격을 조절하며 흉내 낸다.
+실제 SDK를 그대로 쓰고 base_url만 바꾼다:
+
+    server = FakeLLMServer(latency=0.2).start()
+    os.environ.update(server.environ())   # YTS_{OPENAI,ANTHROPIC,XAI,GEMINI}_BASE_URL
+    ...
+    server.stop()
+
+Usage:
+    python -m benchmarks.fake_llm_server --port 8765 --latency 0.5
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer:
+    """
+    Args:
+        latency (float): 응답(스트리밍이면 첫 조각)까지의 지연 (초)
+        text (str): 응답 텍스트
+        status (int): 200이 아니면 해당 상태 코드로 오류 응답
+        chunk_delay (float): 스트리밍 조각 사이 지연 (초)
+        chunks (int): 스트리밍 조각 수
+        headers (dict): 오류 응답에 붙일 헤더 (예: {"retry-after": "1"})
+        host (str), port (int): 바인드 주소. port=0이면 임의 포트
+    """
+
+    def __init__(self, latency=0.0, text="fake summary", status=200, chunk_delay=0.0, chunks=4,
+                 headers=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.text = text
+        self.status = status
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.headers = dict(headers or {})
+        self.requests = []  # 생성 요청 (path, body) 기록
+        self.cached_contents = []  # Gemini cached content 생성 요청 body 기록
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self):
+        return self.url + "/v1"
+
+    @property
+    def anthropic_base_url(self):
+        return self.url
+
+    @property
+    def gemini_base_url(self):
+        return self.url
+
+    def environ(self):
+        """
+        providers가 읽는 엔드포인트 재정의 환경 변수
+        """
+        return {
+            "YTS_OPENAI_BASE_URL": self.openai_base_url,
+            "YTS_XAI_BASE_URL": self.openai_base_url,
+            "YTS_ANTHROPIC_BASE_URL": self.anthropic_base_url,
+            "YTS_GEMINI_BASE_URL": self.gemini_base_url,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def pieces(self):
+        # 텍스트를 chunks개 조각으로 (이어 붙이면 원문)
+        n = max(1, min(self.chunks, len(self.text)))
+        size = -(-len(self.text) // n)
+        return [self.text[i:i + size] for i in range(0, len(self.text), size)] or [""]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.split("?")[0].endswith("/cachedContents"):
+                    return self._gemini_cache(body)
+                with server._lock:
+                    server.requests.append((self.path, body))
+                time.sleep(server.latency)
+                if server.status != 200:
+                    return self._error(server.status)
+                if self.path.endswith("/chat/completions"):
+                    return self._openai(body)
+                if self.path.endswith("/messages"):
+                    return self._anthropic(body)
+                if ":generateContent" in self.path or ":streamGenerateContent" in self.path:
+                    return self._gemini(body)
+                self._error(404)
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _error(self, status):
+                self._json(status, {"type": "error", "error": {"type": "api_error", "message": f"fake {status}"}},
+                           server.headers)
+
+            def _sse(self, events):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i, (event, payload) in enumerate(events):
+                    if i and server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                    data = payload if isinstance(payload, str) else json.dumps(payload)
+                    prefix = f"event: {event}\n" if event else ""
+                    self.wfile.write(f"{prefix}data: {data}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.close_connection = True
+
+            def _openai(self, body):
+                model = body.get("model", "fake")
+                if not body.get("stream"):
+                    return self._json(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": server.text}}],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    })
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": model}
+                events = [(None, dict(chunk, choices=[{"index": 0, "delta": {"content": piece},
+                                                       "finish_reason": None}]))
+                          for piece in server.pieces()]
+                events.append((None, dict(chunk, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])))
+                events.append((None, "[DONE]"))
+                self._sse(events)
+
+            def _anthropic(self, body):
+                model = body.get("model", "fake")
+                message = {"id": "msg_fake", "type": "message", "role": "assistant", "model": model,
+                           "stop_reason": "end_turn", "stop_sequence": None,
+                           "usage": {"input_tokens": 1, "output_tokens": 1}}
+                if not body.get("stream"):
+                    return self._json(200, dict(message, content=[{"type": "text", "text": server.text}]))
+                events = [
+                    ("message_start", {"type": "message_start",
+                                       "message": dict(message, content=[], stop_reason=None)}),
+                    ("content_block_start", {"type": "content_block_start", "index": 0,
+                                             "content_block": {"type": "text", "text": ""}}),
+                ]
+                events += [("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                    "delta": {"type": "text_delta", "text": piece}})
+                           for piece in server.pieces()]
+                events += [
+                    ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+                    ("message_delta", {"type": "message_delta",
+                                       "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                       "usage": {"output_tokens": 1}}),
+                    ("message_stop", {"type": "message_stop"}),
+                ]
+                self._sse(events)
+
+            def _gemini_cache(self, body):
+                with server._lock:
+                    server.cached_contents.append(body)
+                    name = f"cachedContents/fake-{len(server.cached_contents)}"
+                now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                self._json(200, {"name": name, "model": body.get("model"), "createTime": now,
+                                 "updateTime": now, "expireTime": now, "usageMetadata": {"totalTokenCount": 1}})
+
+            def _gemini(self, body):
+                # cached content를 쓴 요청은 캐시된 토큰 수를 usage에 넣는다
+                cached = 1 if body.get("cachedContent") else 0
+
+                def response(text, done):
+                    payload = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]},
+                                               "index": 0}]}
+                    if done:
+                        payload["candidates"][0]["finishReason"] = "STOP"
+                        payload["usageMetadata"] = {"promptTokenCount": 1 + cached, "candidatesTokenCount": 1,
+                                                    "totalTokenCount": 2 + cached,
+                                                    "cachedContentTokenCount": cached}
+                    return payload
+
+                if ":generateContent" in self.path:
+                    return self._json(200, response(server.text, True))
+                pieces = server.pieces()
+                payloads = [response(piece, i == len(pieces) - 1) for i, piece in enumerate(pieces)]
+                if "alt=sse" in self.path:
+                    return self._sse([(None, payload) for payload in payloads])
+                # alt=sse가 없으면 REST 스트림은 조금씩 보내는 JSON 배열
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i, payload in enumerate(payloads):
+                    if i and server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                    self.wfile.write((("[" if i == 0 else ",\r\n") + json.dumps(payload)).encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"]")
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI/Anthropic/Gemini-compatible LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    parser.add_argument("--status", type=int, default=200)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(latency=args.latency, chunk_delay=args.chunk_delay, status=args.status,
+                           host=args.host, port=args.port)
+    for name, value in server.environ().items():
+        print(f"export {name}={value}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# benchmarks/fake_youtube_server.py
+"""
+녹화된 fixture(benchmarks/fixtures)를 내보내는 로컬 가짜 YouTube 서버 (벤치마크용).
+
+- GET /watch?v={video_id}          watch 페이지 HTML
+- GET /vi/{video_id}/{name}.jpg    썸네일 (ETag / If-None-Match -> 304)
+- GET /transcript/{video_id}       녹화된 자막 페이로드 (youtube_transcript_api 형식 JSON)
+
+video_id의 '_' 앞부분이 fixture 이름이다 (예: "korean_0007" -> korean). 같은 fixture를
+서로 다른 video_id로 여러 번 받게 해서 프로세스 내 캐시에 걸리지 않는 요청을 만든다.
+
+    with FakeYouTubeServer(latency=0.05) as server:
+        server.patch(scrape_youtube)      # WATCH_URL, THUMBNAIL_URL, fetch_transcript를 서버로
+        ...
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import http_client
+from benchmarks.fixtures import load_transcripts, load_watch_pages
+
+THUMBNAIL_BYTES = 48 * 1024
+
+
+class FakeYouTubeServer:
+    """
+    Args:
+        latency (float): 응답마다 더하는 지연 (초)
+        pages (dict, optional): {이름: html}. 기본값은 load_watch_pages()
+        transcripts (dict, optional): {이름: segments}. 기본값은 load_transcripts()
+        host (str), port (int): 바인드 주소. port=0이면 임의 포트
+    """
+
+    def __init__(self, latency=0.0, pages=None, transcripts=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.pages = {name: html.encode("utf-8") for name, html in (pages or load_watch_pages()).items()}
+        self.transcripts = {
+            name: json.dumps(segments, ensure_ascii=False).encode("utf-8")
+            for name, segments in (transcripts or load_transcripts()).items()
+        }
+        self.thumbnail = bytes(i % 251 for i in range(THUMBNAIL_BYTES))
+        self.requests = []  # 요청 경로 기록
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name="fake-youtube", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fixture_name(self, video_id):
+        name = video_id.split("_")[0]
+        if name not in self.pages:
+            raise KeyError(f"no fixture for video_id {video_id!r}")
+        return name
+
+    def fetch_transcript(self, video_id, languages=None, page=None):
+        """
+        scrape_youtube.fetch_transcript 대체: 녹화된 페이로드를 공유 HTTP 세션으로 받는다.
+        (youtube_transcript_api는 YouTube 주소가 고정되어 있어 서버로 돌릴 수 없다)
+        """
+        r = http_client.get(f"{self.url}/transcript/{video_id}")
+        r.raise_for_status()
+        return r.json()
+
+    def patch(self, module, monkeypatch=None):
+        """
+        scrape_youtube 모듈이 이 서버를 보도록 바꾼다. monkeypatch(pytest)를 주면 테스트 후 되돌린다.
+
+        Returns:
+            dict: 바꾸기 전 값 (monkeypatch 없이 쓸 때 unpatch에 넘긴다)
+        """
+        values = {
+            "WATCH_URL": self.url + "/watch?v={video_id}",
+            "THUMBNAIL_URL": self.url + "/vi/{video_id}/{name}.jpg",
+            "fetch_transcript": self.fetch_transcript,
+        }
+        original = {name: getattr(module, name) for name in values}
+        for name, value in values.items():
+            if monkeypatch is not None:
+                monkeypatch.setattr(module, name, value)
+            else:
+                setattr(module, name, value)
+        return original
+
+    @staticmethod
+    def unpatch(module, original):
+        for name, value in original.items():
+            setattr(module, name, value)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+                parts = urlsplit(self.path)
+                try:
+                    if parts.path == "/watch":
+                        video_id = parse_qs(parts.query)["v"][0]
+                        return self._send(server.pages[server.fixture_name(video_id)], "text/html; charset=utf-8")
+                    if parts.path.startswith("/transcript/"):
+                        video_id = parts.path.rsplit("/", 1)[1]
+                        return self._send(server.transcripts[server.fixture_name(video_id)], "application/json")
+                    if parts.path.startswith("/vi/"):
+                        return self._thumbnail()
+                except KeyError:
+                    pass
+                self.send_error(404)
+
+            def _thumbnail(self):
+                etag = '"' + hashlib.md5(server.thumbnail).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send(server.thumbnail, "image/jpeg", {"ETag": etag})
+
+            def _send(self, data, content_type, headers=None):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -0,0 +1,31 @@
+# benchmarks/fixtures/__init__.py
+import glob
+import gzip
+import json
+import os
+
+FIXTURES_DIR = os.path.dirname(__file__)
+
+
+def load_watch_pages():
+    """
+    watch_pages/*.html.gz 를 {이름: html} dict로 읽는다.
+    """
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "watch_pages", "*.html.gz"))):
+        name = os.path.basename(path)[:-len(".html.gz")]
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            pages[name] = f.read()
+    return pages
+
+
+def load_transcripts():
+    """
+    transcripts/*.json.gz (youtube_transcript_api 형식 세그먼트 리스트)를 {이름: segments} dict로 읽는다.
+    """
+    transcripts = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "transcripts", "*.json.gz"))):
+        name = os.path.basename(path)[:-len(".json.gz")]
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            transcripts[name] = json.load(f)
+    return transcripts
@@ -0,0 +1,192 @@
+# benchmarks/fixtures/make_watch_pages.py
+"""
+benchmarks/fixtures/watch_pages/*.html.gz 와 transcripts/*.json.gz 생성기.
+
+실제 watch 페이지의 구조(긴 ytcfg 스크립트, 1 MB가 넘는 ytInitialData,
+문자열 안의 '};' 등)를 흉내 낸 결정적(deterministic) 페이지를 만든다.
+페이지마다 youtube_transcript_api가 돌려주는 형식({"text", "start", "duration"} 리스트)의
+자막 페이로드도 함께 만든다 (long은 자동 생성 자막처럼 앞 줄을 반복하는 롤링 캡션).
+네트워크 없이 재현 가능한 벤치마크/테스트 입력으로 사용.
+시드는 페이지마다 고정이라 페이지를 추가해도 기존 파일은 바뀌지 않는다.
+
+Usage:
+    python -m benchmarks.fixtures.make_watch_pages
+"""
+import gzip
+import json
+import os
+import random
+
+OUT_DIR = os.path.join(os.path.dirname(__file__), "watch_pages")
+TRANSCRIPT_DIR = os.path.join(os.path.dirname(__file__), "transcripts")
+
+_SPEECH = {
+    "en": ("so today we are going to talk about interest rates and what the central bank did this week "
+           "the market reacted quickly and housing prices are still climbing in most big cities "
+           "let me show you the numbers because they tell a very different story than the headlines").split(),
+    "ko": ("오늘은 금리 인하 이야기를 해 보겠습니다 이번 주에 중앙은행이 발표한 내용을 보면 "
+           "시장이 아주 빠르게 반응했고 부동산 가격은 여전히 대부분의 도시에서 오르고 있습니다 "
+           "숫자를 같이 보시면 뉴스 제목과는 전혀 다른 이야기가 보입니다 음 그러니까").split(),
+}
+
+
+def _filler_items(rng, count, lang="en"):
+    words = {
+        "en": ["market", "economy", "stock", "interest", "rate", "growth", "policy", "news"],
+        "ko": ["경제", "주식", "금리", "성장", "정책", "뉴스", "시장", "환율"],
+    }[lang]
+    items = []
+    for i in range(count):
+        items.append({
+            "compactVideoRenderer": {
+                "videoId": "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789_-") for _ in range(11)),
+                "title": {"simpleText": " ".join(rng.choice(words) for _ in range(6))},
+                "viewCountText": {"simpleText": f"{rng.randint(1000, 9999999)} views"},
+                "lengthText": {"simpleText": f"{rng.randint(1, 59)}:{rng.randint(0, 59):02d}"},
+                "navigationEndpoint": {"clickTrackingParams": f"CBQQpDAYAiITCO{i:08d}", "commandMetadata": {
+                    "webCommandMetadata": {"url": f"/watch?v=x{i}", "webPageType": "WEB_PAGE_TYPE_WATCH"}}},
+            }
+        })
+    return items
+
+
+def _player_bar(renderer):
+    return {"playerOverlays": {"playerOverlayRenderer": {"decoratedPlayerBarRenderer": {
+        "decoratedPlayerBarRenderer": {"playerBar": renderer}}}}}
+
+
+def _chapter(title, start_ms):
+    return {"title": {"simpleText": title}, "timeRangeStartMillis": start_ms}
+
+
+def make_page(video_id, title, channel, description, player_chapters=None, marker_chapters=None,
+              lang="en", filler=3000, seed=0):
+    rng = random.Random(seed)
+    player_response = {
+        "videoDetails": {
+            "videoId": video_id,
+            "title": title,
+            "author": channel,
+            "shortDescription": description,
+        },
+        # 문자열 리터럴 안의 '};' 때문에 non-greedy 정규식이 중간에서 끊긴다
+        "playbackTracking": {"snippet": "function(){return 1};var a = {b: 2};"},
+    }
+    if player_chapters:
+        player_response.update(_player_bar({"chapteredPlayerBarRenderer": {
+            "chapters": [_chapter(t, ms) for ms, t in player_chapters]}}))
+
+    initial_data = {
+        "contents": {"twoColumnWatchNextResults": {"secondaryResults": {"secondaryResults": {
+            "results": _filler_items(rng, filler, lang)}}}},
+    }
+    if marker_chapters:
+        initial_data.update(_player_bar({"multiMarkersPlayerBarRenderer": {"markersMap": [{
+            "key": "DESCRIPTION_CHAPTERS",
+            "value": {"chapters": [{"chapterRenderer": _chapter(t, ms)} for ms, t in marker_chapters]},
+        }]}}))
+
+    ytcfg = {f"EXPERIMENT_FLAG_{i}": i % 7 == 0 for i in range(3000)}
+    short_desc = description.replace('"', "&quot;")[:160]
+    return f"""<!DOCTYPE html><html lang="{lang}"><head>
+<title>{title} - YouTube</title>
+<meta name="title" content="{title}">
+<meta itemprop="description" content="{short_desc}">
+<link itemprop="name" content="{channel}">
+<script>ytcfg.set({json.dumps(ytcfg)});</script>
+</head><body>
+<script nonce="abc">var ytInitialPlayerResponse = {json.dumps(player_response, ensure_ascii=False)};var meta = document.createElement('meta');</script>
+<div id="player"></div>
+<script nonce="abc">var ytInitialData = {json.dumps(initial_data, ensure_ascii=False)};</script>
+<script>window["ytInitialPlayerResponse"] = null;</script>
+</body></html>"""
+
+
+PAGES = {
+    "chaptered": dict(
+        video_id="chapter0001", title="Markets explained / Rates / Housing", channel="Econ Channel",
+        description="Today we cover three topics.",
+        player_chapters=[(0, "Intro"), (95000, "Rates"), (1260000, "Housing")],
+    ),
+    "markers": dict(
+        video_id="markers0001", title="How CPUs work", channel="Tech Channel",
+        description="A deep dive.",
+        marker_chapters=[(0, "Intro"), (60000, "Pipelines"), (600000, "Caches"), (3723000, "Outro")],
+    ),
+    "description": dict(
+        video_id="descchap001", title="Weekly news roundup", channel="News Channel",
+        description="Chapters\n0:00 Intro\n1:24 Politics\n10:11 Sports\n1:02:03 Weather",
+    ),
+    "korean": dict(
+        video_id="korean00001", title="[슈카월드] 금리 인하 / 부동산 / 환율", channel="슈카월드",
+        description="오늘의 주제\n0:00 인트로\n3:15 금리 인하\n25:40 부동산 시장\n1:10:05 환율",
+        lang="ko",
+    ),
+    "short": dict(
+        video_id="short000001", title="Short clip", channel="Clips", description="No chapters here.",
+        filler=200, seed=4,
+    ),
+    "long": dict(
+        video_id="longlive001", title="3 hour live: markets, rates, housing, Q&A", channel="Econ Channel",
+        description="Live stream chapters\n" + "\n".join(
+            f"{h}:{m:02d}:00 Segment {h * 4 + m // 15 + 1}" for h in range(3) for m in range(0, 60, 15)),
+        filler=6000, seed=5,
+    ),
+}
+for _seed, _name in enumerate(("chaptered", "description", "korean", "markers")):
+    PAGES[_name]["seed"] = _seed
+
+# 자막 길이(초), 언어, 롤링 캡션 여부
+TRANSCRIPTS = {
+    "short": (120, "en", False),
+    "chaptered": (1500, "en", False),
+    "markers": (3800, "en", False),
+    "description": (3900, "en", False),
+    "korean": (4500, "ko", False),
+    "long": (3 * 3600, "en", True),
+}
+
+
+def make_transcript(seconds, lang="en", rolling=False, seed=0):
+    """
+    youtube_transcript_api 형식의 자막 세그먼트 리스트 (약 2.5초, 6~10단어)
+    """
+    rng = random.Random(seed)
+    words = _SPEECH[lang]
+    segments = []
+    start = 0.0
+    previous = []
+    while start < seconds:
+        duration = round(rng.uniform(1.5, 3.5), 3)
+        line = [rng.choice(words) for _ in range(rng.randint(6, 10))]
+        if rolling and previous:
+            # 자동 생성 자막: 앞 줄 끝부분을 다시 보여 준다
+            line = previous[-rng.randint(2, 4):] + line
+        if rng.random() < 0.01:
+            line = ["[Music]"]
+        segments.append({"text": " ".join(line), "start": round(start, 3), "duration": duration})
+        previous = line
+        start += duration
+    return segments
+
+
+def main():
+    os.makedirs(OUT_DIR, exist_ok=True)
+    os.makedirs(TRANSCRIPT_DIR, exist_ok=True)
+    for name, spec in sorted(PAGES.items()):
+        html = make_page(**spec)
+        path = os.path.join(OUT_DIR, f"{name}.html.gz")
+        with gzip.GzipFile(path, "wb", mtime=0) as f:
+            f.write(html.encode("utf-8"))
+        print(f"{path}: {len(html) / 1e6:.2f} MB")
+
+        seconds, lang, rolling = TRANSCRIPTS[name]
+        segments = make_transcript(seconds, lang, rolling, seed=spec["seed"])
+        path = os.path.join(TRANSCRIPT_DIR, f"{name}.json.gz")
+        with gzip.GzipFile(path, "wb", mtime=0) as f:
+            f.write(json.dumps(segments, ensure_ascii=False).encode("utf-8"))
+        print(f"{path}: {len(segments)} segments")
+
+
+if __name__ == "__main__":
+    main()
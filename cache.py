@@ -0,0 +1,376 @@
+# cache.py
+"""
+영상 ID 기준 영구 디스크 캐시 (SQLite).
+
+- 항목별 TTL
+- 교체 가능한 제거(eviction) 정책: 만료 항목 제거, 크기(bytes) 기준 LRU, 개수 기준 LRU
+- 쓰기는 SQLite 트랜잭션(WAL)으로 처리되어 여러 프로세스가 같은 파일을 써도 안전
+- 읽기는 쓰기 락을 잡지 않는다 (WAL 읽기). LRU용 사용 시각은 TOUCH_INTERVAL보다 오래됐을 때만
+  짧은 UPDATE 한 번으로 갱신한다
+- 저장 값 크기의 합은 트리거가 meta 테이블에 유지하므로 쓰기마다 전체 합을 다시 세지 않는다
+- 프로세스 내 hit/miss 카운터
+
+MemoryLRUCache는 디스크에 쓸 필요가 없는 작은 값(썸네일 등)용 메모리 LRU.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "YTS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "youtube_summarizer"),
+)
+DEFAULT_TTL = 7 * 24 * 3600          # 7일
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+BUSY_TIMEOUT = 30                      # seconds
+TOUCH_INTERVAL = 60                    # seconds, 읽을 때 사용 시각(accessed)을 갱신하는 최소 간격
+
+_MISSING = object()
+
+SUMMARY_TTL = 30 * 24 * 3600
+SUMMARY_MAX_BYTES = 512 * 1024 * 1024
+
+_default_cache = _MISSING
+_summary_cache = _MISSING
+_default_cache_lock = threading.Lock()
+
+
+def make_key(kind, video_id, *parts):
+    """
+    캐시 키 생성. 예: make_key("transcript", "abc", ("en", "ko")) -> "transcript:abc:en,ko"
+    """
+    key = [kind, video_id]
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            part = ",".join(str(p) for p in part)
+        key.append(str(part))
+    return ":".join(key)
+
+
+class ExpiredEviction:
+    """
+    만료 시각이 지난 항목 제거 (TTL)
+    """
+
+    def evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (now,))
+
+
+class LRUBytesEviction:
+    """
+    저장 값 크기의 합이 max_bytes를 넘으면 가장 오래 전에 사용된 항목부터 제거
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+
+    def evict(self, conn, now):
+        total = _total_bytes(conn)
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+
+class LRUCountEviction:
+    """
+    항목 수가 max_entries를 넘으면 가장 오래 전에 사용된 항목부터 제거
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+
+    def evict(self, conn, now):
+        conn.execute(
+            """DELETE FROM entries WHERE key IN (
+                SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+
+
+class DiskCache:
+    """
+    SQLite 기반 key/value 캐시. 값은 JSON으로 직렬화한다 (get_bytes/set_bytes는 bytes 그대로).
+
+    Args:
+        path (str): SQLite 파일 경로
+        ttl (float): 기본 TTL (초). None이면 만료 없음
+        max_bytes (int): 저장 값 크기 합의 상한 (eviction을 직접 넘기면 무시)
+        clock (callable): 현재 시각 함수 (테스트용)
+        eviction (list, optional): 쓰기마다 순서대로 적용할 제거 정책들
+            기본값: [ExpiredEviction(), LRUBytesEviction(max_bytes)]
+        touch_interval (float): 읽을 때 사용 시각을 갱신하는 최소 간격 (초, LRU 정밀도)
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, clock=time.time,
+                 eviction=None, touch_interval=TOUCH_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self.touch_interval = touch_interval
+        if eviction is None:
+            eviction = [ExpiredEviction(), LRUBytesEviction(max_bytes)]
+        self.eviction = list(eviction)
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires REAL,
+                    accessed REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            # 크기 합은 트리거로 유지 (기존 파일은 처음 열 때 한 번만 센다)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (name, value) SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries"
+            )
+            conn.execute(
+                """CREATE TRIGGER IF NOT EXISTS entries_bytes_insert AFTER INSERT ON entries BEGIN
+                    UPDATE meta SET value = value + NEW.size WHERE name = 'bytes';
+                END"""
+            )
+            conn.execute(
+                """CREATE TRIGGER IF NOT EXISTS entries_bytes_delete AFTER DELETE ON entries BEGIN
+                    UPDATE meta SET value = value - OLD.size WHERE name = 'bytes';
+                END"""
+            )
+            conn.execute(
+                """CREATE TRIGGER IF NOT EXISTS entries_bytes_update AFTER UPDATE OF size ON entries BEGIN
+                    UPDATE meta SET value = value - OLD.size + NEW.size WHERE name = 'bytes';
+                END"""
+            )
+
+    def _connect(self):
+        # sqlite3 연결은 스레드 간에 공유하지 않는다
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        data = self.get_bytes(key, _MISSING)
+        if data is _MISSING:
+            return default
+        return json.loads(data)
+
+    def get_bytes(self, key, default=None):
+        """
+        set_bytes()로 저장한 값을 그대로 반환 (JSON 디코딩 없음)
+        """
+        now = self.clock()
+        # 쓰기 락 없이 읽는다. 만료 삭제와 사용 시각 갱신은 필요할 때만 따로 짧게 쓴다 (autocommit)
+        conn = self._connect().conn
+        row = conn.execute(
+            "SELECT value, expires, accessed FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE key = ? AND expires <= ?", (key, now))
+            self._count(False)
+            return default
+        if now - row[2] >= self.touch_interval:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self._count(True)
+        return bytes(row[0])
+
+    def set(self, key, value, ttl=_MISSING):
+        self.set_bytes(key, json.dumps(value, ensure_ascii=False).encode("utf-8"), ttl)
+
+    def set_bytes(self, key, data, ttl=_MISSING):
+        """
+        이미 직렬화된 값(bytes)을 저장 (예: Transcript.to_bytes())
+        """
+        ttl = self.ttl if ttl is _MISSING else ttl
+        now = self.clock()
+        expires = now + ttl if ttl is not None else None
+        with self._connect() as conn:
+            # REPLACE는 삭제 트리거를 부르지 않으므로 UPSERT (크기 합 트리거가 UPDATE로 반영)
+            conn.execute(
+                "INSERT INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires = excluded.expires, accessed = excluded.accessed",
+                (key, data, len(data), expires, now),
+            )
+            self._evict(conn, now)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def _evict(self, conn, now):
+        for policy in self.eviction:
+            policy.evict(conn, now)
+
+    def get_or_set(self, key, compute, ttl=_MISSING):
+        """
+        캐시에 있으면 반환하고, 없으면 compute()를 호출해 저장 후 반환
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def stats(self):
+        conn = self._connect().conn
+        entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        size = _total_bytes(conn)
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+def _total_bytes(conn):
+    # DiskCache의 meta 테이블에 트리거로 유지되는 저장 값 크기 합
+    return conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+
+
+class MemoryLRUCache:
+    """
+    프로세스 메모리 안의 LRU 캐시. 값의 크기(size_of) 합이 max_bytes를 넘으면
+    가장 오래 전에 사용된 항목부터 제거한다. 스레드 안전.
+    """
+
+    def __init__(self, max_bytes, size_of=len):
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size=None):
+        size = self.size_of(value) if size is None else size
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT 로 감싸는 컨텍스트 매니저 (프로세스 간 쓰기 직렬화)
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
+
+
+def get_cache():
+    """
+    스크래퍼가 공유하는 기본 캐시. YTS_CACHE_DISABLE=1 이면 None.
+    """
+    global _default_cache
+    if _default_cache is _MISSING:
+        with _default_cache_lock:
+            if _default_cache is _MISSING:
+                if os.getenv("YTS_CACHE_DISABLE") == "1":
+                    _default_cache = None
+                else:
+                    _default_cache = DiskCache(os.path.join(DEFAULT_CACHE_DIR, "scrape.sqlite3"))
+    return _default_cache
+
+
+def set_cache(cache):
+    """
+    기본 캐시 교체. None을 넘기면 캐시를 끈다.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = cache
+
+
+def get_summary_cache():
+    """
+    LLM 요약 결과 캐시 (summaries.sqlite3, 30일 TTL, 512 MB LRU).
+    YTS_CACHE_DISABLE=1 이면 None.
+    """
+    global _summary_cache
+    if _summary_cache is _MISSING:
+        with _default_cache_lock:
+            if _summary_cache is _MISSING:
+                if os.getenv("YTS_CACHE_DISABLE") == "1":
+                    _summary_cache = None
+                else:
+                    _summary_cache = DiskCache(
+                        os.path.join(DEFAULT_CACHE_DIR, "summaries.sqlite3"),
+                        ttl=SUMMARY_TTL,
+                        eviction=[ExpiredEviction(), LRUBytesEviction(SUMMARY_MAX_BYTES)],
+                    )
+    return _summary_cache
+
+
+def set_summary_cache(cache):
+    """
+    요약 캐시 교체. None을 넘기면 요약 캐시를 끈다.
+    """
+    global _summary_cache
+    with _default_cache_lock:
+        _summary_cache = cache
@@ -0,0 +1,89 @@
+# chunking.py
+"""
+긴 자막을 공급자별 토큰 예산 안으로 나누는 유틸리티.
+
+토크나이저 의존성 없이 문자 종류로 토큰 수를 어림한다
+(라틴 문자 ~4자당 1토큰, 한글/CJK는 1자당 ~1토큰).
+"""
+import re
+
+# 공급자별 컨텍스트 윈도 (토큰)
+CONTEXT_TOKENS = {
+    'Anthropic': 200_000,
+    'OpenAI': 128_000,
+    'Gemini': 1_000_000,
+    'x.ai': 131_072,
+}
+
+# 프롬프트 템플릿/출력용으로 남겨두는 여유분
+RESERVED_TOKENS = 8_000
+
+# 로컬 추출 요약(extractive)의 기본 자막 토큰 예산 (numpy 없이 UI에서 쓰도록 여기에 둔다)
+EXTRACTIVE_BUDGET = 16_000
+
+# map 단계 청크 하나의 최대 크기. 작을수록 병렬성이 높고 호출당 지연이 짧다
+CHUNK_TOKENS = 24_000
+
+_WIDE_CHAR_REGEX = re.compile(r"[ᄀ-ᇿ぀-ヿ㄰-㆏㐀-鿿가-힯豈-﫿]")
+_SENTENCE_END_REGEX = re.compile(r"(?<=[.!?。！？])\s+|\n+")
+
+
+def estimate_tokens(text):
+    """
+    토큰 수 어림값
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHAR_REGEX.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def input_budget(api_choice):
+    """
+    한 번의 호출에 넣을 수 있는 프롬프트 토큰 수
+    """
+    return CONTEXT_TOKENS.get(api_choice, min(CONTEXT_TOKENS.values())) - RESERVED_TOKENS
+
+
+def split_text(text, max_tokens=CHUNK_TOKENS):
+    """
+    문장 경계(없으면 공백, 그것도 없으면 글자)에서 max_tokens 이하 청크로 나눈다.
+
+    Returns:
+        list: 원래 순서를 유지한 청크 문자열 리스트
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text] if text else []
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece in _pieces(text, max_tokens):
+        # 구분 공백까지 포함해 세면 합이 이어 붙인 청크의 어림값 이상이 된다
+        tokens = estimate_tokens(" " + piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _pieces(text, max_tokens):
+    # 자동 생성 자막에는 문장 부호가 거의 없으므로 너무 긴 문장은 단어 단위로 쪼갠다
+    for sentence in _SENTENCE_END_REGEX.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if estimate_tokens(sentence) < max_tokens:
+            yield sentence
+            continue
+        for word in sentence.split():
+            if estimate_tokens(word) < max_tokens:
+                yield word
+                continue
+            step = max(max_tokens - 1, 1)  # 최악의 경우(1자=1토큰)에도 예산 이하
+            for i in range(0, len(word), step):
+                yield word[i:i + step]
@@ -0,0 +1,143 @@
+# compaction.py
+"""
+프롬프트에 넣기 전 자막 압축(compaction).
+
+자동 생성 자막은 롤링 캡션이라 연속된 세그먼트가 앞 세그먼트의 끝부분을 다시 담고 있고,
+[Music] / [Applause] 같은 비음성 표시가 섞여 있다. 그대로 이어 붙이면 모든 공급자 호출에서
+이 잡음만큼 입력 토큰을 낸다.
+
+- 비음성 표시([...], ♪, >>) 제거, 공백 정리
+- 앞 세그먼트와 겹치는 단어를 잘라냄 (최근 OVERLAP_WINDOW 단어 안에서 KMP 접두사 함수로 탐색)
+- 선택: 언어별 간투사(um, eh, 음 ...) 제거
+
+세그먼트마다 상수 크기 창만 보므로 전체 자막 길이에 대해 선형 시간이다.
+시작 시각은 유지되므로 압축 후에도 챕터 정렬(align_chapters)을 그대로 쓸 수 있다.
+"""
+import re
+
+import tracing
+from chunking import estimate_tokens
+from transcript import Transcript
+
+# 겹침을 찾을 때 보는 직전 출력 단어 수 (롤링 캡션 한 줄은 보통 10단어 안팎)
+OVERLAP_WINDOW = 32
+
+# 이보다 짧은 겹침은 실제 반복("no no")일 수 있으므로 남긴다
+MIN_OVERLAP_WORDS = 2
+
+_MARKER_REGEX = re.compile(r"\[[^\[\]]{0,40}\]|[♪♫]+|>>+|&gt;&gt;")
+_SPACE_REGEX = re.compile(r"\s+")
+_KEY_STRIP_REGEX = re.compile(r"[^\w']+")
+
+# 언어별 간투사 (단어 전체가 일치할 때만 제거)
+FILLERS = {
+    'en': ("um", "umm", "uh", "uhh", "uh-huh", "er", "erm", "hmm", "mm", "mhm"),
+    'es': ("eh", "ehh", "em", "ehm", "mmm"),
+    'ko': ("음", "으음", "음음", "어", "어어", "에"),
+}
+
+
+def _filler_regex(languages):
+    words = sorted({word for lang in languages for word in FILLERS.get(lang, ())}, key=len, reverse=True)
+    if not words:
+        return None
+    # 단어 경계 + 뒤따르는 쉼표/마침표까지 제거 ("um, so" -> "so")
+    return re.compile(
+        r"(?<![\w'-])(?:" + "|".join(re.escape(w) for w in words) + r")(?![\w'-])[,.…]*",
+        re.IGNORECASE,
+    )
+
+
+def clean_text(text, filler_regex=None):
+    """
+    세그먼트 텍스트 하나에서 비음성 표시/간투사를 지우고 공백을 정리
+    """
+    text = _MARKER_REGEX.sub(" ", text)
+    if filler_regex is not None:
+        text = filler_regex.sub(" ", text)
+    return _SPACE_REGEX.sub(" ", text).strip()
+
+
+def _key(word):
+    # 대소문자/문장 부호 차이는 같은 단어로 본다 ("world." == "World")
+    return _KEY_STRIP_REGEX.sub("", word.lower()) or word
+
+
+def overlap_length(tail, keys):
+    """
+    tail의 접미사와 keys의 접두사가 일치하는 최대 단어 수.
+
+    keys[:len(tail)] + [구분자] + tail 에 대한 KMP 접두사 함수의 마지막 값으로
+    O(len(tail) + len(keys)) 에 구한다.
+    """
+    pattern = keys[:len(tail)]
+    if not pattern or not tail:
+        return 0
+    seq = pattern + [None] + tail
+    pi = [0] * len(seq)
+    for i in range(1, len(seq)):
+        k = pi[i - 1]
+        while k and seq[i] != seq[k]:
+            k = pi[k - 1]
+        if seq[i] == seq[k]:
+            k += 1
+        pi[i] = k
+    return pi[-1]
+
+
+def compact_transcript(transcript, remove_fillers=False, languages=None):
+    """
+    Transcript를 압축하고 절감량을 보고한다.
+
+    Args:
+        transcript (Transcript): 원본 자막
+        remove_fillers (bool): 간투사 제거 여부
+        languages (iterable, optional): 간투사 목록에 쓸 언어 코드 ('en', 'es', 'ko').
+            기본값은 FILLERS의 모든 언어
+
+    Returns:
+        tuple: (압축된 Transcript, stats)
+            stats: segments_before/after, tokens_before/after, tokens_saved, ratio
+    """
+    with tracing.span("transcript.compact", remove_fillers=remove_fillers) as attrs:
+        compacted, stats = _compact(transcript, remove_fillers, languages)
+        attrs["tokens_saved"] = stats["tokens_saved"]
+    return compacted, stats
+
+
+def _compact(transcript, remove_fillers, languages):
+    filler_regex = None
+    if remove_fillers:
+        filler_regex = _filler_regex(FILLERS if languages is None else languages)
+
+    starts, durations, texts = [], [], []
+    tail = []
+    for start, duration, text in zip(transcript.starts, transcript.durations, transcript.iter_texts()):
+        text = clean_text(text, filler_regex)
+        words = text.split(" ") if text else []
+        keys = [_key(word) for word in words]
+        overlap = overlap_length(tail, keys)
+        if overlap >= MIN_OVERLAP_WORDS:
+            words, keys = words[overlap:], keys[overlap:]
+        if not words:
+            # 완전히 겹치거나 비어버린 세그먼트는 버리고 직전 세그먼트 구간을 늘린다
+            if starts:
+                durations[-1] = max(durations[-1], start + duration - starts[-1])
+            continue
+        starts.append(start)
+        durations.append(duration)
+        texts.append(" ".join(words))
+        tail = (tail + keys)[-OVERLAP_WINDOW:]
+
+    compacted = Transcript(starts, durations, texts)
+    tokens_before = estimate_tokens(transcript.text)
+    tokens_after = estimate_tokens(compacted.text)
+    stats = {
+        "segments_before": len(transcript),
+        "segments_after": len(compacted),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "ratio": round(tokens_after / tokens_before, 4) if tokens_before else 1.0,
+    }
+    return compacted, stats
@@ -0,0 +1,164 @@
+# compare.py
+"""
+공급자 비교 모드: 프롬프트를 한 번 만들어 선택한 공급자 모두에 동시에 보내고 결과를 나란히 본다.
+
+- 프롬프트는 한 번만 만든다. 선택한 공급자 중 가장 작은 컨텍스트 윈도에 맞지 않으면
+  map-reduce(공급자마다 다른 호출이 된다) 대신 로컬 추출 요약(extractive)으로 줄여서 맞춘다
+- 공급자마다 태스크 하나. 요약 캐시와 요청 합치기(singleflight)는 summarize_text_stream과 같다
+- 조각은 도착하는 대로 (공급자, delta)로 yield 한다. 전체 시간은 가장 느린 공급자의 시간이다
+- 공급자별 ttft/total/토큰/비용은 stats["providers"][공급자]에.
+  한 공급자가 실패해도 나머지는 계속된다 (stats["providers"][공급자]["error"])
+
+    stats = {}
+    for api_choice, delta in compare_stream(transcript, ["Gemini", "OpenAI"], stats=stats):
+        ...
+    stats["providers"]["Gemini"]["cost"]
+"""
+import asyncio
+import time
+
+import extractive
+import providers
+import tracing
+from chunking import estimate_tokens, input_budget
+from providers import MODELS
+from summarize_text import build_prompt, stream_prompt_async
+from transcript import Transcript
+
+# app.py의 API 선택지 이름
+COMPARE = "Compare"
+
+
+def prepare_prompt(text, api_choices, lang='en', title=None, chapters=None, summarize_way='Summary',
+                   extractive_budget=None):
+    """
+    모든 공급자에 보낼 프롬프트 하나
+
+    Args:
+        extractive_budget (int, optional): 주면 자막을 이 토큰 수까지 먼저 줄인다
+
+    Returns:
+        tuple: (prompt, extraction) — extraction은 추출 요약을 했으면 extractive.extract의 stats, 아니면 None
+    """
+    source = text.text if isinstance(text, Transcript) else text
+    prompt = build_prompt(source, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way)
+    limit = min(input_budget(api_choice) for api_choice in api_choices)
+    if not extractive_budget and estimate_tokens(prompt) <= limit:
+        return prompt, None
+
+    # 지시문/챕터 목록 등 자막 밖의 토큰을 뺀 만큼이 자막 예산
+    budget = limit - (estimate_tokens(prompt) - estimate_tokens(source))
+    if extractive_budget:
+        budget = min(budget, extractive_budget)
+    condensed, extraction = extractive.extract(text, max(budget, 1), chapters)
+    if isinstance(condensed, Transcript):
+        condensed = condensed.text
+    prompt = build_prompt(condensed, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way)
+    return prompt, extraction
+
+
+async def _run(api_choice, prompt, use_cache, result, queue, started):
+    # 공급자 하나: 조각을 queue에 넣고, 끝나면 (api_choice, None)
+    result.update(provider=api_choice, model=MODELS[api_choice], cached=False, ttft=None, total=None, error=None)
+    parts = []
+    try:
+        with providers.usage_scope() as usage:
+            try:
+                async for delta in stream_prompt_async(prompt, api_choice, use_cache, result):
+                    if result["ttft"] is None:
+                        result["ttft"] = time.perf_counter() - started
+                    parts.append(delta)
+                    await queue.put((api_choice, delta))
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+        result["total"] = time.perf_counter() - started
+        result.update(_usage(api_choice, prompt, "".join(parts), usage.get(api_choice), result))
+    finally:
+        await queue.put((api_choice, None))
+
+
+def _usage(api_choice, prompt, text, usage, result):
+    # 캐시/다른 요청에서 받은 결과는 이번 요청의 비용이 없다.
+    # 공급자가 usage를 보내지 않았으면 어림값 (estimated=True)
+    if result["cached"] or result.get("coalesced") or result["error"]:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost": 0.0, "estimated": False}
+    estimated = usage is None
+    if estimated:
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(text), "cached_tokens": 0}
+    return dict(usage, cost=providers.cost(api_choice, usage["prompt_tokens"], usage["completion_tokens"]),
+                estimated=estimated)
+
+
+async def compare_stream_async(
+    text,
+    api_choices,
+    lang='en',
+    title=None,
+    chapters=None,
+    summarize_way='Summary',
+    use_cache=True,
+    stats=None,
+    extractive_budget=None,
+):
+    """
+    (api_choice, delta)를 도착하는 대로 yield 하는 비동기 제너레이터
+
+    Args:
+        api_choices (list): 비교할 공급자 (providers.MODELS의 이름)
+        stats (dict, optional): 채워지는 지표
+            providers: {공급자: {ttft, total, cached, prompt_tokens, completion_tokens, cost, error ...}}
+            total (가장 느린 공급자까지의 전체 초), extractive (추출 요약을 했으면)
+    """
+    if not api_choices:
+        raise ValueError("Select at least one provider to compare")
+    for api_choice in api_choices:
+        providers.check_provider(api_choice)
+    stats = {} if stats is None else stats
+    results = stats["providers"] = {api_choice: {} for api_choice in api_choices}
+    started = time.perf_counter()
+
+    with tracing.span("compare", providers=",".join(api_choices), way=summarize_way) as attrs:
+        prompt, extraction = await asyncio.to_thread(
+            prepare_prompt, text, api_choices, lang, title, chapters, summarize_way, extractive_budget,
+        )
+        if extraction is not None:
+            stats["extractive"] = extraction
+
+        queue = asyncio.Queue()
+        tasks = [
+            asyncio.ensure_future(_run(api_choice, prompt, use_cache, results[api_choice], queue, started))
+            for api_choice in api_choices
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                api_choice, delta = await queue.get()
+                if delta is None:
+                    remaining -= 1
+                    continue
+                yield api_choice, delta
+        finally:
+            for task in tasks:
+                task.cancel()
+        stats["total"] = time.perf_counter() - started
+        attrs["errors"] = sum(1 for result in results.values() if result["error"])
+
+
+def compare_stream(
+    text,
+    api_choices,
+    lang='en',
+    title=None,
+    chapters=None,
+    summarize_way='Summary',
+    use_cache=True,
+    stats=None,
+    extractive_budget=None,
+):
+    """
+    compare_stream_async의 동기 제너레이터 버전
+    """
+    return providers.iterate(compare_stream_async(
+        text, api_choices, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way,
+        use_cache=use_cache, stats=stats, extractive_budget=extractive_budget,
+    ))
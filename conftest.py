@@ -0,0 +1,20 @@
+import pytest
+
+import cache
+import ratelimit
+import search_index
+import singleflight
+
+
+@pytest.fixture(autouse=True)
+def _no_default_disk_cache():
+    # 테스트가 ~/.cache 의 실제 캐시를 읽거나 쓰지 않도록 기본 캐시를 끈다
+    cache.set_cache(None)
+    cache.set_summary_cache(None)
+    search_index.set_index(None)
+    ratelimit.set_backend(ratelimit.MemoryBackend())
+    singleflight.set_group(singleflight.Group())
+    yield
+    cache.set_cache(None)
+    cache.set_summary_cache(None)
+    search_index.set_index(None)
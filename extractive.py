@@ -0,0 +1,268 @@
+# extractive.py
+"""
+LLM에 보내기 전의 로컬 추출 요약 (CPU만 사용, NumPy).
+
+아주 긴 자막은 전부 보내면 느리고 비싸며, 컨텍스트 윈도를 넘으면 map-reduce 호출이 여러 번 든다.
+자막을 문장 단위(unit)로 나눠 TF-IDF + TextRank로 점수를 매기고, 토큰 예산 안에서
+점수가 높은 단위만 남긴다.
+
+- 단위: 연속 세그먼트를 문장 끝(. ! ? 。)이나 UNIT_TOKENS에서 끊는다. 챕터 경계는 넘지 않는다
+- 토큰화: search_index.tokenize (라틴 문자는 단어, 한글/CJK는 2-gram) — en/es/ko 공용.
+  영어/스페인어 불용어는 뺀다
+- TF-IDF: (1 + log tf) * idf, 단위별 L2 정규화. 단위 x 단어 행렬은 희소(COO) 배열로만 둔다
+- TextRank: 코사인 유사도 그래프의 PageRank. N x N 행렬을 만들지 않고 S·v = X(Xᵀv)를
+  np.bincount 두 번으로 계산한다 (반복마다 O(nnz))
+- 선택: 챕터마다 토큰 비율만큼 예산을 나눠 점수순으로 채우고 (챕터마다 최소 한 단위),
+  남은 예산은 전체 점수순으로 채운다. 결과는 원래 시간 순서 그대로다
+
+남긴 세그먼트의 시작 시각은 유지되므로 결과에도 챕터 정렬(align_chapters)을 그대로 쓸 수 있다.
+numpy는 처음 추출할 때 import 한다 (app.py 콜드 스타트 비용에서 뺀다).
+
+    condensed, stats = extract(transcript, budget=16_000, chapters=chapters)
+    stats["ratio"]  # tokens_after / tokens_before
+"""
+import time
+from itertools import chain
+
+import tracing
+from chunking import EXTRACTIVE_BUDGET, _pieces, estimate_tokens
+from search_index import tokenize
+from transcript import Transcript, normalize_chapters
+
+# 기본 토큰 예산 (자막 부분만. 프롬프트 지시문은 따로)
+DEFAULT_BUDGET = EXTRACTIVE_BUDGET
+
+# 단위 하나의 최대 토큰 수 (문장 부호가 없는 자동 자막은 이 길이에서 끊는다)
+UNIT_TOKENS = 60
+
+# 문장 끝에서 끊을 때 단위의 최소 토큰 수 ("Yes." 같은 짧은 문장은 다음 문장과 묶는다)
+MIN_UNIT_TOKENS = 12
+
+DAMPING = 0.85
+ITERATIONS = 50
+TOLERANCE = 1e-6
+
+_SENTENCE_ENDS = tuple(".!?。！？")
+
+# 점수에 쓰지 않는 단어 (한국어 조사/어미는 2-gram이 흡수하므로 따로 두지 않는다)
+STOPWORDS = {
+    'en': (
+        "a", "an", "the", "and", "or", "but", "if", "so", "of", "to", "in", "on", "at", "for", "with",
+        "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those",
+        "i", "you", "he", "she", "we", "they", "me", "my", "your", "our", "their", "them", "do", "does",
+        "did", "have", "has", "had", "not", "no", "yes", "just", "like", "what", "there", "here",
+        "can", "will", "would", "about", "from", "as", "by", "up", "out", "all", "very", "really",
+        "um", "uh", "okay", "oh", "s", "t", "don", "m", "re", "ll", "ve",
+    ),
+    'es': (
+        "el", "la", "los", "las", "un", "una", "unos", "unas", "y", "o", "pero", "si", "de", "del",
+        "a", "al", "en", "con", "por", "para", "que", "es", "son", "fue", "ser", "se", "lo", "le",
+        "les", "su", "sus", "mi", "tu", "yo", "nos", "no", "sí", "muy", "más", "como", "este", "esta",
+        "eso", "esto", "ese", "esa", "hay", "ya", "pues", "entonces", "bueno", "eh",
+    ),
+}
+_STOPWORDS = frozenset(chain.from_iterable(STOPWORDS.values()))
+
+
+def _segment_units(transcript, chapters):
+    """
+    Returns:
+        tuple: (units [(lo, hi) 세그먼트 구간, 빈틈 없이 이어짐], groups [챕터 번호])
+    """
+    n = len(transcript)
+    chapters = normalize_chapters(chapters) if chapters and not isinstance(chapters, str) else []
+    bounds = sorted({transcript.index_at(start) for start, _ in chapters[1:]} - {0})
+    boundary = set(bounds)
+
+    units, groups = [], []
+    lo, unit_tokens, group = 0, 0, 0
+    for i, text in enumerate(transcript.iter_texts()):
+        if i in boundary and i > lo:
+            units.append((lo, i))
+            groups.append(group)
+            lo, unit_tokens = i, 0
+        if i in boundary:
+            group += 1
+        unit_tokens += estimate_tokens(text) + 1
+        text = text.rstrip()
+        if unit_tokens >= UNIT_TOKENS or (unit_tokens >= MIN_UNIT_TOKENS and text.endswith(_SENTENCE_ENDS)):
+            units.append((lo, i + 1))
+            groups.append(group)
+            lo, unit_tokens = i + 1, 0
+    if lo < n:
+        units.append((lo, n))
+        groups.append(group)
+    return units, groups
+
+
+def tfidf(texts):
+    """
+    단위별 TF-IDF 벡터 (희소, COO)
+
+    Returns:
+        tuple: (rows, cols, values, n_terms) — 행마다 L2 정규화됨. 단어가 없는 행은 비어 있다
+    """
+    import numpy as np
+
+    token_lists = [[t for t in tokenize(text) if t not in _STOPWORDS] for text in texts]
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    flat = list(chain.from_iterable(token_lists))
+    if not flat:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0), 0
+    terms, term_ids = np.unique(np.array(flat), return_inverse=True)
+    n_terms = len(terms)
+    unit_ids = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+    # (단위, 단어) 쌍마다 한 번: 등장 횟수 tf
+    pairs, counts = np.unique(unit_ids * n_terms + term_ids, return_counts=True)
+    rows, cols = pairs // n_terms, pairs % n_terms
+    df = np.bincount(cols, minlength=n_terms)
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1
+    values = (1 + np.log(counts)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(texts)))
+    values /= norms[rows]
+    return rows, cols, values, n_terms
+
+
+def textrank(rows, cols, values, n_units, n_terms, damping=DAMPING, iterations=ITERATIONS, tol=TOLERANCE):
+    """
+    코사인 유사도 그래프(자기 자신 제외)의 PageRank 점수
+
+    Returns:
+        np.ndarray: 단위별 점수 (합 1)
+    """
+    import numpy as np
+
+    if n_units == 0:
+        return np.zeros(0)
+    nonempty = np.bincount(rows, minlength=n_units) > 0
+
+    def similarity(v):
+        # (X Xᵀ - I) v, X의 행은 정규화돼 있어 대각 성분은 1 (빈 행은 0)
+        per_term = np.bincount(cols, weights=values * v[rows], minlength=n_terms)
+        return np.bincount(rows, weights=values * per_term[cols], minlength=n_units) - nonempty * v
+
+    degree = similarity(np.ones(n_units))
+    dangling = degree <= 1e-12
+    degree[dangling] = 1.0
+    scores = np.full(n_units, 1.0 / n_units)
+    for _ in range(iterations):
+        # 연결이 없는 단위의 점수는 모든 단위에 고르게 나눈다
+        spread = scores[dangling].sum() / n_units
+        updated = (1 - damping) / n_units + damping * (similarity(scores / degree * ~dangling) + spread)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def select(scores, tokens, groups, budget):
+    """
+    예산 안에서 남길 단위
+
+    Args:
+        scores (np.ndarray): 단위별 점수
+        tokens (np.ndarray): 단위별 토큰 수
+        groups (np.ndarray): 단위별 챕터 번호 (0부터, 시간순)
+        budget (int): 토큰 예산
+
+    Returns:
+        np.ndarray: bool 마스크
+    """
+    import numpy as np
+
+    n = len(scores)
+    total = tokens.sum()
+    if total <= budget:
+        return np.ones(n, dtype=bool)
+    n_groups = int(groups.max()) + 1
+    group_tokens = np.bincount(groups, weights=tokens, minlength=n_groups)
+
+    # 챕터별 점수 내림차순 정렬. first[g]는 챕터 g의 첫(가장 점수 높은) 위치
+    order = np.lexsort((-scores, groups))
+    sorted_groups = groups[order]
+    cumulative = np.cumsum(tokens[order])
+    first = np.searchsorted(sorted_groups, np.arange(n_groups))
+    within = cumulative - np.concatenate(([0], cumulative))[first][sorted_groups]
+
+    # 챕터가 통째로 빠지지 않도록 챕터마다 가장 점수 높은 단위 하나는 남긴다 (예산이 되는 한)
+    best = order[first[group_tokens > 0]]
+    best = best[np.cumsum(tokens[best]) <= budget]
+    keep = np.zeros(n, dtype=bool)
+    keep[best] = True
+
+    # 나머지 예산은 챕터 토큰 비율로 나누고, 챕터 안에서 점수순으로 누적 토큰이 할당량 안인 것만
+    share = (budget - tokens[best].sum()) * group_tokens / total
+    quota = share + np.bincount(groups[best], weights=tokens[best], minlength=n_groups)
+    keep[order[within <= quota[sorted_groups]]] = True
+
+    # 남은 예산은 전체 점수순으로 들어가는 만큼 채운다
+    left = budget - tokens[keep].sum()
+    rest = np.flatnonzero(~keep)
+    rest = rest[np.argsort(-scores[rest], kind="stable")]
+    rest = rest[np.cumsum(tokens[rest]) <= left]
+    keep[rest] = True
+    return keep
+
+
+def extract(text, budget=DEFAULT_BUDGET, chapters=None):
+    """
+    토큰 예산 안으로 추출 요약
+
+    Args:
+        text (Transcript | str): 자막 (str이면 문장 단위로 나눈다)
+        budget (int): 결과의 토큰 예산
+        chapters (list, optional): [(start, title), ...] — 단위가 챕터 경계를 넘지 않고,
+            챕터마다 길이에 비례하는 예산을 받는다 (Transcript일 때만)
+
+    Returns:
+        tuple: (Transcript | str, stats)
+            stats: units_before/after, tokens_before/after, ratio, seconds
+    """
+    with tracing.span("transcript.extract", budget=budget) as attrs:
+        result, stats = _extract(text, budget, chapters)
+        attrs.update(ratio=stats["ratio"], units=stats["units_before"])
+    return result, stats
+
+
+def _extract(text, budget, chapters):
+    import numpy as np
+
+    started = time.perf_counter()
+    if isinstance(text, Transcript):
+        units, groups = _segment_units(text, chapters)
+        segment_texts = list(text.iter_texts())
+        unit_texts = [" ".join(segment_texts[lo:hi]) for lo, hi in units]
+    else:
+        unit_texts = list(_pieces(text, UNIT_TOKENS))
+        groups = [0] * len(unit_texts)
+    tokens = np.array([estimate_tokens(t) + 1 for t in unit_texts], dtype=np.int64)
+    tokens_before = int(tokens.sum())
+
+    if tokens_before <= budget:
+        keep = np.ones(len(unit_texts), dtype=bool)
+        result = text
+    else:
+        rows, cols, values, n_terms = tfidf(unit_texts)
+        scores = textrank(rows, cols, values, len(unit_texts), n_terms)
+        keep = select(scores, tokens, np.array(groups, dtype=np.int64), budget)
+        if isinstance(text, Transcript):
+            kept = np.flatnonzero(np.repeat(keep, [hi - lo for lo, hi in units]))
+            starts = np.asarray(text.starts)[kept]
+            durations = np.asarray(text.durations)[kept]
+            result = Transcript(starts.tolist(), durations.tolist(), [segment_texts[i] for i in kept])
+        else:
+            result = " ".join(t for t, k in zip(unit_texts, keep) if k)
+
+    tokens_after = int(tokens[keep].sum())
+    stats = {
+        "units_before": len(unit_texts),
+        "units_after": int(keep.sum()),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "ratio": round(tokens_after / tokens_before, 4) if tokens_before else 1.0,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    return result, stats
@@ -0,0 +1,282 @@
+# hedging.py
+"""
+"가장 빠른 공급자" 모드: hedged request + 자동 failover.
+
+- 공급자별 최근 지연/오류를 롤링 창(ProviderStats)으로 기록하고 점수가 가장 좋은 공급자를 primary로 고른다
+- primary가 hedge 임계값(해당 공급자의 최근 p95, 표본이 적으면 DEFAULT_HEDGE_AFTER) 안에 끝나지 않으면
+  다음 후보에게 같은 프롬프트를 보내고(hedge), 먼저 성공한 응답을 쓰고 나머지는 취소한다
+- 실패(5xx, 타임아웃 등)하면 기다리지 않고 바로 다음 후보로 넘어간다 (failover)
+- 스트리밍은 첫 조각(TTFT) 기준으로 경주한다
+
+    text, info = await complete_fastest(prompt)          # info["provider"]: 이긴 공급자
+    async for delta in stream_fastest(prompt, info=stats): ...
+
+api_choice=FASTEST ("Fastest")로 summarize_text 계열 함수에서 사용할 수 있다.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import providers
+
+FASTEST = "Fastest"
+
+# 롤링 창: 공급자/지표별 최근 WINDOW_SIZE개, WINDOW_SECONDS 이내 표본만 사용
+WINDOW_SIZE = 50
+WINDOW_SECONDS = 600
+
+# p95를 믿을 만한 최소 표본 수. 그보다 적으면 DEFAULT_HEDGE_AFTER 사용
+MIN_SAMPLES = 5
+DEFAULT_HEDGE_AFTER = float(os.getenv("YTS_HEDGE_AFTER", "8.0"))
+MIN_HEDGE_AFTER = 0.05
+
+# 오류율이 점수에 주는 가중치 (score = p50 * (1 + ERROR_PENALTY * error_rate))
+ERROR_PENALTY = 4.0
+
+
+def check_api_choice(api_choice):
+    """
+    providers.check_provider + FASTEST 허용
+    """
+    if api_choice != FASTEST:
+        providers.check_provider(api_choice)
+
+
+def available_providers():
+    """
+    API 키가 설정된 공급자 (providers.MODELS 순서)
+    """
+    return [name for name in providers.MODELS if os.getenv(providers.API_KEY_ENV[name])]
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderStats:
+    """
+    공급자별 지연/오류 롤링 창. 스레드 안전.
+
+    Args:
+        window_size (int): 공급자/지표별 최대 표본 수
+        window_seconds (float): 이보다 오래된 표본은 무시
+        clock (callable): 현재 시각 함수 (테스트용)
+    """
+
+    def __init__(self, window_size=WINDOW_SIZE, window_seconds=WINDOW_SECONDS, clock=time.monotonic):
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._samples = {}  # (provider, metric) -> deque[(t, latency, ok)]
+        self._lock = threading.Lock()
+
+    def record(self, provider, latency, ok=True, metric="latency"):
+        with self._lock:
+            samples = self._samples.setdefault((provider, metric), deque(maxlen=self.window_size))
+            samples.append((self.clock(), latency, ok))
+
+    def _recent(self, provider, metric):
+        cutoff = self.clock() - self.window_seconds
+        with self._lock:
+            return [s for s in self._samples.get((provider, metric), ()) if s[0] >= cutoff]
+
+    def summary(self, provider, metric="latency"):
+        """
+        Returns:
+            dict: {"samples", "errors", "error_rate", "p50", "p95"} (성공 표본이 없으면 p50/p95는 None)
+        """
+        samples = self._recent(provider, metric)
+        latencies = [latency for _, latency, ok in samples if ok]
+        errors = len(samples) - len(latencies)
+        return {
+            "samples": len(samples),
+            "errors": errors,
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "p50": _percentile(latencies, 0.5) if latencies else None,
+            "p95": _percentile(latencies, 0.95) if latencies else None,
+        }
+
+    def hedge_after(self, provider, metric="latency", default=None):
+        """
+        이 공급자에게 보낸 요청이 이 시간(초) 안에 끝나지 않으면 hedge 한다
+        """
+        default = DEFAULT_HEDGE_AFTER if default is None else default
+        summary = self.summary(provider, metric)
+        if summary["samples"] - summary["errors"] < MIN_SAMPLES:
+            return default
+        return max(summary["p95"], MIN_HEDGE_AFTER)
+
+    def rank(self, candidates, metric="latency"):
+        """
+        점수가 좋은(작은) 순서. 표본이 없는 공급자는 DEFAULT_HEDGE_AFTER / 2 로 보고 탐색 기회를 준다.
+        점수가 같으면 candidates 순서를 유지한다.
+        """
+        def score(provider):
+            summary = self.summary(provider, metric)
+            p50 = summary["p50"] if summary["p50"] is not None else DEFAULT_HEDGE_AFTER / 2
+            if summary["samples"] and summary["p50"] is None:  # 최근에 실패만 했다
+                p50 = DEFAULT_HEDGE_AFTER
+            return p50 * (1 + ERROR_PENALTY * summary["error_rate"])
+
+        return sorted(candidates, key=score)
+
+
+_stats = ProviderStats()
+
+
+def get_stats():
+    return _stats
+
+
+def set_stats(stats):
+    global _stats
+    _stats = stats
+
+
+async def track(api_choice, coro, stats=None):
+    """
+    단일 공급자 호출도 롤링 창에 기록 (primary 선택에 반영)
+    """
+    stats = stats or _stats
+    started = time.perf_counter()
+    try:
+        result = await coro
+    except Exception:
+        stats.record(api_choice, time.perf_counter() - started, ok=False)
+        raise
+    stats.record(api_choice, time.perf_counter() - started)
+    return result
+
+
+def _plan(candidates, stats, metric):
+    candidates = list(candidates) if candidates is not None else available_providers()
+    if not candidates:
+        raise ValueError("No LLM provider is configured (set at least one API key)")
+    for name in candidates:
+        providers.check_provider(name)
+    return stats.rank(candidates, metric)
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _race(start_attempt, order, hedge_after, stats, metric, info):
+    """
+    order 순서로 시도를 시작하며 경주시킨다.
+    - 진행 중인 시도가 hedge 임계값을 넘기면 다음 후보 시작 (hedge)
+    - 시도가 실패하면 바로 다음 후보 시작 (failover)
+    첫 성공 시도의 (provider, result)를 반환하고, 모두 실패하면 마지막 예외를 다시 발생시킨다.
+    """
+    order = list(order)
+    pending = {}  # task -> (provider, started)
+    last_error = None
+
+    def launch():
+        provider = order.pop(0)
+        task = asyncio.ensure_future(start_attempt(provider))
+        pending[task] = (provider, time.perf_counter())
+        info["attempts"].append(provider)
+        if len(pending) > 1:
+            info["hedged"] = True
+
+    launch()
+    try:
+        while pending:
+            timeout = None
+            if order:
+                # 가장 최근에 시작한 시도의 임계값까지 기다린다
+                provider, started = list(pending.values())[-1]
+                threshold = hedge_after if hedge_after is not None else stats.hedge_after(provider, metric)
+                timeout = max(0.0, started + threshold - time.perf_counter())
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                provider, started = pending.pop(task)
+                elapsed = time.perf_counter() - started
+                if task.exception() is None:
+                    stats.record(provider, elapsed, metric=metric)
+                    info["cancelled"] = [name for name, _ in pending.values()]
+                    return provider, task.result()
+                last_error = task.exception()
+                stats.record(provider, elapsed, ok=False, metric=metric)
+                info["errors"][provider] = repr(last_error)
+            if not pending and order:
+                launch()
+    finally:
+        # 진 시도(또는 호출자가 취소했을 때 남은 시도)는 취소
+        await _cancel(list(pending))
+    raise last_error
+
+
+def _new_info(info):
+    info = {} if info is None else info
+    info.update(provider=None, model=None, attempts=[], hedged=False, cancelled=[], errors={})
+    return info
+
+
+async def complete_fastest(prompt, candidates=None, hedge_after=None, stats=None, info=None):
+    """
+    hedged request + failover로 프롬프트 하나를 완료한다.
+
+    Args:
+        candidates (list, optional): 후보 공급자. 기본값은 API 키가 설정된 공급자 전부
+        hedge_after (float, optional): 고정 hedge 임계값(초). 기본값은 공급자별 최근 p95
+        stats (ProviderStats, optional): 기본값은 get_stats()
+        info (dict, optional): 채워지는 결과 정보
+
+    Returns:
+        tuple: (text, info) — info: provider, model, attempts, hedged, cancelled, errors
+    """
+    stats = stats or _stats
+    info = _new_info(info)
+    order = _plan(candidates, stats, "latency")
+    provider, text = await _race(
+        lambda name: providers.complete(name, prompt), order, hedge_after, stats, "latency", info,
+    )
+    info.update(provider=provider, model=providers.MODELS[provider])
+    return text, info
+
+
+async def stream_fastest(prompt, candidates=None, hedge_after=None, stats=None, info=None):
+    """
+    첫 조각(TTFT)을 기준으로 경주하는 스트리밍 버전. 첫 조각을 먼저 낸 공급자의 스트림만 이어서 전달한다.
+    인자는 complete_fastest와 같다 (지표는 공급자별 TTFT).
+    """
+    stats = stats or _stats
+    info = _new_info(info)
+    order = _plan(candidates, stats, "ttft")
+    streams = {}
+
+    async def first_delta(name):
+        agen = providers.stream(name, prompt)
+        streams[name] = agen
+        try:
+            return await agen.__anext__()
+        except StopAsyncIteration:
+            return ""
+
+    provider = None
+    try:
+        provider, first = await _race(first_delta, order, hedge_after, stats, "ttft", info)
+    finally:
+        # 진 스트림은 닫아서 공급자 세마포어와 커넥션을 돌려준다
+        for name, agen in streams.items():
+            if name != provider:
+                await agen.aclose()
+    info.update(provider=provider, model=providers.MODELS[provider])
+    agen = streams[provider]
+    try:
+        if first:
+            yield first
+        async for delta in agen:
+            yield delta
+    finally:
+        await agen.aclose()
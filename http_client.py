@@ -0,0 +1,171 @@
+# http_client.py
+"""
+모든 스크래핑 I/O가 공유하는 HTTP 전송 계층.
+
+- keep-alive 커넥션 풀 (호스트당 커넥션 수 제한)
+- connect/read 타임아웃 기본값 (타임아웃 없이 워커 스레드가 묶이는 것을 방지)
+- 429/5xx에 대한 지터(jitter) 포함 지수 백오프 재시도 (Retry-After 존중)
+- gzip, (brotli 패키지가 있으면) br 인코딩 협상
+- 응답마다 받은 바이트 수를 tracing 카운터(bytes_fetched, host별)에 더한다
+"""
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import tracing
+
+CONNECT_TIMEOUT = float(os.getenv("YTS_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("YTS_READ_TIMEOUT", "20"))
+
+POOL_CONNECTIONS = 10   # 풀을 유지할 호스트 수
+POOL_MAXSIZE = 8        # 호스트당 최대 동시 커넥션 수
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_BACKOFF_JITTER = 0.5
+RETRY_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _brotli_available():
+    try:
+        import brotli  # noqa: F401
+        return True
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+def accept_encoding(allow_brotli=True):
+    """
+    urllib3가 실제로 디코딩할 수 있는 인코딩만 광고한다.
+    """
+    encodings = ["gzip", "deflate"]
+    if allow_brotli and _brotli_available():
+        encodings.append("br")
+    return ", ".join(encodings)
+
+
+def count_response(response, **kwargs):
+    """
+    response 훅: 받은 (디코딩된) 바이트 수와 요청 수를 센다.
+    stream=True 요청은 본문을 읽지 않도록 건너뛴다.
+    """
+    host = urlsplit(response.url).hostname or ""
+    tracing.count("http_requests", host=host, status=response.status_code)
+    if not kwargs.get("stream"):
+        tracing.count("bytes_fetched", len(response.content or b""), host=host)
+
+
+class TimeoutSession(requests.Session):
+    """
+    timeout을 넘기지 않은 호출(예: youtube_transcript_api 내부 호출)에도
+    기본 타임아웃을 적용하는 Session
+    """
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+def build_session(
+    timeout=None,
+    retries=RETRY_TOTAL,
+    backoff_factor=RETRY_BACKOFF_FACTOR,
+    backoff_jitter=RETRY_BACKOFF_JITTER,
+    pool_connections=POOL_CONNECTIONS,
+    pool_maxsize=POOL_MAXSIZE,
+    allow_brotli=True,
+):
+    """
+    풀링/재시도/타임아웃이 설정된 새 Session을 만든다.
+
+    Args:
+        timeout (tuple, optional): (connect, read) 초
+        retries (int): 429/5xx 및 연결 오류 재시도 횟수
+        backoff_factor (float): 지수 백오프 기본 값 (factor * 2 ** (n - 1))
+        backoff_jitter (float): 백오프에 더해지는 0 ~ jitter 초의 무작위 값
+        pool_connections (int): 풀을 유지할 호스트 수
+        pool_maxsize (int): 호스트당 커넥션 수 (초과 요청은 대기)
+        allow_brotli (bool): brotli 디코더가 있을 때 br 인코딩 협상 여부
+
+    Returns:
+        TimeoutSession
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        status_forcelist=RETRY_STATUS_FORCELIST,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = TimeoutSession(timeout=timeout)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(count_response)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": accept_encoding(allow_brotli),
+    })
+    return session
+
+
+def get_session():
+    """
+    프로세스 전체에서 공유하는 Session (처음 호출 시 생성)
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def set_session(session):
+    """
+    공유 Session 교체 (테스트나 프록시 설정 등). 이전 Session은 닫는다.
+    """
+    global _session
+    with _session_lock:
+        old, _session = _session, session
+    if old is not None and old is not session:
+        old.close()
+
+
+def get(url, **kwargs):
+    """
+    공유 Session으로 GET 요청. 재시도 후에도 실패한 상태 코드는 그대로 반환되므로
+    필요하면 호출자가 raise_for_status()를 호출한다.
+    """
+    return get_session().get(url, **kwargs)
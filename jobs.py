@@ -0,0 +1,597 @@
+# jobs.py
+"""
+요약 작업 큐 서비스.
+
+Streamlit 스크립트 스레드 밖에서 scrape -> summarize 파이프라인을 돌린다.
+- JobQueue: SQLite 파일 하나로 된 작업 큐 (외부 서비스 없음). 여러 프로세스가 같은 파일을 공유한다
+- 워커 프로세스: 큐에서 작업을 하나씩 가져가(claim) 실행하고 진행 상황/결과를 기록한다.
+  실행 중에는 heartbeat를 갱신하고, 멈춘 워커(LEASE_SECONDS 동안 heartbeat 없음)의 작업은
+  다른 워커가 MAX_ATTEMPTS 번까지 다시 가져간다. heartbeat/완료/실패 기록은 작업을 가져간
+  워커일 때만 반영되므로, 늦게 끝난 이전 워커의 결과는 버려진다
+- HTTP API (JSON):
+    POST /jobs                {"url", "lang", "api_choice", "summarize_way", ...} -> 202 {"id", "status"}
+    GET  /jobs/{id}           상태 + 진행 상황 (stage, 제목, 지금까지 받은 요약 partial)
+    GET  /jobs/{id}/result    끝났으면 200 결과, 진행 중이면 202, 실패면 409 (본문에 status/error)
+    GET  /healthz             큐 길이
+    GET  /metrics             Prometheus 텍스트 (tracing). 워커 프로세스마다 작업이 끝날 때
+                              누적 지표를 큐 DB(worker_metrics)에 쓰고, 여기서 모두 합친다
+- JobClient: app.py가 YTS_JOB_SERVICE_URL이 있을 때 쓰는 클라이언트 (submit -> poll)
+
+UI 레플리카와 워커 수를 따로 늘릴 수 있다:
+
+Usage:
+    python jobs.py serve --port 8600 --workers 4     # API + 워커 4개
+    python jobs.py serve --workers 0                 # API만
+    python jobs.py worker --processes 8              # 워커만 (같은 YTS_JOB_DB를 보는 호스트에서)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cache
+import hedging
+import http_client
+import tracing
+
+DEFAULT_DB = os.getenv("YTS_JOB_DB", os.path.join(cache.DEFAULT_CACHE_DIR, "jobs.sqlite3"))
+
+SUMMARIZE_WAYS = ("Chapters", "Detailed", "syukaworld")
+STATUSES = ("queued", "running", "done", "error")
+
+# heartbeat가 이보다 오래 없으면 워커가 죽은 것으로 보고 작업을 다시 큐에 돌린다
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 3
+
+POLL_INTERVAL = 0.5       # 워커가 빈 큐를 다시 보는 간격 (초)
+PROGRESS_INTERVAL = 0.5   # 스트리밍 중 진행 상황(partial) 기록 간격 (초)
+JOB_TTL = 7 * 24 * 3600   # 끝난 작업 보관 기간
+
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{32})(/result)?$")
+
+
+class JobQueue:
+    """
+    SQLite 작업 큐. 스레드/프로세스 안전 (쓰기는 BEGIN IMMEDIATE 트랜잭션).
+
+    Args:
+        path (str): SQLite 파일 경로
+        clock (callable): 현재 시각 함수 (테스트용)
+    """
+
+    def __init__(self, path=DEFAULT_DB, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL,
+                    heartbeat REAL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS worker_metrics (
+                    worker TEXT PRIMARY KEY,
+                    snapshot TEXT NOT NULL,
+                    updated REAL NOT NULL
+                )"""
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=cache.BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return cache._Transaction(conn)
+
+    def submit(self, params):
+        """
+        Returns:
+            str: 작업 ID
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, created) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(params, ensure_ascii=False), self.clock()),
+            )
+        return job_id
+
+    def claim(self, worker):
+        """
+        가장 오래된 대기 작업(또는 lease가 끝난 실행 중 작업)을 가져간다.
+
+        Returns:
+            dict | None: {"id", "params", "attempts"}
+        """
+        now = self.clock()
+        stale = now - LEASE_SECONDS
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'error', error = 'worker lost', finished = ? "
+                "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                (now, stale, MAX_ATTEMPTS),
+            )
+            row = conn.execute(
+                "SELECT id, params, attempts FROM jobs "
+                "WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+                "ORDER BY created LIMIT 1",
+                (stale,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "started = ?, heartbeat = ? WHERE id = ?",
+                (worker, now, now, row["id"]),
+            )
+        return {"id": row["id"], "params": json.loads(row["params"]), "attempts": row["attempts"] + 1}
+
+    # heartbeat/complete/fail은 작업을 가져간 워커가 아직 실행 중일 때만 반영된다.
+    # lease가 끝나 다른 워커가 다시 가져간 작업이면 False (호출자는 결과를 버린다)
+
+    def heartbeat(self, job_id, worker, progress=None):
+        """
+        Returns:
+            bool: 아직 이 워커의 작업인지
+        """
+        with self._connect() as conn:
+            if progress is None:
+                cursor = conn.execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                    (self.clock(), job_id, worker),
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE jobs SET heartbeat = ?, progress = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'running'",
+                    (self.clock(), json.dumps(progress, ensure_ascii=False), job_id, worker),
+                )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id, worker, result):
+        """
+        Returns:
+            bool: 결과를 기록했는지
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, finished = ?, progress = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result, ensure_ascii=False), self.clock(), json.dumps({"stage": "done"}),
+                 job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id, worker, error):
+        """
+        Returns:
+            bool: 실패를 기록했는지
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'error', error = ?, finished = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (error, self.clock(), job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def get(self, job_id, with_result=False):
+        """
+        Returns:
+            dict | None: id, status, params, progress, error, attempts, created, started, finished
+                (with_result=True면 result도)
+        """
+        conn = self._connect().conn
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "id": row["id"],
+            "status": row["status"],
+            "params": json.loads(row["params"]),
+            "progress": json.loads(row["progress"]),
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created": row["created"],
+            "started": row["started"],
+            "finished": row["finished"],
+        }
+        if with_result:
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def counts(self):
+        conn = self._connect().conn
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return counts
+
+    def record_metrics(self, worker, snapshot):
+        """
+        워커 프로세스의 누적 지표(tracing.Metrics.snapshot())를 저장 (워커마다 최신 값 하나)
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO worker_metrics (worker, snapshot, updated) VALUES (?, ?, ?)",
+                (worker, json.dumps(snapshot, ensure_ascii=False), self.clock()),
+            )
+
+    def metrics(self):
+        """
+        Returns:
+            tracing.Metrics: 모든 워커의 누적 지표를 합친 것 (끝난 워커 프로세스 포함)
+        """
+        conn = self._connect().conn
+        metrics = tracing.Metrics()
+        for (snapshot,) in conn.execute("SELECT snapshot FROM worker_metrics"):
+            metrics.merge(json.loads(snapshot))
+        return metrics
+
+    def prune(self, max_age=JOB_TTL):
+        """
+        끝난 지 max_age초가 지난 작업 삭제
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'error') AND finished < ?",
+                (self.clock() - max_age,),
+            )
+
+
+def validate(params):
+    """
+    요청 본문 검사 + 기본값. 잘못되면 ValueError
+
+    Returns:
+        dict: 큐에 넣을 params
+    """
+    from scrape_youtube import extract_video_id
+
+    url = params.get("url")
+    if not isinstance(url, str) or not url:
+        raise ValueError("url is required")
+    extract_video_id(url)
+    api_choice = params.get("api_choice", "Gemini")
+    hedging.check_api_choice(api_choice)
+    summarize_way = params.get("summarize_way", "syukaworld")
+    if summarize_way not in SUMMARIZE_WAYS:
+        raise ValueError(f"summarize_way must be one of {', '.join(SUMMARIZE_WAYS)}")
+    extractive_budget = params.get("extractive_budget")  # 긴 자막 로컬 추출 요약의 토큰 예산 (없으면 끔)
+    if extractive_budget is not None:
+        if isinstance(extractive_budget, bool) or not isinstance(extractive_budget, int) or extractive_budget <= 0:
+            raise ValueError("extractive_budget must be a positive integer")
+    return {
+        "url": url,
+        "lang": str(params.get("lang", "English")),
+        "api_choice": api_choice,
+        "summarize_way": summarize_way,
+        "use_cache": bool(params.get("use_cache", True)),
+        "remove_fillers": bool(params.get("remove_fillers", False)),
+        "chapters": params.get("chapters") or None,  # 챕터가 없을 때 쓸 수동 입력
+        "extractive_budget": extractive_budget,
+    }
+
+
+class Progress:
+    """
+    진행 상황 기록기. 스트리밍 중에는 PROGRESS_INTERVAL마다 한 번만 쓴다.
+    """
+
+    def __init__(self, queue, job_id, worker, interval=PROGRESS_INTERVAL):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self.state = {}
+        self._written = 0.0
+
+    def __call__(self, stage, parts=None, **info):
+        """
+        Args:
+            stage (str): fetching / summarizing ...
+            parts (list, optional): 지금까지 받은 요약 조각 (쓸 때만 이어 붙인다)
+        """
+        changed = stage != self.state.get("stage")
+        self.state.update(info, stage=stage)
+        now = time.monotonic()
+        if not changed and now - self._written < self.interval:
+            return
+        if parts is not None:
+            self.state["partial"] = "".join(parts)
+        self.queue.heartbeat(self.job_id, self.worker, self.state)
+        self._written = now
+
+
+def run_job(params, report):
+    """
+    작업 하나 실행: app.py와 같은 경로 (단계 동시 prefetch -> 스트리밍 요약)
+
+    Args:
+        params (dict): validate()가 만든 값
+        report (callable): report(stage, parts=None, **info)
+
+    Returns:
+        dict: title, channel, video_id, summary, chapters, metadata(공급자/ttft 등), timings,
+              compaction, trace(tracing.Trace.to_dict())
+    """
+    from pipeline import Prefetch
+    from summarize_text import summarize_text_stream
+
+    with tracing.trace("job", url=params["url"]) as job_trace:
+        report("fetching")
+        # 워커는 썸네일을 쓰지 않는다
+        prefetch = Prefetch(params["url"], remove_fillers=params["remove_fillers"], stages=("metadata", "transcript"))
+        title, channel = prefetch.result("metadata")
+        report("fetching", title=title, channel=channel, video_id=prefetch.video_id)
+        transcript, chapters = prefetch.result("transcript")
+        llm_started = prefetch.elapsed()
+
+        stats = {}
+        parts = []
+        report("summarizing", parts=parts)
+        for delta in summarize_text_stream(
+            transcript, lang=params["lang"], title=title, chapters=chapters or params["chapters"],
+            api_choice=params["api_choice"], summarize_way=params["summarize_way"],
+            use_cache=params["use_cache"], stats=stats, video_id=prefetch.video_id,
+            extractive_budget=params.get("extractive_budget"),
+        ):
+            parts.append(delta)
+            report("summarizing", parts=parts)
+    return {
+        "title": title,
+        "channel": channel,
+        "video_id": prefetch.video_id,
+        "summary": "".join(parts),
+        "chapters": [list(ch) for ch in chapters],
+        "metadata": stats,
+        "timings": dict(prefetch.timings, llm_started=llm_started),
+        "compaction": prefetch.compaction,
+        "trace": job_trace.to_dict(),
+    }
+
+
+def _keep_alive(queue, job_id, worker, stop):
+    # 진행 상황이 한동안 없어도(긴 비스트리밍 호출) lease를 유지. 다른 워커가 가져갔으면 그만둔다
+    while not stop.wait(LEASE_SECONDS / 3):
+        if not queue.heartbeat(job_id, worker):
+            return
+
+
+def work_one(queue, worker):
+    """
+    작업 하나를 가져와 실행한다.
+
+    Returns:
+        str | None: 처리한 작업 ID (큐가 비었으면 None)
+    """
+    job = queue.claim(worker)
+    if job is None:
+        return None
+    stop = threading.Event()
+    threading.Thread(target=_keep_alive, args=(queue, job["id"], worker, stop), daemon=True).start()
+    try:
+        result = run_job(job["params"], Progress(queue, job["id"], worker))
+    except Exception as e:
+        recorded, status = queue.fail(job["id"], worker, repr(e)), "error"
+    else:
+        recorded, status = queue.complete(job["id"], worker, result), "done"
+    finally:
+        stop.set()
+    # lease가 끝나 다른 워커가 가져간 작업이면 이 워커의 결과는 버려진다
+    tracing.count("jobs", status=status if recorded else "lost")
+    # 작업은 별도 프로세스에서 돌므로 API 서버의 /metrics가 읽을 수 있게 큐 DB에 남긴다
+    queue.record_metrics(worker, tracing.get_metrics().snapshot())
+    return job["id"]
+
+
+def worker_loop(path=DEFAULT_DB, poll_interval=POLL_INTERVAL, max_jobs=None, stop=None):
+    """
+    워커 프로세스 본체: 큐가 비면 poll_interval만큼 쉬며 작업을 처리한다.
+
+    Args:
+        max_jobs (int, optional): 이만큼 처리하면 종료 (테스트용)
+        stop (Event, optional): set되면 현재 작업을 끝내고 종료
+    """
+    queue = JobQueue(path)
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'host'}:{os.getpid()}"
+    done = 0
+    while stop is None or not stop.is_set():
+        if work_one(queue, worker) is None:
+            time.sleep(poll_interval)
+            continue
+        done += 1
+        if max_jobs is not None and done >= max_jobs:
+            return
+
+
+def start_workers(count, path=DEFAULT_DB):
+    """
+    워커 프로세스 count개 시작 (spawn: 부모의 스레드/이벤트 루프를 물려받지 않는다)
+
+    Returns:
+        list: multiprocessing.Process
+    """
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for i in range(count):
+        process = context.Process(target=worker_loop, args=(path,), name=f"summarizer-worker-{i}", daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def make_server(queue, host="127.0.0.1", port=8600):
+    """
+    HTTP API 서버 (serve_forever는 호출자가)
+
+    Returns:
+        ThreadingHTTPServer
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                return self._json(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                params = validate(json.loads(self.rfile.read(length) or b"{}"))
+            except (ValueError, AttributeError) as e:
+                return self._json(400, {"error": str(e)})
+            job_id = queue.submit(params)
+            self._json(202, {"id": job_id, "status": "queued"})
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                return self._json(200, queue.counts())
+            if self.path == "/metrics":
+                data = queue.metrics().render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            match = _JOB_PATH.match(self.path)
+            job = queue.get(match.group(1), with_result=bool(match.group(2))) if match else None
+            if job is None:
+                return self._json(404, {"error": "unknown job"})
+            if not match.group(2):
+                return self._json(200, job)
+            if job["status"] == "done":
+                return self._json(200, job["result"])
+            if job["status"] == "error":
+                # 서버 오류가 아니라 작업 상태 때문에 결과를 줄 수 없는 것이므로 5xx가 아니다
+                return self._json(409, {"status": "error", "error": job["error"]})
+            self._json(202, {"status": job["status"], "progress": job["progress"]})
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    return httpd
+
+
+class JobClient:
+    """
+    작업 서비스 HTTP 클라이언트 (app.py에서 사용)
+
+    Args:
+        base_url (str): 예: http://127.0.0.1:8600
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def submit(self, url, **options):
+        """
+        Returns:
+            str: 작업 ID (잘못된 요청이면 ValueError)
+        """
+        r = http_client.get_session().post(f"{self.base_url}/jobs", json=dict(options, url=url))
+        if r.status_code == 400:
+            raise ValueError(r.json()["error"])
+        r.raise_for_status()
+        return r.json()["id"]
+
+    def status(self, job_id):
+        r = http_client.get(f"{self.base_url}/jobs/{job_id}")
+        if r.status_code == 404:
+            raise KeyError(job_id)
+        r.raise_for_status()
+        return r.json()
+
+    def result(self, job_id):
+        """
+        Returns:
+            dict | None: 결과 (아직 끝나지 않았으면 None). 실패한 작업이면 RuntimeError
+        """
+        r = http_client.get(f"{self.base_url}/jobs/{job_id}/result")
+        if r.status_code == 404:
+            raise KeyError(job_id)
+        if r.status_code == 202:
+            return None
+        if r.status_code == 409:
+            raise RuntimeError(r.json().get("error"))
+        r.raise_for_status()
+        return r.json()
+
+    def wait(self, job_id, poll_interval=POLL_INTERVAL, timeout=None):
+        """
+        끝날 때까지 상태를 yield 한다 (마지막 상태는 done 또는 error)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            yield job
+            if job["status"] in ("done", "error"):
+                return
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(job_id)
+            time.sleep(poll_interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarization job service (SQLite queue + worker processes).")
+    parser.add_argument("--db", default=DEFAULT_DB, help="큐 SQLite 파일 (YTS_JOB_DB)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="HTTP API와 (선택) 워커 프로세스")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8600)
+    serve.add_argument("--workers", type=int, default=2)
+    worker = commands.add_parser("worker", help="워커 프로세스만")
+    worker.add_argument("--processes", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.db)
+    queue.prune()
+    processes = start_workers(args.workers if args.command == "serve" else args.processes, args.db)
+    try:
+        if args.command == "serve":
+            httpd = make_server(queue, args.host, args.port)
+            print(f"Job service on http://{args.host}:{httpd.server_address[1]} ({len(processes)} workers)")
+            httpd.serve_forever()
+        else:
+            for process in processes:
+                process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
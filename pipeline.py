@@ -0,0 +1,154 @@
+# pipeline.py
+"""
+LLM 호출 전 단계(pre-LLM) 동시 실행.
+
+메타데이터(제목/채널), 자막+챕터, 썸네일은 프롬프트를 만들기 전까지 서로 독립이므로
+공용 스레드 풀에서 동시에 받아온다. 메타데이터와 자막은 같은 WatchPage를 공유하므로
+watch 페이지 다운로드는 여전히 한 번이다.
+
+    prefetch = Prefetch(url)
+    for stage in prefetch.as_completed():   # 끝난 순서대로
+        value = prefetch.result(stage)
+    prefetch.timings                        # {"metadata": 0.41, "transcript": 0.93, ...}
+    prefetch.compaction                     # 자막 압축 결과 (tokens_saved 등)
+
+자막 검색 색인은 transcript 단계가 끝난 뒤 같은 풀에서 따로 실행한다 (prefetch.indexing).
+LLM 호출과 겹치므로 요약 시작을 늦추지 않는다.
+
+각 단계는 호출한 쪽의 트레이스(tracing) 안에서 prefetch.<stage> span으로 기록된다.
+"""
+import concurrent.futures
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from compaction import compact_transcript
+from scrape_youtube import (
+    extract_metadata, extract_video_id, get_thumbnail, get_transcript_segments, index_transcript,
+)
+
+STAGES = ("metadata", "thumbnail", "transcript")
+
+# Streamlit 세션들이 공유하는 풀 (요청 하나에 스레드 3개)
+PREFETCH_WORKERS = 12
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Prefetch가 기본으로 쓰는 공용 스레드 풀
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+        return _executor
+
+
+def _transcript_stage(video_id, url):
+    return get_transcript_segments(video_id, url)
+
+
+class Prefetch:
+    """
+    영상 하나의 pre-LLM 단계를 동시에 시작하고 결과와 단계별 소요 시간을 모은다.
+
+    Args:
+        url (str): YouTube URL
+        executor (Executor, optional): 사용할 풀. 기본값은 get_executor()
+        remove_fillers (bool): 자막 압축 시 간투사도 제거할지 여부
+        stages (tuple): 시작할 단계 (STAGES 중 일부). 예: 썸네일이 필요 없으면 ("metadata", "transcript")
+
+    Attributes:
+        timings (dict): 단계 이름 -> 소요 시간(초). 끝난 단계만 들어 있다
+        compaction (dict): compact_transcript의 stats (transcript 단계가 끝난 뒤 채워짐)
+        started (float): 시작 시각 (time.perf_counter)
+        indexing (Future): 검색 색인 작업 (transcript 단계가 끝난 뒤 생김)
+    """
+
+    def __init__(self, url, executor=None, remove_fillers=False, stages=STAGES):
+        self.url = url
+        self.video_id = extract_video_id(url)
+        self.remove_fillers = remove_fillers
+        self.timings = {}
+        self.compaction = {}
+        self.started = time.perf_counter()
+        self.indexing = None
+        self._taken = set()
+        self._executor = executor or get_executor()
+        # 풀 스레드에서도 호출한 쪽의 트레이스에 기록되도록 단계마다 컨텍스트를 복사해 넘긴다.
+        # transcript 단계가 metadata future를 쓰므로 하나씩 넣는다
+        stage_calls = {
+            "metadata": (extract_metadata, url),
+            "thumbnail": (get_thumbnail, self.video_id),
+            "transcript": (self._transcript, url),
+        }
+        self.futures = {}
+        for stage in STAGES:
+            if stage in stages:
+                self.futures[stage] = self._submit(stage, *stage_calls[stage])
+
+    def _submit(self, stage, func, *args):
+        return self._executor.submit(tracing.wrap(self._timed), stage, func, *args)
+
+    def _transcript(self, url):
+        transcript, chapters = _transcript_stage(self.video_id, url)
+        transcript, self.compaction = compact_transcript(transcript, self.remove_fillers)
+        self.indexing = self._executor.submit(tracing.wrap(self._index), transcript, chapters)
+        return transcript, chapters
+
+    def _index(self, transcript, chapters):
+        # 이미 압축된 자막과 metadata 단계의 제목/채널을 재사용 (metadata는 먼저 제출돼 있어 풀에서 교착되지 않는다).
+        # metadata 단계를 빼고 시작했으면 제목/채널 없이 색인한다
+        try:
+            title, channel = self.futures["metadata"].result()
+        except Exception:
+            title = channel = None
+        index_transcript(self.video_id, transcript, chapters, title, channel, compacted=True)
+
+    def _timed(self, stage, func, *args):
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"prefetch.{stage}"):
+                return func(*args)
+        finally:
+            self.timings[stage] = time.perf_counter() - start
+
+    def result(self, stage, timeout=None):
+        """
+        단계 결과 (끝날 때까지 블록). 단계에서 난 예외는 그대로 다시 발생한다.
+
+        - metadata: (title, channel)
+        - thumbnail: JPEG bytes 또는 None
+        - transcript: (압축된 Transcript, [(start_sec, title), ...])
+        """
+        return self.futures[stage].result(timeout)
+
+    def done(self, stage):
+        return self.futures[stage].done()
+
+    def ready(self):
+        """
+        끝났지만 아직 ready()/as_completed()로 꺼내지 않은 단계들 (블록하지 않음)
+        """
+        stages = [stage for stage, future in self.futures.items() if stage not in self._taken and future.done()]
+        self._taken.update(stages)
+        return stages
+
+    def as_completed(self, timeout=None):
+        """
+        아직 꺼내지 않은 단계 이름을 끝나는 순서대로 yield
+        """
+        pending = {future: stage for stage, future in self.futures.items() if stage not in self._taken}
+        for future in concurrent.futures.as_completed(pending, timeout):
+            stage = pending[future]
+            if stage in self._taken:
+                continue
+            self._taken.add(stage)
+            yield stage
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
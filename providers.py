@@ -0,0 +1,569 @@
+# providers.py
+"""
+LLM 공급자 비동기 계층.
+
+- 공급자별 장수(long-lived) 비동기 클라이언트 (Anthropic, OpenAI, x.ai(OpenAI base_url), Gemini)
+  호출마다 클라이언트/커넥션 풀을 새로 만들지 않는다
+- 공급자별 동시 요청 수 한도 (429를 받으면 줄이고 성공하면 늘리는 AIMD, ratelimit.AdaptiveConcurrency)
+- 공급자/모델별 RPM/TPM 토큰 버킷 (ratelimit.RateLimiter). 429는 retry-after만큼 쉬고 다시 보낸다
+- SDK는 해당 공급자를 처음 사용할 때 import (콜드 스타트 비용 절감)
+- complete()는 전체 응답, stream()은 텍스트 delta를 도착하는 대로 반환
+- 동기 코드(Streamlit 등)는 run()/iterate()로 백그라운드 이벤트 루프에서 코루틴을 실행한다
+- 요청마다 llm.request span과, 응답의 usage 필드에서 꺼낸 입력/출력 토큰 카운터
+  (llm_prompt_tokens, llm_completion_tokens, 공급자 프롬프트 캐시에서 읽은 llm_cached_prompt_tokens)를
+  tracing에 기록한다
+- Prompt(앞부분 + 뒷부분)를 받으면 앞부분을 공급자 프롬프트 캐시에 올린다:
+  Anthropic은 cache_control 블록, Gemini는 cached content(GEMINI_CACHE_MIN_TOKENS 이상),
+  OpenAI/x.ai는 같은 앞부분이면 자동으로 캐시된다
+- usage_scope() 안의 요청(그 안에서 만든 태스크 포함)은 공급자별 토큰 합계를 따로 모은다.
+  cost()는 PRICES(공개 정가)로 비용을 어림한다
+
+클라이언트와 세마포어는 이벤트 루프별로 유지된다. 호출자가 자신의 이벤트 루프에서
+complete()를 여러 개 gather 해도 되고, run()을 통해 공용 백그라운드 루프를 써도 된다.
+"""
+import asyncio
+import contextlib
+import contextvars
+import datetime
+import hashlib
+import importlib
+import os
+import threading
+import time
+import weakref
+
+import ratelimit
+import singleflight
+import tracing
+from chunking import estimate_tokens
+
+MODELS = {
+    'Anthropic': "claude-3-5-haiku-20241022",
+    'OpenAI': "gpt-4o-mini",
+    'Gemini': "gemini-1.5-flash",
+    'x.ai': "grok-2-latest",
+}
+
+# 캐시 키에 포함되는 샘플링 파라미터 (바뀌면 다른 결과로 취급)
+SAMPLING_PARAMS = {
+    'Anthropic': {"max_tokens": 8000, "temperature": 0.5},
+    'OpenAI': {},
+    'Gemini': {},
+    'x.ai': {"system": "You are a helpful assistant that summarizes text."},
+}
+
+API_KEY_ENV = {
+    'Anthropic': "ANTHROPIC_API_KEY",
+    'OpenAI': "OPENAI_API_KEY",
+    'Gemini': "GEMINI_API_KEY",
+    'x.ai': "XAI_API_KEY",
+}
+
+# 공급자별 SDK 모듈 (load_sdk()에서 처음 사용할 때 import)
+SDK_MODULES = {
+    'Anthropic': "anthropic",
+    'OpenAI': "openai",
+    'Gemini': "google.generativeai",
+    'x.ai': "openai",
+}
+
+BASE_URLS = {
+    'x.ai': "https://api.x.ai/v1",
+}
+
+# 엔드포인트 재정의 (로컬 가짜 공급자, 프록시 등).
+# Gemini는 재정의하면 gRPC 대신 REST 전송을 쓴다 (SDK의 REST 전송은 동기 전용이라 스레드에서 호출)
+BASE_URL_ENV = {
+    'Anthropic': "YTS_ANTHROPIC_BASE_URL",
+    'OpenAI': "YTS_OPENAI_BASE_URL",
+    'x.ai': "YTS_XAI_BASE_URL",
+    'Gemini': "YTS_GEMINI_BASE_URL",
+}
+
+# SDK 자체 재시도 횟수 (hedging/failover를 쓸 때는 줄이는 편이 빠르다)
+MAX_RETRIES = int(os.getenv("YTS_LLM_MAX_RETRIES", "2"))
+
+# 공급자별 최대 동시 요청 수 (AIMD 한도의 상한)
+MAX_CONCURRENCY = {
+    'Anthropic': 8,
+    'OpenAI': 16,
+    'Gemini': 8,
+    'x.ai': 8,
+}
+
+# 공개 정가 (USD / 100만 토큰: 입력, 출력). 프롬프트 캐시 할인은 반영하지 않는다
+PRICES = {
+    'Anthropic': (0.80, 4.00),
+    'OpenAI': (0.15, 0.60),
+    'Gemini': (0.075, 0.30),
+    'x.ai': (2.00, 10.00),
+}
+
+# Gemini cached content는 버전이 고정된 모델에만 만들 수 있고, 최소 토큰 수보다 짧으면 만들지 않는다
+GEMINI_CACHE_MODEL = "models/gemini-1.5-flash-002"
+GEMINI_CACHE_MIN_TOKENS = 32_768
+GEMINI_CACHE_TTL = 600  # seconds
+
+_gemini_caches = {}  # sha256(앞부분) -> (CachedContent | None, 만료 시각)
+_gemini_caches_lock = threading.Lock()
+
+_usage = contextvars.ContextVar("yts_llm_usage", default=None)
+
+_loop_state = weakref.WeakKeyDictionary()  # loop -> {"clients": {}, "semaphores": {}}
+_background_loop = None
+_background_lock = threading.Lock()
+
+
+class Prompt(str):
+    """
+    캐시 가능한 앞부분(prefix: 지시 + 자막)과 요청마다 바뀌는 뒷부분(suffix: 모드, 언어, 챕터)으로 된 프롬프트.
+    문자열 값은 prefix + suffix 그대로라 토큰 추정, 요약 캐시 키 등 문자열을 받는 곳에 그대로 쓸 수 있다.
+    """
+
+    def __new__(cls, prefix, suffix):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix = prefix
+        prompt.suffix = suffix
+        return prompt
+
+
+def check_provider(api_choice):
+    if api_choice not in MODELS:
+        raise ValueError(f"Invalid API choice: {api_choice}")
+
+
+def _state():
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        state = _loop_state[loop] = {"clients": {}, "semaphores": {}}
+    return state
+
+
+def load_sdk(api_choice):
+    """
+    공급자 SDK 모듈을 처음 필요할 때 import 한다.
+    (anthropic, openai, google.generativeai(grpc/protobuf 포함)는 import 비용이 커서
+    모듈 로드 시점에 모두 불러오면 Streamlit 콜드 스타트가 느려진다)
+    """
+    check_provider(api_choice)
+    return importlib.import_module(SDK_MODULES[api_choice])
+
+
+def base_url(api_choice):
+    """
+    공급자 엔드포인트 (환경 변수 재정의 > 기본값). None이면 SDK 기본값
+    """
+    env = BASE_URL_ENV.get(api_choice)
+    return (os.getenv(env) if env else None) or BASE_URLS.get(api_choice)
+
+
+def _make_client(api_choice):
+    api_key = os.getenv(API_KEY_ENV[api_choice])
+    sdk = load_sdk(api_choice)
+    if api_choice == 'Anthropic':
+        return sdk.AsyncAnthropic(api_key=api_key, base_url=base_url(api_choice), max_retries=MAX_RETRIES)
+    if api_choice in ('OpenAI', 'x.ai'):
+        return sdk.AsyncOpenAI(api_key=api_key, base_url=base_url(api_choice), max_retries=MAX_RETRIES)
+    if api_choice == 'Gemini':
+        endpoint = base_url(api_choice)
+        if endpoint:
+            sdk.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            sdk.configure(api_key=api_key)
+        return sdk.GenerativeModel(MODELS['Gemini'])
+    raise ValueError(f"Invalid API choice: {api_choice}")
+
+
+def get_client(api_choice):
+    """
+    현재 이벤트 루프에서 재사용하는 공급자 클라이언트
+    """
+    check_provider(api_choice)
+    clients = _state()["clients"]
+    if api_choice not in clients:
+        clients[api_choice] = _make_client(api_choice)
+    return clients[api_choice]
+
+
+def get_semaphore(api_choice):
+    """
+    현재 이벤트 루프에서 공급자별 동시 요청 수를 제한하는 AIMD 한도 (async with로 사용)
+    """
+    semaphores = _state()["semaphores"]
+    if api_choice not in semaphores:
+        semaphores[api_choice] = ratelimit.AdaptiveConcurrency(MAX_CONCURRENCY.get(api_choice, 4))
+    return semaphores[api_choice]
+
+
+def _throttled(api_choice, concurrency, limiter, exc, attempt):
+    """
+    429면 동시성 한도를 줄이고 버킷을 retry-after(없으면 지수 백오프)만큼 멈춘 뒤 True
+    """
+    limited, retry_after = ratelimit.rate_limit_info(exc)
+    if not limited or attempt >= ratelimit.RATE_LIMIT_RETRIES:
+        return False
+    concurrency.on_throttle()
+    limiter.pause(retry_after if retry_after is not None else ratelimit.DEFAULT_BACKOFF * 2 ** attempt)
+    return True
+
+
+def usage_tokens(api_choice, response):
+    """
+    응답(또는 마지막 스트림 청크)의 usage 필드에서 (입력 토큰, 출력 토큰)을 꺼낸다.
+    입력 토큰에는 프롬프트 캐시에서 읽거나 캐시에 쓴 토큰도 포함된다.
+
+    Returns:
+        tuple | None: usage가 없으면 None
+    """
+    if api_choice == 'Gemini':
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return None
+        return usage.prompt_token_count or 0, usage.candidates_token_count or 0
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    if api_choice == 'Anthropic':
+        # Anthropic의 input_tokens는 캐시 읽기/쓰기 토큰을 뺀 나머지
+        prompt_tokens = (usage.input_tokens or 0) + (getattr(usage, "cache_read_input_tokens", None) or 0) \
+            + (getattr(usage, "cache_creation_input_tokens", None) or 0)
+        return prompt_tokens, usage.output_tokens or 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
+
+def cached_tokens(api_choice, response):
+    """
+    입력 토큰 중 공급자 프롬프트 캐시에서 읽은 토큰 수
+
+    Returns:
+        int | None: usage에 해당 필드가 없으면 None
+    """
+    if api_choice == 'Gemini':
+        usage = getattr(response, "usage_metadata", None)
+        return getattr(usage, "cached_content_token_count", None)
+    usage = getattr(response, "usage", None)
+    if api_choice == 'Anthropic':
+        return getattr(usage, "cache_read_input_tokens", None)
+    return getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+
+
+def record_usage(api_choice, response):
+    tokens = usage_tokens(api_choice, response)
+    if tokens is None:
+        return
+    tracing.count("llm_prompt_tokens", tokens[0], provider=api_choice)
+    tracing.count("llm_completion_tokens", tokens[1], provider=api_choice)
+    cached = cached_tokens(api_choice, response)
+    if cached is not None:
+        tracing.count("llm_cached_prompt_tokens", cached, provider=api_choice)
+    totals = _usage.get()
+    if totals is not None:
+        total = totals.setdefault(api_choice, {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0})
+        total["prompt_tokens"] += tokens[0]
+        total["completion_tokens"] += tokens[1]
+        total["cached_tokens"] += cached or 0
+
+
+@contextlib.contextmanager
+def usage_scope():
+    """
+    이 안에서 보낸 요청의 공급자별 토큰 합계 (트레이스와 별개. 같은 트레이스의 다른 요청은 섞이지 않는다)
+
+        with usage_scope() as usage:
+            await complete('Gemini', prompt)
+        usage['Gemini']  # {"prompt_tokens", "completion_tokens", "cached_tokens"}
+
+    태스크는 만들 때의 컨텍스트를 복사하므로 이 안에서 만든 태스크의 요청도 포함된다.
+    """
+    totals = {}
+    token = _usage.set(totals)
+    try:
+        yield totals
+    finally:
+        _usage.reset(token)
+
+
+def cost(api_choice, prompt_tokens, completion_tokens):
+    """
+    PRICES로 어림한 비용 (USD)
+    """
+    input_price, output_price = PRICES[api_choice]
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def _anthropic_content(prompt):
+    # 앞부분에 cache_control을 달아 같은 자막을 다른 모드/언어로 다시 물어도 캐시에서 읽게 한다
+    if not isinstance(prompt, Prompt):
+        return prompt
+    return [
+        {"type": "text", "text": prompt.prefix, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": prompt.suffix},
+    ]
+
+
+def _gemini_cached_content(prefix):
+    """
+    앞부분으로 만든 Gemini CachedContent (프로세스 안에서 GEMINI_CACHE_TTL 동안 재사용).
+    만들 수 없으면(엔드포인트/모델 미지원 등) None을 기억해 두고 TTL 동안 캐시 없이 보낸다.
+    """
+    key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+    now = time.time()
+    with _gemini_caches_lock:
+        entry = _gemini_caches.get(key)
+        if entry is not None and entry[1] - now > 30:
+            return entry[0]
+
+    def create():
+        caching = importlib.import_module("google.generativeai.caching")
+        try:
+            cached = caching.CachedContent.create(
+                model=GEMINI_CACHE_MODEL,
+                contents=[{'role': 'user', 'parts': [prefix]}],
+                ttl=datetime.timedelta(seconds=GEMINI_CACHE_TTL),
+            )
+        except Exception:
+            cached = None
+        with _gemini_caches_lock:
+            for stale in [k for k, (_, expires) in _gemini_caches.items() if expires < now]:
+                del _gemini_caches[stale]
+            _gemini_caches[key] = (cached, now + GEMINI_CACHE_TTL)
+        return cached
+
+    # 같은 앞부분으로 동시에 들어온 요청(다른 모드/언어)은 캐시를 한 번만 만든다
+    return singleflight.get_group().do("gemini-cache:" + key, create)
+
+
+async def _gemini_target(client, prompt):
+    """
+    Returns:
+        tuple: (GenerativeModel, 보낼 텍스트). 앞부분이 캐시되면 cached content 모델과 뒷부분만
+    """
+    if isinstance(prompt, Prompt) and estimate_tokens(prompt.prefix) >= GEMINI_CACHE_MIN_TOKENS:
+        cached = await asyncio.to_thread(_gemini_cached_content, prompt.prefix)
+        if cached is not None:
+            return load_sdk('Gemini').GenerativeModel.from_cached_content(cached), prompt.suffix
+    return client, prompt
+
+
+async def _request(api_choice, prompt):
+    client = get_client(api_choice)
+    model_name = MODELS[api_choice]
+    params = SAMPLING_PARAMS[api_choice]
+
+    if api_choice == 'Anthropic':
+        response = await client.messages.create(
+            model=model_name,
+            messages=[{"role": "user", "content": _anthropic_content(prompt)}],
+            **params
+        )
+        record_usage(api_choice, response)
+        return "".join(block.text for block in response.content if block.type == "text")
+
+    if api_choice == 'OpenAI':
+        response = await client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        record_usage(api_choice, response)
+        return response.choices[0].message.content
+
+    if api_choice == 'Gemini':
+        model, text = await _gemini_target(client, prompt)
+        contents = [{'role': 'user', 'parts': text}]
+        if base_url(api_choice):
+            response = await asyncio.to_thread(model.generate_content, contents)
+        else:
+            response = await model.generate_content_async(contents)
+        record_usage(api_choice, response)
+        return response.text
+
+    # x.ai
+    response = await client.chat.completions.create(
+        model=model_name,
+        messages=[
+            {"role": "system", "content": params["system"]},
+            {"role": "user", "content": prompt},
+        ],
+        stream=False,
+    )
+    record_usage(api_choice, response)
+    return response.choices[0].message.content
+
+
+async def complete(api_choice, prompt):
+    """
+    프롬프트 하나를 보내고 응답 텍스트를 반환 (RPM/TPM 버킷 + 공급자별 동시성 한도)
+    """
+    check_provider(api_choice)
+    limiter = ratelimit.get_limiter(api_choice, MODELS[api_choice])
+    tokens = estimate_tokens(prompt)
+    attempt = 0
+    with tracing.span("llm.request", provider=api_choice, model=MODELS[api_choice]) as attrs:
+        while True:
+            # 프롬프트 토큰은 논리적 요청마다 한 번만 뺀다 (429 재시도는 요청 수와 pause만 기다린다)
+            waited = await limiter.acquire(tokens if attempt == 0 else 0)
+            attrs["rate_limit_wait"] = attrs.get("rate_limit_wait", 0.0) + waited
+            concurrency = get_semaphore(api_choice)
+            async with concurrency:
+                try:
+                    result = await _request(api_choice, prompt)
+                except Exception as exc:
+                    if not _throttled(api_choice, concurrency, limiter, exc, attempt):
+                        raise
+                    attempt += 1
+                    continue
+            concurrency.on_success()
+            attrs["attempts"] = attempt + 1
+            return result
+
+
+def _gemini_text(chunk):
+    # 텍스트 part가 없는 청크(종료/안전 필터 등)에서는 .text가 ValueError를 낸다
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+async def _iterate_in_thread(iterable):
+    # 동기 스트림(REST 전송)의 다음 청크를 스레드에서 받아 이벤트 루프를 막지 않는다
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+async def stream(api_choice, prompt):
+    """
+    응답 텍스트 조각(delta)을 도착하는 대로 yield 하는 비동기 제너레이터.
+    스트림이 끝날 때까지 공급자 동시성 한도 한 칸을 잡고 있는다.
+    첫 조각 전에 429를 받으면 complete()와 같이 쉬었다가 다시 요청한다.
+    """
+    check_provider(api_choice)
+    limiter = ratelimit.get_limiter(api_choice, MODELS[api_choice])
+    tokens = estimate_tokens(prompt)
+    attempt = 0
+    with tracing.span("llm.request", provider=api_choice, model=MODELS[api_choice], stream=True) as attrs:
+        while True:
+            # 프롬프트 토큰은 논리적 요청마다 한 번만 뺀다 (429 재시도는 요청 수와 pause만 기다린다)
+            waited = await limiter.acquire(tokens if attempt == 0 else 0)
+            attrs["rate_limit_wait"] = attrs.get("rate_limit_wait", 0.0) + waited
+            concurrency = get_semaphore(api_choice)
+            started = False
+            async with concurrency:
+                try:
+                    async for delta in _stream_request(api_choice, prompt):
+                        started = True
+                        yield delta
+                except Exception as exc:
+                    if started or not _throttled(api_choice, concurrency, limiter, exc, attempt):
+                        raise
+                    attempt += 1
+                    continue
+            concurrency.on_success()
+            attrs["attempts"] = attempt + 1
+            return
+
+
+async def _stream_request(api_choice, prompt):
+    client = get_client(api_choice)
+    model_name = MODELS[api_choice]
+    params = SAMPLING_PARAMS[api_choice]
+
+    if api_choice == 'Anthropic':
+        # Messages streaming API
+        async with client.messages.stream(
+            model=model_name,
+            messages=[{"role": "user", "content": _anthropic_content(prompt)}],
+            **params
+        ) as response:
+            async for text in response.text_stream:
+                yield text
+            record_usage(api_choice, await response.get_final_message())
+        return
+
+    if api_choice == 'Gemini':
+        model, text = await _gemini_target(client, prompt)
+        contents = [{'role': 'user', 'parts': text}]
+        if base_url(api_choice):
+            response = _iterate_in_thread(
+                await asyncio.to_thread(model.generate_content, contents, stream=True)
+            )
+        else:
+            response = await model.generate_content_async(contents, stream=True)
+        last = None
+        async for chunk in response:
+            last = chunk
+            text = _gemini_text(chunk)
+            if text:
+                yield text
+        if last is not None:
+            record_usage(api_choice, last)  # 마지막 청크의 usage_metadata가 전체 합계
+        return
+
+    messages = [{"role": "user", "content": prompt}]
+    if api_choice == 'x.ai':
+        messages.insert(0, {"role": "system", "content": params["system"]})
+    # OpenAI는 stream_options를 줘야 마지막 청크에 usage를 보낸다
+    extra = {"stream_options": {"include_usage": True}} if api_choice == 'OpenAI' else {}
+    response = await client.chat.completions.create(
+        model=model_name,
+        messages=messages,
+        stream=True,
+        **extra,
+    )
+    async for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if getattr(chunk, "usage", None) is not None:
+            record_usage(api_choice, chunk)
+
+
+def get_background_loop():
+    """
+    run()/iterate()가 사용하는 공용 이벤트 루프 (전용 데몬 스레드에서 실행)
+    """
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="llm-providers", daemon=True)
+            thread.start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run(coro):
+    """
+    동기 코드에서 코루틴을 공용 백그라운드 이벤트 루프에 실행하고 결과를 기다린다.
+    (asyncio.run과 달리 루프와 클라이언트 커넥션 풀이 호출 사이에 유지된다)
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("providers.run() cannot be called from the provider event loop; await the coroutine")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def iterate(agen):
+    """
+    비동기 제너레이터를 백그라운드 이벤트 루프에서 돌리며 동기 제너레이터로 노출한다.
+    (Streamlit의 st.write_stream 등 동기 소비자용)
+    """
+    loop = get_background_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
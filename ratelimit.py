@@ -0,0 +1,322 @@
+# ratelimit.py
+"""
+LLM 호출용 공급자/모델별 rate limiter와 적응형 동시성(AIMD).
+
+- RateLimiter: 분당 요청 수(RPM)와 분당 토큰 수(TPM) 토큰 버킷. 렌더링된 프롬프트의
+  어림 토큰 수(chunking.estimate_tokens)만큼 TPM 버킷에서 뺀다.
+  예약(reservation) 방식이라 잔량이 음수가 될 수 있고, 호출자는 잔량이 0이 될 때까지 기다린다
+  (폴링 없이 한 번의 계산으로 대기 시간이 정해지므로 여러 호출자가 공평하게 줄 선다)
+- 429 / retry-after: 버킷을 해당 시간만큼 멈춘다 (pause). 백엔드를 공유하면 모든 프로세스가 함께 멈춘다
+- AdaptiveConcurrency: 성공하면 동시성 한도를 조금씩 늘리고(additive increase),
+  429를 받으면 절반으로 줄인다(multiplicative decrease)
+- 백엔드: MemoryBackend(프로세스 내), SQLiteBackend(같은 파일을 쓰는 프로세스끼리 공유).
+  YTS_RATE_LIMIT_DB에 경로를 주면 기본 백엔드가 SQLite가 된다
+
+RPM 버킷 용량은 BURST_SECONDS 분량이라 1분치 요청이 한꺼번에 나갔다가 막히는 진동을 피한다.
+TPM 버킷 용량은 1분치다. 용량보다 큰 프롬프트 하나는 용량만큼만 빼므로(버킷을 비울 뿐)
+모두의 버킷을 키우지 않고도 한가할 때 바로 나간다.
+버킷은 가득 찬 상태로 시작하므로 한가한 프로세스의 분당 한도 안 요청은 기다리지 않는다.
+SQLite 백엔드의 예약은 락을 기다릴 수 있으므로 acquire()는 스레드에서 예약한다.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 공급자별 기본 한도 (계정 등급에 맞게 YTS_RATE_LIMITS='{"OpenAI": {"rpm": 5000, "tpm": 2000000}}'로 재정의)
+RATE_LIMITS = {
+    'Anthropic': {"rpm": 50, "tpm": 40_000},
+    'OpenAI': {"rpm": 500, "tpm": 200_000},
+    'Gemini': {"rpm": 1_000, "tpm": 4_000_000},
+    'x.ai': {"rpm": 60, "tpm": 100_000},
+}
+
+# RPM 버킷 용량 (초 단위 분량)
+BURST_SECONDS = 10
+
+# TPM 버킷 용량 (초 단위 분량). 길게 잡으면 그만큼 한꺼번에 나갔다가 막힌다
+TOKEN_BURST_SECONDS = 60
+
+# 429에 retry-after가 없을 때 첫 대기 시간 (시도마다 2배)
+DEFAULT_BACKOFF = 1.0
+
+# 429를 받은 요청을 다시 보내는 최대 횟수
+RATE_LIMIT_RETRIES = 3
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_backend = None
+
+
+def limits_for(api_choice):
+    """
+    기본 한도 + YTS_RATE_LIMITS 재정의
+    """
+    limits = dict(RATE_LIMITS.get(api_choice, {"rpm": 60, "tpm": 100_000}))
+    override = os.getenv("YTS_RATE_LIMITS")
+    if override:
+        limits.update(json.loads(override).get(api_choice, {}))
+    return limits
+
+
+def _take(state, amount, rate, capacity, now):
+    # state: [tokens, updated, paused_until] -> 대기 시간(초). state는 제자리에서 갱신
+    tokens, updated, paused_until = state
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate) - amount
+    state[0], state[1] = tokens, now
+    return max(0.0, -tokens / rate, paused_until - now)
+
+
+class MemoryBackend:
+    """
+    프로세스 내 버킷 상태 (스레드 안전)
+    """
+
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, requests, now):
+        """
+        Args:
+            requests (list): [(key, amount, rate_per_sec, capacity), ...]
+
+        Returns:
+            float: 모든 버킷이 허용할 때까지 기다려야 하는 시간 (초)
+        """
+        with self._lock:
+            wait = 0.0
+            for key, amount, rate, capacity in requests:
+                state = self._state.setdefault(key, [capacity, now, 0.0])
+                wait = max(wait, _take(state, amount, rate, capacity, now))
+            return wait
+
+    def pause(self, keys, until):
+        with self._lock:
+            for key in keys:
+                state = self._state.get(key)
+                if state is not None:
+                    state[2] = max(state[2], until)
+
+
+class SQLiteBackend:
+    """
+    SQLite 파일에 버킷 상태를 두어 여러 프로세스(Streamlit 레플리카, 배치 작업)가 한도를 공유한다.
+    예약은 BEGIN IMMEDIATE 트랜잭션 하나로 처리된다.
+
+    Args:
+        path (str): SQLite 파일 경로
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                paused_until REAL NOT NULL DEFAULT 0
+            )"""
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, requests, now):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            wait = 0.0
+            for key, amount, rate, capacity in requests:
+                row = conn.execute(
+                    "SELECT tokens, updated, paused_until FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                state = list(row) if row else [capacity, now, 0.0]
+                wait = max(wait, _take(state, amount, rate, capacity, now))
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated, paused_until) VALUES (?, ?, ?, ?)",
+                    (key, state[0], state[1], state[2]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def pause(self, keys, until):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE buckets SET paused_until = MAX(paused_until, ?) WHERE key = ?",
+                [(until, key) for key in keys],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class RateLimiter:
+    """
+    공급자/모델 하나의 RPM + TPM 토큰 버킷.
+
+    Args:
+        name (str): 버킷 키 접두사 (예: "OpenAI:gpt-4o-mini")
+        rpm (float): 분당 요청 수
+        tpm (float): 분당 토큰 수
+        backend: MemoryBackend 또는 SQLiteBackend
+        clock (callable): 현재 시각 (time.time — 프로세스 간에 같은 기준이어야 한다)
+    """
+
+    def __init__(self, name, rpm, tpm, backend=None, clock=time.time):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.backend = backend or MemoryBackend()
+        self.clock = clock
+        self.keys = (f"{name}:rpm", f"{name}:tpm")
+        self.request_capacity = max(1.0, rpm * BURST_SECONDS / 60)
+        self.token_capacity = max(1.0, tpm * TOKEN_BURST_SECONDS / 60)
+
+    def reserve(self, tokens):
+        """
+        요청 하나(토큰 tokens개)를 예약하고 기다려야 할 시간(초)을 반환.
+        용량보다 큰 요청은 용량만큼만 뺀다 (그렇지 않으면 영원히 음수에서 시작한다)
+        """
+        rpm_key, tpm_key = self.keys
+        return self.backend.reserve([
+            (rpm_key, 1, self.rpm / 60, self.request_capacity),
+            (tpm_key, min(tokens, self.token_capacity), self.tpm / 60, self.token_capacity),
+        ], self.clock())
+
+    async def acquire(self, tokens):
+        """
+        예약 후 필요한 만큼 기다린다
+
+        Returns:
+            float: 기다린 시간 (초)
+        """
+        if isinstance(self.backend, MemoryBackend):
+            wait = self.reserve(tokens)
+        else:
+            # SQLite는 BEGIN IMMEDIATE에서 busy timeout까지 기다릴 수 있다 (이벤트 루프를 막지 않는다)
+            wait = await asyncio.to_thread(self.reserve, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        429 / retry-after: 이 공급자의 모든 버킷을 seconds 동안 멈춘다
+        """
+        self.backend.pause(self.keys, self.clock() + seconds)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 동시성 한도 (asyncio, 이벤트 루프 하나에서 사용)
+
+        async with concurrency:
+            ...
+        concurrency.on_success() / concurrency.on_throttle()
+
+    Args:
+        max_limit (int): 최대 동시 실행 수 (시작 값)
+        min_limit (int): 최소 동시 실행 수
+        increase (float): 성공할 때마다 limit += increase / limit (한도만큼 성공하면 약 +increase)
+        decrease (float): 429를 받으면 limit *= decrease
+    """
+
+    def __init__(self, max_limit, min_limit=1, increase=1.0, decrease=0.5):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+        return False
+
+    def on_success(self):
+        self.limit = min(float(self.max_limit), self.limit + self.increase / self.limit)
+
+    def on_throttle(self):
+        self.limit = max(float(self.min_limit), self.limit * self.decrease)
+
+
+def rate_limit_info(exc):
+    """
+    SDK 예외가 429인지와 retry-after(초)를 꺼낸다.
+
+    Returns:
+        tuple: (is_rate_limited, retry_after or None)
+    """
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if status != 429 and type(exc).__name__ not in ("RateLimitError", "ResourceExhausted"):
+        return False, None
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return True, float(value) if value is not None else None
+    except ValueError:
+        return True, None
+
+
+def get_backend():
+    """
+    기본 백엔드. YTS_RATE_LIMIT_DB가 있으면 SQLiteBackend(공유), 없으면 MemoryBackend
+    """
+    global _backend
+    with _limiters_lock:
+        if _backend is None:
+            path = os.getenv("YTS_RATE_LIMIT_DB")
+            _backend = SQLiteBackend(path) if path else MemoryBackend()
+        return _backend
+
+
+def set_backend(backend):
+    """
+    기본 백엔드 교체 (이미 만든 limiter는 버린다)
+    """
+    global _backend
+    with _limiters_lock:
+        _backend = backend
+        _limiters.clear()
+
+
+def get_limiter(api_choice, model):
+    """
+    공급자/모델별 RateLimiter (프로세스 내에서 재사용)
+    """
+    backend = get_backend()
+    key = f"{api_choice}:{model}"
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limits = limits_for(api_choice)
+            limiter = _limiters[key] = RateLimiter(key, limits["rpm"], limits["tpm"], backend)
+        return limiter
@@ -1,10 +1,17 @@
 # scrape_youtube.py
 import sys
 import re
-import requests
-from bs4 import BeautifulSoup
+import time
+import threading
+from collections import OrderedDict
 import json
-from youtube_transcript_api import YouTubeTranscriptApi
+import http_client
+import cache
+import search_index
+import singleflight
+import tracing
+from compaction import compact_transcript
+from transcript import Transcript, normalize_chapters, parse_timestamp
 
 def extract_video_id(url):
     # Regular expression to extract video ID from URL
@@ -14,129 +21,541 @@ def extract_video_id(url):
     else:
         raise ValueError("Invalid YouTube URL")
 
-def extract_metadata(url):
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, features="html.parser")
+WATCH_URL = "https://www.youtube.com/watch?v={video_id}"
 
-    link_title = soup.find_all(name="title")[0]
-    title = str(link_title)
-    title = title.replace("<title>","")
-    title = title.replace("</title>","")
+# 한 번의 요약 요청 안에서 같은 watch 페이지를 여러 번 받지 않도록 잠깐 보관
+WATCH_PAGE_CACHE_SIZE = 32
+WATCH_PAGE_TTL = 300  # seconds
 
-    link_channel = soup.find("link", itemprop="name")
-    channel = str(link_channel)
+_watch_pages = OrderedDict()
+_watch_pages_lock = threading.Lock()
 
-    # Parse the HTML
-    soup = BeautifulSoup(channel, 'html.parser')
+TRANSCRIPT_LANGUAGES = ('en', 'es', 'ko')
 
-    # Find the link tag with itemprop="name"
-    link_tag = soup.find('link', itemprop='name')
+THUMBNAIL_URL = "https://img.youtube.com/vi/{video_id}/{name}.jpg"
+THUMBNAIL_NAMES = ("maxresdefault", "hqdefault")  # 앞에서부터 시도
+THUMBNAIL_CACHE_BYTES = 32 * 1024 * 1024
+THUMBNAIL_FRESH = 600  # seconds, 이후에는 조건부 요청으로 재검증
 
-    # Extract the content attribute
-    channel = link_tag['content'] if link_tag else None
-    
-    return title, channel
+# youtube_transcript_api가 쿠키를 만들어 다시 받는 동의 페이지의 표시
+CONSENT_FORM = 'action="https://consent.youtube.com/s"'
 
-def extract_chapters_from_html(url):
+# 실패한 조회(제목/채널을 못 찾음: 동의 페이지, 일시적 오류 등)는 이 시간만 캐시한다
+FAILED_LOOKUP_TTL = 300  # seconds
+
+# "0:00 Intro", "12:34 - Topic", "1:02:03 Outro"
+CHAPTER_LINE_REGEX = re.compile(r"^\s*(\d+(?::\d{1,2}){1,2})\s+(?:[-–—|]\s*)?(.*)$")
+
+
+# window["ytInitialData"] = {  /  var ytInitialPlayerResponse = {  형태 모두 허용
+INITIAL_JSON_REGEX = re.compile(
+    r"""(ytInitialPlayerResponse|ytInitialData)["']?\]?\s*=\s*(?=\{)"""
+)
+INITIAL_JSON_NAMES = ("ytInitialPlayerResponse", "ytInitialData")
+
+_json_decoder = json.JSONDecoder()
+
+
+def find_initial_json(html, name, pos=0):
     """
-    1. watch 페이지 HTML을 받아옴
-    2. ytInitialPlayerResponse = {...}; 형태의 JSON 스니펫을 찾음
-    3. JSON 파싱 후, 공식 챕터 데이터(chapters) 추출
-    4. 챕터 제목과 시작 시간을 튜플 (startTime, title) 형태로 리스트 반환
+    pos 이후에서 `name = {...}` 할당을 찾아 JSON 값 하나만 raw_decode로 디코딩.
+
+    Returns:
+        tuple: (dict 또는 None, 디코딩이 끝난 위치)
     """
+    while True:
+        match = INITIAL_JSON_REGEX.search(html, pos)
+        if not match:
+            return None, pos
+        pos = match.end()
+        if match.group(1) != name:
+            continue
+        try:
+            value, end = _json_decoder.raw_decode(html, pos)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value, end
 
-    r = requests.get(url)
-    html = r.text
 
-    # 1) ytInitialPlayerResponse 블록 추출 (정규식 혹은 string find 등)
-    #    "ytInitialPlayerResponse = { ... };" 형태로 되어있는 스크립트 부분을 찾음
-    pattern = r"ytInitialPlayerResponse\s*=\s*(\{.*?\});"
-    match = re.search(pattern, html, re.DOTALL)
-    if not match:
-        return []
+def extract_initial_json(html, names=INITIAL_JSON_NAMES):
+    """
+    watch 페이지 HTML에서 ytInitialPlayerResponse / ytInitialData를 한 번의 스캔으로 추출.
 
-    json_str = match.group(1)
+    할당문 위치만 정규식으로 찾고, 그 위치에서 raw_decode로 JSON 값 하나만 정확히
+    디코딩한다. 문자열 안에 '};'가 있어도 잘리지 않으며, 디코딩이 끝난 지점부터
+    다음 검색을 이어가므로 페이지를 처음부터 다시 훑지 않는다.
 
-    # 2) JSON 파싱
-    try:
-        data = json.loads(json_str)
-    except json.JSONDecodeError:
-        return []
+    Args:
+        html (str): watch 페이지 HTML
+        names (tuple): 추출할 변수 이름들
 
-    # 3) chapters 위치 찾아가기
-    #    data["playerOverlays"]["playerOverlayRenderer"]["decoratedPlayerBarRenderer"]["decoratedPlayerBarRenderer"]["playerBar"]["chapteredPlayerBarRenderer"]["chapters"]
-    #    예외가 발생할 수 있으므로 dict.get()으로 안전하게 접근
-    chapters_data = (
+    Returns:
+        dict: {이름: 파싱된 dict} (찾지 못한 이름은 빠짐)
+    """
+    found = {}
+    pos = 0
+    while len(found) < len(names):
+        match = INITIAL_JSON_REGEX.search(html, pos)
+        if not match:
+            break
+        name = match.group(1)
+        pos = match.end()
+        if name in found or name not in names:
+            continue
+        try:
+            value, pos = _json_decoder.raw_decode(html, pos)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            found[name] = value
+    return found
+
+
+def _player_bar(data):
+    return (
         data
         .get("playerOverlays", {})
         .get("playerOverlayRenderer", {})
         .get("decoratedPlayerBarRenderer", {})
         .get("decoratedPlayerBarRenderer", {})
         .get("playerBar", {})
-        .get("chapteredPlayerBarRenderer", {})
-        .get("chapters", [])
     )
 
-    chapters = []
-    for ch in chapters_data:
-        # 각 챕터는 {"title":{"simpleText":"..."}, "timeRangeStartMillis":"...", ...} 형태
-        title = ch.get("title", {}).get("simpleText", None)
-        start_ms = ch.get("timeRangeStartMillis")
-        if title and start_ms is not None:
-            # ms -> seconds 변환
-            start_sec = int(start_ms) / 1000
-            chapters.append((start_sec, title))
-    
-    return chapters
+
+def _chapters_from_markers(player_bar):
+    # ytInitialData: ...playerBar.multiMarkersPlayerBarRenderer.markersMap[].value.chapters[].chapterRenderer
+    markers_map = player_bar.get("multiMarkersPlayerBarRenderer", {}).get("markersMap", [])
+    for marker in markers_map:
+        chapters = marker.get("value", {}).get("chapters", [])
+        if chapters:
+            return chapters
+    return []
+
+
+class WatchPage:
+    """
+    YouTube watch 페이지 한 개를 표현하는 객체.
+
+    HTML은 처음 필요할 때 한 번만 받아오고, BeautifulSoup 파싱과
+    ytInitialPlayerResponse JSON 파싱도 각각 한 번만 수행한다.
+    제목, 채널, 설명, 두 가지 챕터 소스를 모두 같은 다운로드에서 꺼낸다.
+
+    Args:
+        url (str): watch 페이지 URL
+        html (str, optional): 이미 받아둔 HTML (테스트/오프라인 용도)
+    """
+
+    def __init__(self, url, html=None):
+        self.url = url
+        self._html = html
+        self._soup = None
+        self._initial = {}
+        # 메타데이터/자막 단계가 다른 스레드에서 동시에 접근해도 다운로드/파싱은 한 번만
+        self._lock = threading.RLock()
+
+    @property
+    def html(self):
+        if self._html is None:
+            with self._lock:
+                if self._html is None:
+                    with tracing.span("youtube.fetch_watch_page") as attrs:
+                        r = http_client.get(self.url, headers={'Accept-Language': 'en-US'})
+                        r.raise_for_status()
+                        self._html = r.text
+                        attrs["chars"] = len(self._html)
+        return self._html
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            with self._lock:
+                if self._soup is None:
+                    from bs4 import BeautifulSoup  # 제목/채널이 필요할 때만 로드 (import 비용 절감)
+                    html = self.html
+                    with tracing.span("youtube.parse_html"):
+                        self._soup = BeautifulSoup(html, features="html.parser")
+        return self._soup
+
+    @property
+    def title(self):
+        title_tag = self.soup.find("title")
+        return title_tag.get_text() if title_tag else None
+
+    @property
+    def channel(self):
+        # <link itemprop="name" content="채널명">
+        link_tag = self.soup.find("link", itemprop="name")
+        return link_tag.get("content") if link_tag else None
+
+    @property
+    def description(self):
+        """
+        영상 설명 전체. <meta itemprop="description">는 잘려 있는 경우가 많아서
+        ytInitialPlayerResponse의 shortDescription을 우선 사용한다.
+        """
+        description = (
+            self.player_response
+            .get("videoDetails", {})
+            .get("shortDescription")
+        )
+        if description:
+            return description
+        desc_meta = self.soup.find("meta", itemprop="description")
+        if not desc_meta:
+            return ""
+        return desc_meta.get("content", "")
+
+    def _initial_json(self, name):
+        # 필요한 블록만 디코딩 (ytInitialData는 1 MB가 넘는 경우가 많다)
+        if name not in self._initial:
+            with self._lock:
+                if name not in self._initial:
+                    html = self.html
+                    with tracing.span("youtube.parse_json", block=name):
+                        value, _ = find_initial_json(html, name)
+                    self._initial[name] = value or {}
+        return self._initial[name]
+
+    @property
+    def player_response(self):
+        """
+        ytInitialPlayerResponse = {...}; 블록을 파싱한 dict (없으면 빈 dict)
+        """
+        return self._initial_json("ytInitialPlayerResponse")
+
+    @property
+    def initial_data(self):
+        """
+        ytInitialData = {...}; 블록을 파싱한 dict (없으면 빈 dict)
+        """
+        return self._initial_json("ytInitialData")
+
+    def load_initial_json(self):
+        """
+        두 블록을 extract_initial_json 한 번의 스캔으로 미리 모두 디코딩
+        """
+        missing = tuple(n for n in INITIAL_JSON_NAMES if n not in self._initial)
+        if missing:
+            html = self.html
+            with tracing.span("youtube.parse_json", block=",".join(missing)):
+                found = extract_initial_json(html, missing)
+            for name in missing:
+                self._initial[name] = found.get(name, {})
+        return self._initial
+
+    def chapters_from_player_response(self):
+        """
+        공식 챕터 데이터(chapters)를 (start_sec, title) 튜플 리스트로 반환.
+        예전 위치(ytInitialPlayerResponse의 chapteredPlayerBarRenderer)를 먼저 보고,
+        없으면 ytInitialData의 markersMap에서 찾는다.
+        """
+        #    data["playerOverlays"]["playerOverlayRenderer"]["decoratedPlayerBarRenderer"]["decoratedPlayerBarRenderer"]["playerBar"]["chapteredPlayerBarRenderer"]["chapters"]
+        #    예외가 발생할 수 있으므로 dict.get()으로 안전하게 접근
+        chapters_data = (
+            _player_bar(self.player_response)
+            .get("chapteredPlayerBarRenderer", {})
+            .get("chapters", [])
+        )
+        # 마커가 없는 페이지에서는 큰 ytInitialData를 디코딩하지 않는다
+        if not chapters_data and '"multiMarkersPlayerBarRenderer"' in self.html:
+            chapters_data = _chapters_from_markers(_player_bar(self.initial_data))
+
+        chapters = []
+        for ch in chapters_data:
+            # 각 챕터는 {"title":{"simpleText":"..."}, "timeRangeStartMillis":"...", ...} 형태
+            ch = ch.get("chapterRenderer", ch)
+            title = ch.get("title", {}).get("simpleText", None)
+            start_ms = ch.get("timeRangeStartMillis")
+            if title and start_ms is not None:
+                # ms -> seconds 변환
+                start_sec = int(start_ms) / 1000
+                chapters.append((start_sec, title))
+        return chapters
+
+    def chapters_from_description(self):
+        """
+        설명의 'MM:SS Title' / 'H:MM:SS Title' 라인을 (start_sec, title) 리스트로 반환
+        """
+        description = self.description
+        if not description:
+            return []
+
+        chapters = []
+        for line in description.split('\n'):
+            match = CHAPTER_LINE_REGEX.match(line)
+            if match:
+                start_sec = parse_timestamp(match.group(1))  # "1:02:03" -> 3723.0
+                chapter_title = match.group(2).strip()  # "Intro"
+                chapters.append((start_sec, chapter_title))
+        return chapters
+
+    def chapters(self):
+        # 1) 공식 챕터 시도, 2) 없으면 설명에서 시도
+        return self.chapters_from_player_response() or self.chapters_from_description()
+
+
+def get_watch_page(url):
+    """
+    video ID 기준으로 WatchPage를 재사용한다.
+
+    extract_metadata, get_transcript 등이 같은 영상에 대해 연달아 호출되어도
+    watch 페이지 다운로드는 한 번만 일어난다.
+
+    Args:
+        url (str | WatchPage): YouTube URL 또는 이미 만든 WatchPage
+
+    Returns:
+        WatchPage
+    """
+    if isinstance(url, WatchPage):
+        return url
+    video_id = extract_video_id(url)
+    now = time.monotonic()
+    with _watch_pages_lock:
+        entry = _watch_pages.get(video_id)
+        if entry is not None and now - entry[0] < WATCH_PAGE_TTL:
+            _watch_pages.move_to_end(video_id)
+            return entry[1]
+        page = WatchPage(WATCH_URL.format(video_id=video_id))
+        _watch_pages[video_id] = (now, page)
+        _watch_pages.move_to_end(video_id)
+        while len(_watch_pages) > WATCH_PAGE_CACHE_SIZE:
+            _watch_pages.popitem(last=False)
+    return page
+
+def _video_id_of(url):
+    return extract_video_id(url.url if isinstance(url, WatchPage) else url)
+
+def _cached(kind, video_id, compute, *parts, failed=None):
+    """
+    디스크 캐시(cache.get_cache())를 거쳐 compute() 결과를 반환.
+    캐시에 없으면 같은 (kind, video_id, parts) 키의 동시 호출을 하나로 합친다
+    (singleflight: 스레드끼리, 디스크 캐시가 있으면 같은 캐시를 쓰는 프로세스끼리도).
+
+    Args:
+        failed (callable, optional): failed(value)가 참이면 FAILED_LOOKUP_TTL 동안만 캐시한다
+    """
+    key = cache.make_key(kind, video_id, *parts)
+    disk_cache = cache.get_cache()
+    if disk_cache is None:
+        return singleflight.get_group().do(key, compute)
+    value = disk_cache.get(key, singleflight.MISSING)
+    if value is not singleflight.MISSING:
+        return value
+
+    def compute_and_store():
+        value = compute()
+        if failed is not None and failed(value):
+            disk_cache.set(key, value, ttl=FAILED_LOOKUP_TTL)
+        else:
+            disk_cache.set(key, value)
+        return value
+
+    return singleflight.get_group().do(key, compute_and_store, lambda: disk_cache.get(key, singleflight.MISSING))
+
+def _cached_transcript(video_id, fetch, languages):
+    """
+    자막을 Transcript.to_bytes() 바이너리 형식으로 디스크 캐시에 저장/조회.
+    (세그먼트 dict 리스트를 JSON으로 저장하는 것보다 작고 디코딩이 빠르다)
+    같은 영상의 동시 다운로드는 _cached와 같이 하나로 합친다.
+    """
+    key = cache.make_key("transcript-bin", video_id, languages)
+    disk_cache = cache.get_cache()
+    if disk_cache is None:
+        return singleflight.get_group().do(key, lambda: Transcript.from_segments(fetch()))
+
+    def lookup():
+        data = disk_cache.get_bytes(key)
+        return Transcript.from_bytes(data) if data is not None else singleflight.MISSING
+
+    transcript = lookup()
+    if transcript is not singleflight.MISSING:
+        return transcript
+
+    def compute_and_store():
+        transcript = Transcript.from_segments(fetch())
+        disk_cache.set_bytes(key, transcript.to_bytes())
+        return transcript
+
+    return singleflight.get_group().do(key, compute_and_store, lookup)
+
+def _as_tuples(chapters):
+    # JSON 캐시를 거치면 튜플이 리스트가 되므로 되돌린다
+    return [tuple(ch) for ch in chapters]
+
+def extract_metadata(url):
+    def compute():
+        page = get_watch_page(url)
+        return [page.title, page.channel]
+    with tracing.span("youtube.metadata"):
+        title, channel = _cached("metadata", _video_id_of(url), compute, failed=lambda value: not any(value))
+    return title, channel
+
+def extract_chapters_from_html(url):
+    """
+    1. watch 페이지(WatchPage, 공유됨)를 가져옴
+    2. ytInitialPlayerResponse = {...}; 형태의 JSON 스니펫을 파싱
+    3. 공식 챕터 데이터(chapters) 추출
+    4. 챕터 제목과 시작 시간을 튜플 (startTime, title) 형태로 리스트 반환
+    """
+    with tracing.span("youtube.chapters", source="html"):
+        return _as_tuples(_cached(
+            "chapters_html", _video_id_of(url),
+            lambda: get_watch_page(url).chapters_from_player_response(),
+        ))
 
 def extract_chapters_from_description(url):
     """
-    1. 영상 설명 텍스트 추출
-    2. 'MM:SS Title' 형태의 타임스탬프를 탐색
-    3. (start_time, title) 리스트 반환
+    1. 영상 설명 텍스트 추출 (WatchPage, 공유됨)
+    2. 'MM:SS Title' / 'H:MM:SS Title' 형태의 타임스탬프를 탐색
+    3. (start_sec, title) 리스트 반환
     """
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, 'html.parser')
-    
-    # <meta itemprop="description" content="...영상 설명..."> 태그 찾기
-    desc_meta = soup.find("meta", itemprop="description")
-    if not desc_meta:
-        return []
-    
-    description = desc_meta.get("content", "")
-    if not description:
-        return []
-
-    # 라인 별로 나누어, 0:00, 1:24, 10:11 등 시간 형태를 찾고 뒤의 텍스트를 챕터명으로 인식
-    lines = description.split('\n')
-    chapter_regex = re.compile(r"^(\d+:\d+)\s+(.*)$")
-
-    chapters = []
-    for line in lines:
-        match = chapter_regex.match(line)
-        if match:
-            timestamp_str = match.group(1)  # "0:00"
-            chapter_title = match.group(2)  # "Intro"
-            chapters.append((timestamp_str, chapter_title))
-
-    return chapters
+    with tracing.span("youtube.chapters", source="description"):
+        return _as_tuples(_cached(
+            "chapters_description", _video_id_of(url),
+            lambda: get_watch_page(url).chapters_from_description(),
+        ))
         
+def _thumbnail_size(entry):
+    return len(entry["content"])
+
+_thumbnails = cache.MemoryLRUCache(THUMBNAIL_CACHE_BYTES, size_of=_thumbnail_size)
+
+def get_thumbnail(video_id):
+    """
+    썸네일 이미지를 bytes로 반환 (파일로 쓰지 않음).
+
+    - video ID별로 메모리 LRU(THUMBNAIL_CACHE_BYTES)에 보관
+    - THUMBNAIL_FRESH 초가 지나면 ETag / Last-Modified 조건부 요청으로 재검증 (304면 재사용)
+    - maxresdefault가 없으면(404) hqdefault로 대체
+
+    Returns:
+        bytes | None: 이미지 데이터 (가져오지 못하면 None)
+    """
+    with tracing.span("youtube.thumbnail"):
+        # 메모리 캐시라 프로세스 안에서만 합친다
+        return singleflight.get_group().do(cache.make_key("thumbnail", video_id), lambda: _get_thumbnail(video_id))
+
+def _get_thumbnail(video_id):
+    entry = _thumbnails.get(video_id)
+    now = time.monotonic()
+    if entry is not None and now - entry["checked"] < THUMBNAIL_FRESH:
+        return entry["content"]
+
+    names = THUMBNAIL_NAMES
+    if entry is not None:
+        # 지난번에 성공한 해상도부터 재검증
+        names = (entry["name"],) + tuple(n for n in THUMBNAIL_NAMES if n != entry["name"])
+
+    for name in names:
+        headers = {}
+        if entry is not None and entry["name"] == name:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        r = http_client.get(THUMBNAIL_URL.format(video_id=video_id, name=name), headers=headers)
+        if r.status_code == 304 and entry is not None:
+            entry = dict(entry, checked=now)
+            _thumbnails.set(video_id, entry)
+            return entry["content"]
+        if r.status_code == 200 and r.content:
+            entry = {
+                "name": name,
+                "content": r.content,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "checked": now,
+            }
+            _thumbnails.set(video_id, entry)
+            return entry["content"]
+    return entry["content"] if entry is not None else None
+
 def download_thumbnail(video_id):
-    image_url = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
-    img_data = requests.get(image_url).content
-    with open('thumbnail.jpg', 'wb') as handler:
-        handler.write(img_data)     
-        
-def get_transcript(video_id, url):
-    transcript_raw = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'es', 'ko'])
-    transcript_str_lst = [i['text'] for i in transcript_raw]
-    transcript_full = ' '.join(transcript_str_lst)
-    # 1) 공시 챕터 시도
+    """
+    예전 이름 호환용. 이제 ./thumbnail.jpg에 쓰지 않고 bytes를 반환한다.
+    """
+    return get_thumbnail(video_id)
+
+def fetch_transcript(video_id, languages=TRANSCRIPT_LANGUAGES, page=None):
+    """
+    공유 HTTP 세션으로 자막을 가져온다.
+
+    youtube_transcript_api는 자막 목록을 얻기 위해 watch 페이지를 한 번 더 받는데,
+    이미 받아둔 WatchPage가 있으면 그 HTML에서 captions JSON을 바로 읽는다.
+    동의 페이지이거나 라이브러리 내부 API가 바뀌었으면 라이브러리의 기본 경로로 되돌아간다.
+    그 밖의 오류(자막 없음, 요청 제한, 파싱 실패)는 그대로 발생한다.
+
+    Returns:
+        list: [{'text': ..., 'start': ..., 'duration': ...}, ...]
+    """
+    with tracing.span("youtube.fetch_transcript", languages=",".join(languages)) as attrs:
+        segments = _fetch_transcript(video_id, languages, page)
+        attrs["segments"] = len(segments)
+    return segments
+
+def _fetch_transcript(video_id, languages, page):
+    from youtube_transcript_api._transcripts import TranscriptList, TranscriptListFetcher
+
+    session = http_client.get_session()
+    fetcher = TranscriptListFetcher(session)
+    transcript_list = None
+    # 동의 페이지는 라이브러리가 쿠키를 만들어 다시 받아야 한다
+    if page is not None and CONSENT_FORM not in page.html:
+        try:
+            # 내부 API: requirements.txt에서 youtube_transcript_api 버전을 고정해 둔다
+            captions_json = fetcher._extract_captions_json(page.html, video_id)
+        except (AttributeError, TypeError):
+            # 라이브러리가 바뀌어 공유 페이지 경로를 못 쓴다. 조용히 끄지 않고 지표로 남긴다
+            tracing.count("transcript_shared_page_unsupported")
+        else:
+            transcript_list = TranscriptList.build(session, video_id, captions_json)
+    if transcript_list is None:
+        transcript_list = fetcher.fetch(video_id)
+    return transcript_list.find_transcript(languages).fetch()
+
+def get_transcript_segments(video_id, url, languages=TRANSCRIPT_LANGUAGES):
+    """
+    타임스탬프를 유지한 자막과 초 단위로 정규화된 챕터를 반환
+
+    Returns:
+        tuple: (Transcript, [(start_sec, title), ...])
+    """
+    # 캐시에 없을 때만 watch 페이지/자막을 받는다 (WatchPage는 필요할 때 다운로드)
+    with tracing.span("youtube.transcript") as attrs:
+        transcript = _cached_transcript(
+            video_id, lambda: fetch_transcript(video_id, languages, page=get_watch_page(url)), languages,
+        )
+        attrs["segments"] = len(transcript)
+    tracing.count("transcript_chars", len(transcript.text))
+    # 1) 공시 챕터 시도, 2) 없으면 설명에서 시도 (같은 WatchPage 재사용)
     chapters = extract_chapters_from_html(url)
-    # 2) 없으면 설명에서 시도
     if not chapters:
         chapters = extract_chapters_from_description(url)
-    print(f"Chapters: {chapters}")
+    chapters = normalize_chapters(chapters)
+    return transcript, chapters
+
+def index_transcript(video_id, transcript, chapters, title=None, channel=None, compacted=False):
+    """
+    처음 본 영상만 검색 색인에 추가 (이미 색인된 영상은 SELECT 한 번으로 끝).
+    LLM 호출 전 경로를 늦추지 않도록 자막을 넘겨준 뒤 다른 스레드(Prefetch 풀 등)에서 호출한다.
+
+    Args:
+        compacted (bool): transcript가 이미 compact_transcript를 거쳤으면 True (다시 압축하지 않음)
+    """
+    index = search_index.get_index()
+    if index is None or index.has_transcript(video_id):
+        return
+    with tracing.span("search.index_transcript"):
+        index.add_transcript(video_id, transcript, chapters, title=title, channel=channel, compact=not compacted)
+
+def get_transcript(video_id, url, languages=TRANSCRIPT_LANGUAGES):
+    # 호환용 (전체 텍스트). 검색 색인은 호출자 몫이다 (Prefetch가 transcript 단계 뒤에 따로 색인)
+    transcript, chapters = get_transcript_segments(video_id, url, languages)
+    # 롤링 캡션 중복과 [Music] 같은 표시를 지운 뒤 이어 붙인다
+    transcript, _ = compact_transcript(transcript)
+    transcript_full = transcript.text
     return transcript_full, chapters
 
 if __name__ == "__main__":
@@ -147,7 +566,7 @@ if __name__ == "__main__":
     youtube_url = sys.argv[1]
     video_id = extract_video_id(youtube_url)
     title, channel = extract_metadata(youtube_url)
-    transcript = get_transcript(video_id)
+    transcript, chapters = get_transcript(video_id, youtube_url)
     download_thumbnail(video_id)
     print(f"Title: {title}")
     print(f"Channel: {channel}")
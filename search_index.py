@@ -0,0 +1,298 @@
+# search_index.py
+"""
+처리한 모든 자막/요약에 대한 로컬 전문 검색 색인 (SQLite FTS5).
+
+- scrape_youtube.index_transcript가 자막을 (pipeline.Prefetch와 batch가 자막을 받은 뒤 풀에서 호출),
+  summarize_text(video_id=...)가 요약을 색인에 추가한다
+- 자막은 챕터 안에서 WINDOW_SECONDS 단위 구간으로 나눠 (영상, 챕터, 시작 시각) 단위로 저장
+- 챕터 제목, 영상 제목, 요약도 각각 하나의 posting
+- 한글/CJK는 형태소 분석기 없이 2-gram으로 색인한다 ("캐시를" -> "캐시 시를").
+  질의도 같은 방식으로 나눠 구(phrase) 검색을 하므로 조사가 붙어 있어도 찾는다
+
+    index = get_index()
+    index.search("캐시")  # [{"video_id", "title", "label", "start", "link", "text", ...}, ...]
+
+Usage:
+    python search_index.py "query" [--limit 20] [--kind segment]
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from cache import BUSY_TIMEOUT, DEFAULT_CACHE_DIR, _Transaction
+from compaction import compact_transcript
+from transcript import align_chapters, format_timestamp
+
+# 자막 posting 하나의 최대 길이 (초). 결과의 타임스탬프 정밀도
+WINDOW_SECONDS = 30
+
+KINDS = ("title", "chapter", "segment", "summary")
+
+_CJK = "ᄀ-ᇿ぀-ヿ㄰-㆏㐀-鿿가-힯豈-﫿"
+_TOKEN_REGEX = re.compile(rf"([{_CJK}]+)|([^\W{_CJK}]+)")
+
+_MISSING = object()
+_default_index = _MISSING
+_default_index_lock = threading.Lock()
+
+
+def tokenize(text):
+    """
+    색인/질의 공용 토큰화. 라틴 문자는 단어 단위, 한글/CJK 연속 구간은 2-gram.
+    """
+    tokens = []
+    for match in _TOKEN_REGEX.finditer(text.lower()):
+        cjk, word = match.groups()
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def build_query(query):
+    """
+    사용자 질의 -> FTS5 MATCH 식. 질의 단어마다 2-gram 구(phrase)를 만들고 AND로 묶는다.
+    한 글자 한글 단어는 그 글자로 시작하는 2-gram 접두사 검색으로 바꾼다.
+    """
+    terms = []
+    for word in query.split():
+        tokens = tokenize(word)
+        if not tokens:
+            continue
+        phrase = '"' + " ".join(token.replace('"', '""') for token in tokens) + '"'
+        if len(tokens) == 1 and len(tokens[0]) == 1 and re.match(rf"[{_CJK}]", tokens[0]):
+            phrase += "*"
+        terms.append(phrase)
+    return " AND ".join(terms)
+
+
+def video_link(video_id, start=None):
+    if start is None:
+        return f"https://www.youtube.com/watch?v={video_id}"
+    return f"https://www.youtube.com/watch?v={video_id}&t={int(start)}s"
+
+
+def _windows(transcript, chapters):
+    # (chapter_title, start, text) 구간. 구간은 챕터 경계를 넘지 않는다
+    pieces = align_chapters(transcript, chapters) or [(0.0, transcript.end, None, transcript)]
+    for _, _, title, piece in pieces:
+        window_start, texts = None, []
+        for start, text in zip(piece.starts, piece.iter_texts()):
+            if texts and start - window_start >= WINDOW_SECONDS:
+                yield title, window_start, " ".join(texts)
+                window_start, texts = None, []
+            if window_start is None:
+                window_start = start
+            texts.append(text)
+        if texts:
+            yield title, window_start, " ".join(texts)
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 검색 색인. 스레드마다 연결을 따로 쓰고 쓰기는 BEGIN IMMEDIATE로 직렬화한다.
+
+    Args:
+        path (str): SQLite 파일 경로
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    title TEXT,
+                    channel TEXT,
+                    indexed REAL NOT NULL
+                )"""
+            )
+            # body: 토큰화한 텍스트(검색용), text: 원문(표시용)
+            conn.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS postings USING fts5(
+                    body, video_id UNINDEXED, kind UNINDEXED, label UNINDEXED,
+                    start UNINDEXED, text UNINDEXED
+                )"""
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    def _insert(self, conn, rows):
+        conn.executemany(
+            "INSERT INTO postings (body, video_id, kind, label, start, text) VALUES (?, ?, ?, ?, ?, ?)",
+            ((" ".join(tokenize(text)), video_id, kind, label, start, text)
+             for video_id, kind, label, start, text in rows),
+        )
+
+    def _reader(self):
+        # 읽기는 트랜잭션 없이 (BEGIN IMMEDIATE는 쓰기 잠금을 잡아 쓰는 쪽과 줄을 서게 된다)
+        return self._connect().conn
+
+    def has_transcript(self, video_id):
+        row = self._reader().execute(
+            "SELECT 1 FROM postings WHERE video_id = ? AND kind = 'segment' LIMIT 1", (video_id,)
+        ).fetchone()
+        return row is not None
+
+    def add_transcript(self, video_id, transcript, chapters=None, title=None, channel=None, compact=True):
+        """
+        영상의 자막/챕터/제목 posting을 새로 쓴다 (같은 영상의 예전 자막 posting은 교체)
+
+        Args:
+            transcript (Transcript): 타임스탬프가 있는 자막
+            chapters (list): [(start_sec, title), ...]
+            compact (bool): 색인 전에 압축할지 여부 (이미 압축된 자막이면 False)
+        """
+        if compact:
+            transcript, _ = compact_transcript(transcript)
+        rows = []
+        if title:
+            rows.append((video_id, "title", None, None, title))
+        for start, chapter_title in chapters or []:
+            rows.append((video_id, "chapter", chapter_title, start, chapter_title))
+        for chapter_title, start, text in _windows(transcript, chapters):
+            rows.append((video_id, "segment", chapter_title, start, text))
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM postings WHERE video_id = ? AND kind IN ('title', 'chapter', 'segment')",
+                (video_id,),
+            )
+            self._insert(conn, rows)
+            conn.execute(
+                """INSERT INTO videos (video_id, title, channel, indexed) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(video_id) DO UPDATE SET
+                     title = COALESCE(excluded.title, title),
+                     channel = COALESCE(excluded.channel, channel),
+                     indexed = excluded.indexed""",
+                (video_id, title, channel, time.time()),
+            )
+        return len(rows)
+
+    def add_summary(self, video_id, summary, label=None):
+        """
+        요약 posting 추가. 같은 영상/label의 예전 요약은 교체한다.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM postings WHERE video_id = ? AND kind = 'summary' AND label IS ?",
+                (video_id, label),
+            )
+            self._insert(conn, [(video_id, "summary", label, None, summary)])
+            conn.execute(
+                "INSERT OR IGNORE INTO videos (video_id, indexed) VALUES (?, ?)", (video_id, time.time()),
+            )
+
+    def search(self, query, limit=20, kinds=None):
+        """
+        bm25 순으로 정렬된 검색 결과
+
+        Returns:
+            list: [{"video_id", "title", "channel", "kind", "label", "start", "timestamp",
+                    "link", "text", "score"}, ...]
+        """
+        match = build_query(query)
+        if not match:
+            return []
+        sql = """SELECT postings.video_id, videos.title, videos.channel, kind, label, start, text,
+                        bm25(postings) AS score
+                 FROM postings LEFT JOIN videos ON videos.video_id = postings.video_id
+                 WHERE postings MATCH ?"""
+        params = [match]
+        if kinds:
+            sql += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        rows = self._reader().execute(sql, params).fetchall()
+        return [
+            {
+                "video_id": video_id,
+                "title": title,
+                "channel": channel,
+                "kind": kind,
+                "label": label,
+                "start": start,
+                "timestamp": format_timestamp(start) if start is not None else None,
+                "link": video_link(video_id, start),
+                "text": text,
+                "score": score,
+            }
+            for video_id, title, channel, kind, label, start, text, score in rows
+        ]
+
+    def stats(self):
+        conn = self._reader()
+        videos = conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        counts = dict(conn.execute("SELECT kind, COUNT(*) FROM postings GROUP BY kind").fetchall())
+        return {"videos": videos, "postings": counts}
+
+
+def get_index():
+    """
+    기본 검색 색인 (search.sqlite3). YTS_CACHE_DISABLE=1 이거나 FTS5가 없으면 None.
+    """
+    global _default_index
+    if _default_index is _MISSING:
+        with _default_index_lock:
+            if _default_index is _MISSING:
+                if os.getenv("YTS_CACHE_DISABLE") == "1":
+                    _default_index = None
+                else:
+                    try:
+                        _default_index = SearchIndex(os.path.join(DEFAULT_CACHE_DIR, "search.sqlite3"))
+                    except sqlite3.OperationalError:  # FTS5 없이 빌드된 SQLite
+                        _default_index = None
+    return _default_index
+
+
+def set_index(index):
+    """
+    기본 검색 색인 교체. None을 넘기면 색인을 끈다.
+    """
+    global _default_index
+    with _default_index_lock:
+        _default_index = index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search indexed transcripts and summaries.")
+    parser.add_argument("query", nargs="?", help="검색어 (없으면 색인 통계 출력)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--kind", action="append", choices=KINDS, help="결과 종류 제한 (여러 번 지정 가능)")
+    args = parser.parse_args(argv)
+
+    index = get_index()
+    if index is None:
+        print("Search index is disabled.", file=sys.stderr)
+        return 1
+    if not args.query:
+        print(index.stats())
+        return 0
+    started = time.perf_counter()
+    results = index.search(args.query, limit=args.limit, kinds=args.kind)
+    for r in results:
+        where = " / ".join(part for part in (r["title"] or r["video_id"], r["label"]) if part)
+        stamp = f"[{r['timestamp']}] " if r["timestamp"] else ""
+        print(f"{stamp}{where} ({r['kind']})\n  {r['link']}\n  {r['text'][:200]}")
+    print(f"{len(results)} results in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
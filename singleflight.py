@@ -0,0 +1,381 @@
+# singleflight.py
+"""
+같은 요청(영상 ID + 단계 + 파라미터 키)이 동시에 여러 번 들어오면 한 번만 실행하고 결과를 나눈다.
+
+- 프로세스 안: 키마다 진행 중인 호출(_Flight) 하나. 나중에 온 호출자는 새로 실행하지 않고
+  그 결과를 기다린다. 스트리밍(share)은 도착한 조각을 처음부터 똑같이 받는다
+- 프로세스 사이: LeaseStore(SQLite)의 키별 lease를 가진 프로세스만 실행한다. 나머지는
+  lease가 풀릴 때까지 기다렸다가 lookup()으로 공유 캐시(디스크/요약 캐시)에서 결과를 읽는다.
+  lease는 실행 중 LEASE_SECONDS/3마다 갱신되고, 프로세스가 죽으면 LEASE_SECONDS 뒤 만료된다
+
+    value = get_group().do(key, compute, lookup)            # 동기 (스크래핑)
+    shared = get_group().share(key, produce, lookup)        # 비동기 (LLM)
+    async for part in shared: ...
+    shared.value
+
+lookup은 결과가 없으면 MISSING을 반환한다. lookup이 없으면 프로세스 안에서만 합친다.
+"""
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import cache
+import tracing
+
+MISSING = object()
+
+LEASE_SECONDS = 60
+POLL_INTERVAL = 0.05      # 다른 프로세스의 lease를 기다릴 때 첫 확인 간격 (초, 2배씩 늘어남)
+MAX_POLL_INTERVAL = 0.5
+
+DEFAULT_LEASE_DB = os.getenv("YTS_LEASE_DB", os.path.join(cache.DEFAULT_CACHE_DIR, "leases.sqlite3"))
+
+_group = None
+_group_lock = threading.Lock()
+
+
+class LeaseStore:
+    """
+    키별 lease (SQLite). 같은 파일을 쓰는 프로세스끼리 한 키를 한 번에 하나만 가진다.
+
+    Args:
+        path (str): SQLite 파일 경로
+        clock (callable): 현재 시각 (time.time — 프로세스 간에 같은 기준이어야 한다)
+    """
+
+    def __init__(self, path=DEFAULT_LEASE_DB, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )"""
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=cache.BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return cache._Transaction(conn)
+
+    def acquire(self, key, owner, ttl=LEASE_SECONDS):
+        """
+        Returns:
+            bool: lease를 얻었는지 (만료된 lease는 가져온다)
+        """
+        now = self.clock()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+            conn.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                (key, owner, now + ttl),
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+        return row[0] == owner
+
+    def renew(self, key, owner, ttl=LEASE_SECONDS):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE leases SET expires = ? WHERE key = ? AND owner = ?", (self.clock() + ttl, key, owner)
+            )
+
+    def release(self, key, owner):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def held(self, key):
+        """
+        만료되지 않은 lease가 있는지
+        """
+        row = self._connect().conn.execute(
+            "SELECT 1 FROM leases WHERE key = ? AND expires >= ?", (key, self.clock())
+        ).fetchone()
+        return row is not None
+
+
+class _Flight:
+    """
+    진행 중인 호출 하나: 도착한 조각(parts), 최종 값 또는 예외.
+    동기 대기(threading)와 비동기 대기(어느 이벤트 루프든)를 모두 지원한다.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.done = False
+        self.value = None
+        self.error = None
+        self.looked_up = False  # 다른 프로세스가 만든 결과를 lookup()으로 읽었는지
+        self._condition = threading.Condition()
+        self._waiters = []  # [(loop, asyncio.Future)]
+
+    def _notify(self):
+        # self._condition을 잡은 상태에서 호출
+        self._condition.notify_all()
+        for loop, waiter in self._waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+        self._waiters = []
+
+    def publish(self, part):
+        with self._condition:
+            self.parts.append(part)
+            self._notify()
+
+    def finish(self, value=None, error=None):
+        with self._condition:
+            self.value, self.error, self.done = value, error, True
+            self._notify()
+
+    def wait(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self.done)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    async def follow(self):
+        """
+        처음부터 모든 조각을 yield (끝나면 반환, 실패했으면 같은 예외)
+        """
+        loop = asyncio.get_running_loop()
+        seen = 0
+        while True:
+            with self._condition:
+                parts = self.parts[seen:]
+                done = self.done
+                waiter = None
+                if not parts and not done:
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+            if parts:
+                seen += len(parts)
+                for part in parts:
+                    yield part
+            elif done:
+                break
+            else:
+                await waiter
+        if self.error is not None:
+            raise self.error
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Shared:
+    """
+    Group.share()의 결과. async for로 조각을 받고, 끝나면 value에 최종 값이 있다.
+
+    Attributes:
+        role (str): leader(직접 실행) / shared(같은 프로세스의 진행 중인 호출을 기다림)
+        value: 최종 값 (다른 프로세스가 만든 결과면 lookup()의 반환값 — 조각 없이 끝난다)
+    """
+
+    def __init__(self, flight, role):
+        self.flight = flight
+        self.role = role
+
+    @property
+    def value(self):
+        return self.flight.value
+
+    @property
+    def coalesced(self):
+        """
+        이 호출자가 직접 만들지 않은 결과인지 (같은 프로세스의 다른 호출 또는 다른 프로세스)
+        """
+        return self.role == "shared" or self.flight.looked_up
+
+    def __aiter__(self):
+        return self.flight.follow()
+
+    async def result(self):
+        async for _ in self:
+            pass
+        return self.value
+
+
+class Group:
+    """
+    키별 호출 합치기.
+
+    Args:
+        leases (LeaseStore, optional): 있으면 프로세스 사이에서도 합친다
+        lease_seconds (float): lease 만료 시간
+        poll_interval (float): 다른 프로세스의 lease를 기다릴 때 첫 확인 간격
+    """
+
+    def __init__(self, leases=None, lease_seconds=LEASE_SECONDS, poll_interval=POLL_INTERVAL):
+        self.leases = leases
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._flights = {}
+        self._lock = threading.Lock()
+        # 이벤트 루프는 태스크를 약한 참조로만 들고 있으므로, 리더 태스크가 끝날 때까지 여기서 잡아 둔다
+        self._tasks = set()
+
+    @property
+    def owner(self):
+        # fork한 자식 프로세스는 다른 owner가 되도록 호출할 때마다 pid를 읽는다
+        return f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+
+    def _join(self, key):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _leave(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def _keep_alive(self, key, owner, stop):
+        while not stop.wait(self.lease_seconds / 3):
+            self.leases.renew(key, owner, self.lease_seconds)
+
+    def _acquire(self, key, lookup):
+        """
+        lease를 얻을 때까지 기다린다. 기다리는 동안 다른 프로세스가 결과를 만들었으면 그 값을 반환.
+
+        Returns:
+            tuple: (value | MISSING, owner | None) — owner가 있으면 lease를 가진 상태
+        """
+        owner = self.owner
+        delay = self.poll_interval
+        waited = False
+        while True:
+            if self.leases.acquire(key, owner, self.lease_seconds):
+                # lease를 얻기 직전에 다른 프로세스가 끝냈을 수 있다
+                value = lookup() if waited else MISSING
+                if value is not MISSING:
+                    self.leases.release(key, owner)
+                    return value, None
+                return MISSING, owner
+            if not waited:
+                tracing.count("singleflight", role="remote")
+                waited = True
+            while self.leases.held(key):
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_POLL_INTERVAL)
+            value = lookup()
+            if value is not MISSING:
+                return value, None
+
+    def _leased(self, key, lookup):
+        # (value, owner, stop): lease가 필요 없거나 이미 결과가 있으면 owner는 None
+        if self.leases is None or lookup is None:
+            return MISSING, None, None
+        value, owner = self._acquire(key, lookup)
+        if owner is None:
+            return value, None, None
+        stop = threading.Event()
+        threading.Thread(target=self._keep_alive, args=(key, owner, stop), daemon=True).start()
+        return MISSING, owner, stop
+
+    def _release(self, key, owner, stop):
+        if owner is not None:
+            stop.set()
+            self.leases.release(key, owner)
+
+    def do(self, key, compute, lookup=None):
+        """
+        compute()를 키당 한 번만 실행 (동기). compute는 결과를 lookup이 읽는 공유 캐시에 저장해야
+        다른 프로세스가 그 결과를 받는다.
+
+        Returns:
+            compute() 또는 lookup()의 결과
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            tracing.count("singleflight", role="shared")
+            return flight.wait()
+        try:
+            value, owner, stop = self._leased(key, lookup)
+            try:
+                if value is MISSING:
+                    value = compute()
+            finally:
+                self._release(key, owner, stop)
+        except BaseException as e:
+            flight.finish(error=e)
+            raise
+        else:
+            flight.finish(value)
+            return value
+        finally:
+            self._leave(key, flight)
+
+    def share(self, key, produce, lookup=None):
+        """
+        비동기 버전 (실행 중인 이벤트 루프 안에서 호출).
+        produce(publish)는 조각마다 publish(part)를 부르고 최종 값을 반환하는 코루틴 함수.
+        리더의 실행은 별도 태스크라서, 먼저 온 호출자가 스트림을 중간에 닫아도
+        기다리는 다른 호출자를 위해 끝까지 실행된다.
+
+        Returns:
+            Shared
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            tracing.count("singleflight", role="shared")
+            return Shared(flight, "shared")
+        task = asyncio.ensure_future(self._lead(key, flight, produce, lookup))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return Shared(flight, "leader")
+
+    async def _lead(self, key, flight, produce, lookup):
+        try:
+            value, owner, stop = await asyncio.to_thread(self._leased, key, lookup)
+            flight.looked_up = value is not MISSING
+            try:
+                if value is MISSING:
+                    value = await produce(flight.publish)
+            finally:
+                await asyncio.to_thread(self._release, key, owner, stop)
+        except BaseException as e:
+            flight.finish(error=e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            flight.finish(value)
+        finally:
+            self._leave(key, flight)
+
+
+def get_group():
+    """
+    기본 Group. 디스크 캐시가 켜져 있으면 프로세스 사이에서도 합친다 (DEFAULT_LEASE_DB)
+    """
+    global _group
+    if _group is None:
+        with _group_lock:
+            if _group is None:
+                leases = None if os.getenv("YTS_CACHE_DISABLE") == "1" else LeaseStore()
+                _group = Group(leases)
+    return _group
+
+
+def set_group(group):
+    global _group
+    with _group_lock:
+        _group = group
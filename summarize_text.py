@@ -1,9 +1,19 @@
 # summarize_text.py
-import os
-import anthropic
+import json
+import time
+import asyncio
+import hashlib
 import re
-import openai
-import google.generativeai as genai
+import cache
+import extractive
+import hedging
+import providers
+import search_index
+import singleflight
+import tracing
+from providers import MODELS, SAMPLING_PARAMS, Prompt
+from chunking import CHUNK_TOKENS, estimate_tokens, input_budget, split_text
+from transcript import Transcript, align_chapters, format_timestamp, parse_timestamp
 
 def clean_and_split_title(title):
     """
@@ -23,6 +33,47 @@ def clean_and_split_title(title):
     
     return topics
 
+def format_chapter(chapter):
+    """
+    (start_sec, title) -> "[M:SS] title", 문자열은 그대로
+    """
+    if isinstance(chapter, (list, tuple)) and len(chapter) == 2:
+        start, title = chapter
+        try:
+            return f"[{format_timestamp(parse_timestamp(start))}] {title}"
+        except ValueError:
+            return f"{start} {title}"
+    return str(chapter)
+
+# 모든 모드가 같은 앞부분(지시 + 자막)으로 시작하고 모드/언어/챕터는 뒤에 붙인다.
+# 같은 영상을 다른 언어나 모드로 다시 요약해도 공급자 프롬프트 캐시
+# (Anthropic cache_control, OpenAI 자동 prefix 캐시, Gemini cached content)에서 앞부분을 읽는다.
+SYSTEM_INSTRUCTIONS = """You are an expert analyst of video transcripts.
+The text below is in its original language. Read all of it carefully;
+the task, the topics to cover and the output language are given after the text.
+"""
+
+
+def transcript_prefix(text):
+    """
+    프롬프트의 캐시 가능한 앞부분: 모드/언어와 무관한 지시 + 자막
+    """
+    return f"""{SYSTEM_INSTRUCTIONS}
+Text to analyze:
+\"\"\"{text}\"\"\"
+"""
+
+
+FORMAT_NOTE = """
+Note: Focus on extracting meaningful connections and context for each topic while maintaining the relationship between topics where relevant. 
+Take ample time to thoroughly analyze the text, ensuring a nuanced and comprehensive understanding.
+- If it helps clarity, feel free to use:
+  - Emojis to highlight key ideas
+  - Simple tables to compare points or summarize data
+  - ASCII-based diagrams or flowcharts (textual graphs) for conceptual relationships
+"""
+
+
 def prompt_syukaworld(text, lang='en', title=None):
     """
     Example prompt that uses 'title' to split into multiple topics (if possible)
@@ -38,11 +89,10 @@ Analyze the following topics from the title:
 
 For each topic mentioned in the title, provide analysis in the format below:
 """
-    prompt = f"""
-The following text is in its original language. Provide the output in this language: {lang}.
-
+    suffix = f"""
+Task: Provide the output in this language: {lang}.
 {title_instruction}
-For each topic, analyze the input text and provide the output in the following structure:
+For each topic, analyze the text above and provide the output in the following structure:
 
 1. Detailed Explanation:
    - Provide a detailed and thorough explanation of the topic
@@ -60,18 +110,8 @@ For each topic, analyze the input text and provide the output in the following s
 
 4. Overall Summary:
    - Summarize the topic in a concise, high-level overview that captures the essence of the discussion
-
-Note: Focus on extracting meaningful connections and context for each topic while maintaining the relationship between topics where relevant. 
-Take ample time to thoroughly analyze the input text, ensuring a nuanced and comprehensive understanding.
-- If it helps clarity, feel free to use:
-  - Emojis to highlight key ideas
-  - Simple tables to compare points or summarize data
-  - ASCII-based diagrams or flowcharts (textual graphs) for conceptual relationships
-
-Input text:
-{text}
-"""
-    return prompt
+{FORMAT_NOTE}"""
+    return Prompt(transcript_prefix(text), suffix)
 
 def make_summary_prompt(transcript, chapters=None, video_title=None, lang='en'):
     """
@@ -91,10 +131,10 @@ def make_summary_prompt(transcript, chapters=None, video_title=None, lang='en'):
     if chapters and len(chapters) > 0:
         # 챕터가 있을 때: 챕터 목록을 그대로 토픽으로 활용
         topic_instruction = "\n".join(
-            f"- {idx+1}. {chapter}" for idx, chapter in enumerate(chapters)
+            f"- {idx+1}. {format_chapter(chapter)}" for idx, chapter in enumerate(chapters)
         )
-        prompt = f"""
-You are provided with the following text. Please analyze it and produce a summary in {lang}.
+        suffix = f"""
+Task: Please analyze the text above and produce a summary in {lang}.
 
 We have identified the following Chapters (topics):
 {topic_instruction}
@@ -115,17 +155,7 @@ For each chapter listed above, analyze the content of the text and provide the f
 
 4. Overall Summary:
    - A concise, high-level overview capturing the essence of the chapter
-
-Note: Focus on extracting meaningful connections and context for each topic while maintaining the relationship between topics where relevant. 
-Take ample time to thoroughly analyze the input text, ensuring a nuanced and comprehensive understanding.
-- If it helps clarity, feel free to use:
-  - Emojis to highlight key ideas
-  - Simple tables to compare points or summarize data
-  - ASCII-based diagrams or flowcharts (textual graphs) for conceptual relationships
-
-Text to analyze:
-\"\"\"{transcript}\"\"\"
-"""
+{FORMAT_NOTE}"""
     else:
         # 챕터가 없을 때: title/내용 분석을 통해 토픽을 유추
         title_instruction = (
@@ -133,8 +163,8 @@ Text to analyze:
             if video_title
             else "No explicit title is provided.\n"
         )
-        prompt = f"""
-You are provided with the following text. Please analyze it and produce a summary in {lang}.
+        suffix = f"""
+Task: Please analyze the text above and produce a summary in {lang}.
 
 {title_instruction}
 No Chapters were found. 
@@ -155,18 +185,8 @@ Then, for each identified topic, provide:
 
 4. Overall Summary:
    - A concise, high-level overview capturing the essence of the topic
-
-Note: Focus on extracting meaningful connections and context for each topic while maintaining the relationship between topics where relevant. 
-Take ample time to thoroughly analyze the input text, ensuring a nuanced and comprehensive understanding.
-- If it helps clarity, feel free to use:
-  - Emojis to highlight key ideas
-  - Simple tables to compare points or summarize data
-  - ASCII-based diagrams or flowcharts (textual graphs) for conceptual relationships
-
-Text to analyze:
-\"\"\"{transcript}\"\"\"
-"""
-    return prompt
+{FORMAT_NOTE}"""
+    return Prompt(transcript_prefix(transcript), suffix)
 def detailed_prompt(transcript, chapters=None, video_title=None, lang='en'):
     """
     Make a prompt for a detailed summary of a YouTube transcript (or any text),
@@ -176,14 +196,18 @@ def detailed_prompt(transcript, chapters=None, video_title=None, lang='en'):
     If `chapters` is None or empty, we do a general overall summary plus additional analysis.
     """
 
+    # 스크래퍼가 찾은 챕터 리스트도 받을 수 있도록 문자열로 변환
+    if isinstance(chapters, (list, tuple)):
+        chapters = '\n'.join(format_chapter(ch) for ch in chapters)
+
     # chapters를 문자열로 받았다고 가정하고, 유효한지 체크
     if chapters and chapters.strip(): 
         # 문자열을 \n로 분리하여 리스트화
         chapter_list = chapters.split('\n')
 
         # 챕터 기반 상세 요약
-        prompt = f"""
-You are provided with the following text. Please analyze it and produce a **detailed summary** in {lang}.
+        suffix = f"""
+Task: Please analyze the text above and produce a **detailed summary** in {lang}.
 
 **Step 1: Overall Summary (First Paragraph)**  
    Please provide a concise yet comprehensive overview of the entire text **before** diving into each chapter.
@@ -211,19 +235,16 @@ For **each chapter** listed above, please detail:
 
 **Note**  
 - Focus on extracting meaningful connections and context for each chapter while maintaining relationships among topics.  
-- Take ample time to thoroughly analyze the input text to ensure a nuanced and comprehensive understanding.
+- Take ample time to thoroughly analyze the text to ensure a nuanced and comprehensive understanding.
 - If it helps clarity, feel free to use:
   - Emojis to highlight key ideas
   - Simple tables to compare points or summarize data
   - ASCII-based diagrams or flowcharts (textual graphs) for conceptual relationships
-
-**Text to analyze**:  
-\"\"\"{transcript}\"\"\"
 """
     else:
         # chapters가 없거나 빈 문자열인 경우: 전체 요약 + 추가 분석
-        prompt = f"""
-You are provided with the following text. Please analyze it and produce a **detailed summary** in {lang}.
+        suffix = f"""
+Task: Please analyze the text above and produce a **detailed summary** in {lang}.
 
 **Step 1: Overall Summary (First Paragraph)**  
    First, provide an overarching summary that captures the main points of the entire text.
@@ -237,55 +258,47 @@ You are provided with the following text. Please analyze it and produce a **deta
 **Note**     
 - You may structure your analysis however it fits best, but ensure clarity and depth.
 - Focus on extracting meaningful connections and context for each chapter while maintaining relationships among topics.  
-- Take ample time to thoroughly analyze the input text to ensure a nuanced and comprehensive understanding.
+- Take ample time to thoroughly analyze the text to ensure a nuanced and comprehensive understanding.
 - If it helps clarity, feel free to use:
   - Emojis to highlight key ideas
   - Simple tables to compare points or summarize data
   - ASCII-based diagrams or flowcharts (textual graphs) for conceptual relationships
-
-**Text to analyze**:  
-\"\"\"{transcript}\"\"\"
 """
 
-    return prompt
+    return Prompt(transcript_prefix(transcript), suffix)
     
 
-def summarize_text(
-    text,              # 분석할 텍스트(예: 전체 자막)
-    lang='en',         # 요약 결과 언어
-    title=None,        # 영상 제목(또는 다른 제목)
-    chapters=None,     # 인식된 챕터 목록 (있다면 리스트로, 없으면 None)
-    api_choice='Anthropic', # 사용할 API 종류
-    summarize_way='Summary' # 요약 방식 (예: 'Chapters' vs. 'Title' 등)
-):
-    # Claude API 키 환경 변수에서 가져오기
-    if api_choice == 'Anthropic':
-        client = anthropic.Client(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    elif api_choice == 'OpenAI':
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    elif api_choice == 'Gemini':
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    elif api_choice == 'x.ai':  
-        client = openai.OpenAI(
-            api_key=os.getenv("XAI_API_KEY"),
-            base_url="https://api.x.ai/v1"
-        )
-    else:
-        raise ValueError(f"Invalid API choice: {api_choice}")
+# map 단계에서 동시에 보내는 청크 요청 수
+MAP_MAX_WORKERS = 4
 
+# map 단계를 반복하는 최대 횟수. 메모가 줄지 않는 모델(입력을 그대로 돌려주는 등)에서 호출이 끝없이 늘지 않도록
+MAP_MAX_ROUNDS = 3
 
-    
-    # 2) Prompt 결정
+# Chapters 모드에서 동시에 보내는 챕터 요청 수
+CHAPTER_MAX_WORKERS = 4
+
+
+def build_prompt(text, lang='en', title=None, chapters=None, summarize_way='Summary'):
+    """
+    summarize_way에 맞는 프롬프트 템플릿을 골라 렌더링한다.
+    """
+    with tracing.span("prompt.build", way=summarize_way) as attrs:
+        prompt = _render_prompt(text, lang, title, chapters, summarize_way)
+        attrs["chars"] = len(prompt)
+    return prompt
+
+
+def _render_prompt(text, lang, title, chapters, summarize_way):
     if summarize_way == 'Chapters' and chapters:  
         # 챕터 기준 요약
-        prompt = make_summary_prompt(
+        return make_summary_prompt(
             transcript=text,
             chapters=chapters,
             video_title=title,
             lang=lang
         )
     elif summarize_way == 'Detailed':
-        prompt = detailed_prompt(
+        return detailed_prompt(
             transcript=text,
             chapters=chapters,
             video_title=title,
@@ -293,71 +306,535 @@ def summarize_text(
         )
     else:
         # title을 이용하는 syukaworld 방식
-        prompt = prompt_syukaworld(
+        return prompt_syukaworld(
             text=text,
             lang=lang,
             title=title
         )
-    
-    # if Anthropic API
-    if api_choice == 'Anthropic':
-        response = client.completions.create(
-            prompt=f"{anthropic.HUMAN_PROMPT}{prompt}{anthropic.AI_PROMPT}",
-            model="claude-3-5-haiku-20241022",
-            max_tokens_to_sample=2000,
-            temperature=0.5
-        )
-        summary_text = response['completion']
-    #     response = client.messages.create(
-    #         model="claude-3-5-haiku-20241022",
-    #         max_tokens=8000,
-    #     messages=[{
-    #         "role": "user",
-    #         "content": prompt
-    #     }]
-    # )
-        # response = response.content[0].text
-    
-    # if OpenAI API
-    elif api_choice == 'OpenAI':
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
+
+
+def summary_cache_key(prompt, api_choice):
+    """
+    렌더링된 프롬프트 + 공급자/모델/샘플링 파라미터의 SHA-256.
+    템플릿이 바뀌면 렌더링 결과가 달라지므로 해당 항목은 자동으로 무효화된다.
+    """
+    payload = json.dumps({
+        "prompt": prompt,
+        "provider": api_choice,
+        "model": MODELS.get(api_choice),
+        "params": SAMPLING_PARAMS.get(api_choice),
+    }, sort_keys=True, ensure_ascii=False)
+    return "summary:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def call_provider_async(api_choice, prompt, info=None):
+    """
+    선택한 API로 프롬프트 하나를 보내고 요약 텍스트를 반환 (공유 비동기 클라이언트 사용).
+    api_choice가 hedging.FASTEST면 hedged request + failover (info에 이긴 공급자 등이 채워짐)
+    """
+    if api_choice == hedging.FASTEST:
+        with tracing.span("llm.hedge") as attrs:
+            summary_text, info = await hedging.complete_fastest(prompt, info=info)
+            attrs.update(provider=info["provider"], attempts=len(info["attempts"]))
+        return summary_text
+    return await hedging.track(api_choice, providers.complete(api_choice, prompt))
+
+
+def call_provider(api_choice, prompt):
+    return providers.run(call_provider_async(api_choice, prompt))
+
+
+async def _lookup(summary_cache, key):
+    if summary_cache is None:
+        return None
+    with tracing.span("cache.lookup") as attrs:
+        entry = await asyncio.to_thread(summary_cache.get, key)
+        attrs["hit"] = entry is not None
+    return entry
+
+
+async def _fresh(prompt, api_choice, summary_cache, key, publish=None):
+    """
+    공급자를 호출하고 결과를 요약 캐시에 저장한다 (singleflight 리더만 실행).
+    publish가 있으면 스트리밍 API로 받아 조각마다 publish(delta)
+
+    Returns:
+        dict: 캐시 항목 {"text", "provider", "model", "stored_at"} (+ Fastest면 "hedge")
+    """
+    info = {}
+    if publish is None:
+        summary_text = await call_provider_async(api_choice, prompt, info)
+    else:
+        if api_choice == hedging.FASTEST:
+            deltas = hedging.stream_fastest(prompt, info=info)
+        else:
+            deltas = providers.stream(api_choice, prompt)
+        parts = []
+        async for delta in deltas:
+            parts.append(delta)
+            publish(delta)
+        summary_text = "".join(parts)
+    provider = info.get("provider") or api_choice
+    entry = {"text": summary_text, "provider": provider, "model": MODELS[provider], "stored_at": time.time()}
+    if summary_cache is not None:
+        await asyncio.to_thread(summary_cache.set, key, entry)
+    return dict(entry, hedge=info) if info else entry
+
+
+def _share(prompt, api_choice, use_cache, summary_cache, key, stream=False):
+    # 같은 프롬프트/공급자의 동시 요청은 LLM 호출 한 번으로 합친다 (다른 세션, 요약 캐시를 공유하는 프로세스)
+    lookup = None
+    if summary_cache is not None:
+        lookup = lambda: summary_cache.get(key, singleflight.MISSING)
+    return singleflight.get_group().share(
+        key if use_cache else key + ":fresh",
+        lambda publish: _fresh(prompt, api_choice, summary_cache, key, publish if stream else None),
+        lookup,
+    )
+
+
+def _fresh_metadata(key, entry, shared):
+    metadata = {"cached": False, "cache_key": key, "stored_at": None,
+                "provider": entry["provider"], "model": entry["model"]}
+    if entry.get("hedge"):
+        metadata["hedge"] = entry["hedge"]
+    if shared.coalesced:
+        metadata["coalesced"] = True
+    return metadata
+
+
+async def complete_async(prompt, api_choice, use_cache=True):
+    """
+    프롬프트 하나를 요약 캐시를 거쳐 API로 보낸다.
+
+    Returns:
+        tuple: (summary_text, {"cached": bool, "cache_key": str, "stored_at": float | None,
+                               "provider": 실제로 응답한 공급자, "model": str,
+                               "coalesced": 동시에 진행 중이던 같은 요청의 결과를 받았으면 True})
+    """
+    summary_cache = cache.get_summary_cache() if use_cache else None
+    key = summary_cache_key(prompt, api_choice)
+    entry = await _lookup(summary_cache, key)
+    if entry is not None:
+        return entry["text"], {"cached": True, "cache_key": key, "stored_at": entry["stored_at"],
+                               "provider": entry["provider"], "model": entry["model"]}
+
+    shared = _share(prompt, api_choice, use_cache, summary_cache, key)
+    entry = await shared.result()
+    return entry["text"], _fresh_metadata(key, entry, shared)
+
+
+def complete(prompt, api_choice, use_cache=True):
+    return providers.run(complete_async(prompt, api_choice, use_cache))
+
+
+async def _bounded(semaphore, coro):
+    async with semaphore:
+        return await coro
+
+
+async def _gather_bounded(coros, limit):
+    # 순서를 유지하면서 동시에 limit개까지만 실행
+    semaphore = asyncio.Semaphore(limit)
+    return await asyncio.gather(*(_bounded(semaphore, c) for c in coros))
+
+
+def chunk_prompt(chunk, index, total, lang='en', title=None):
+    """
+    map 단계: 긴 자막의 한 부분을 reduce 단계 입력으로 쓸 메모로 압축하는 프롬프트
+    """
+    title_line = f'The video title is: "{title}".\n' if title else ""
+    suffix = f"""
+Task: The text above is part {index + 1} of {total} of a long video transcript.
+{title_line}
+Write dense notes in {lang} that preserve, in order:
+- every topic or section discussed in this part
+- key facts, numbers, names, arguments and notable quotes
+- background or context the speaker gives
+
+Do not add an introduction or conclusion; these notes will be merged with the notes for the other parts.
+"""
+    return Prompt(transcript_prefix(chunk), suffix)
+
+
+async def map_phase_async(
+    text,
+    lang='en',
+    title=None,
+    chapters=None,
+    api_choice='Anthropic',
+    summarize_way='Summary',
+    use_cache=True,
+    chunk_tokens=None,
+    max_workers=MAP_MAX_WORKERS,
+):
+    """
+    map 단계: 자막을 chunk_tokens(기본: min(CHUNK_TOKENS, 예산의 절반)) 이하로 나눠 청크별 메모를
+    동시에(max_workers) 생성하고, 메모를 넣은 reduce 프롬프트를 만든다.
+    청크 요약은 각각 요약 캐시에 저장되므로 reduce가 실패해도 재시도 시 map은 다시 하지 않는다.
+    메모도 예산을 넘으면 같은 방식으로 한 번 더 접는다 (MAP_MAX_ROUNDS번까지).
+    그래도 넘거나 메모가 줄지 않으면 청크 메모마다 같은 몫만 남기고 잘라 예산에 맞춘다.
+
+    Returns:
+        tuple: (reduce_prompt, {"map_reduce": True, "chunks": ..., "chunks_cached": ...,
+                                "map_rounds": ..., "notes_truncated": bool})
+    """
+    budget = input_budget(api_choice)
+    if chunk_tokens is None:
+        chunk_tokens = min(CHUNK_TOKENS, budget // 2)
+    notes = text
+    chunk_count = 0
+    map_cached = 0
+    rounds = 0
+    truncated = False
+    while True:
+        rounds += 1
+        before = estimate_tokens(notes)
+        chunks = split_text(notes, chunk_tokens)
+        chunk_count += len(chunks)
+        with tracing.span("summary.map", chunks=len(chunks)):
+            results = await _gather_bounded(
+                [complete_async(chunk_prompt(chunk, i, len(chunks), lang, title), api_choice, use_cache)
+                 for i, chunk in enumerate(chunks)],
+                max_workers,
+            )
+        map_cached += sum(1 for _, meta in results if meta["cached"])
+        notes = "\n\n".join(summary for summary, _ in results)
+        prompt = build_prompt(notes, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way)
+        if estimate_tokens(prompt) <= budget or len(chunks) == 1:
+            break
+        if rounds >= MAP_MAX_ROUNDS or estimate_tokens(notes) >= before:
+            # 더 접어도 줄지 않는다: 앞부분만 남기지 않도록 청크 메모마다 같은 몫으로 자른다
+            overhead = estimate_tokens(prompt) - estimate_tokens(notes)
+            share = max(1, (budget - overhead) // len(results) - 1)
+            notes = "\n\n".join(split_text(summary, share)[0] if summary.strip() else "" for summary, _ in results)
+            prompt = build_prompt(notes, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way)
+            truncated = True
+            break
+    return prompt, {"map_reduce": True, "chunks": chunk_count, "chunks_cached": map_cached,
+                    "map_rounds": rounds, "notes_truncated": truncated}
+
+
+async def summarize_map_reduce_async(text, api_choice='Anthropic', use_cache=True, **kwargs):
+    """
+    컨텍스트 윈도를 넘는 자막 요약: map_phase_async로 만든 메모를
+    기존 프롬프트(build_prompt)에 자막 대신 넣어 reduce 한다.
+
+    Returns:
+        tuple: (summary_text, metadata)
+    """
+    prompt, map_meta = await map_phase_async(text, api_choice=api_choice, use_cache=use_cache, **kwargs)
+    summary_text, metadata = await complete_async(prompt, api_choice, use_cache)
+    metadata.update(map_meta)
+    return summary_text, metadata
+
+
+def summarize_map_reduce(text, **kwargs):
+    return providers.run(summarize_map_reduce_async(text, **kwargs))
+
+
+async def _summarize_chapter_async(piece, start, chapter_title, lang, title, api_choice, use_cache):
+    prompt = make_summary_prompt(
+        transcript=piece.text,
+        chapters=[(start, chapter_title)],
+        video_title=title,
+        lang=lang,
+    )
+    if estimate_tokens(prompt) > input_budget(api_choice):
+        return await summarize_map_reduce_async(
+            piece.text, lang=lang, title=title, chapters=[(start, chapter_title)],
+            api_choice=api_choice, summarize_way='Chapters', use_cache=use_cache,
         )
-        summary_text = response.choices[0].message.content
-    
-    # if Gemini API
-    elif api_choice == 'Gemini':
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        messages = [
-            {'role':'user',
-             'parts': prompt}
-        ]
-        summary_text = model.generate_content(messages).text
-    
-    # if x.ai API
-    elif api_choice == 'x.ai':
-        response = client.chat.completions.create(
-            model="grok-2-latest",
-            messages=[
-            { 
-                "role": "system",
-                "content": "You are a helpful assistant that summarizes text."
-            },
-            { 
-                "role": "user",
-                "content": prompt
-            }],
-            stream = False
+    return await complete_async(prompt, api_choice, use_cache)
+
+
+def _chapter_jobs(transcript, chapters, lang, title, api_choice, use_cache):
+    """
+    챕터마다 (markdown 제목, 요약 코루틴) 쌍을 만든다. 자막이 없는 챕터는 건너뛴다.
+    """
+    jobs = []
+    for start, end, chapter_title, piece in align_chapters(transcript, chapters):
+        if not len(piece):
+            continue
+        header = f"### [{format_timestamp(start)} - {format_timestamp(end)}] {chapter_title}"
+        jobs.append((header, _summarize_chapter_async(
+            piece, start, chapter_title, lang, title, api_choice, use_cache,
+        )))
+    return jobs
+
+
+async def summarize_chapters_async(
+    transcript,
+    chapters,
+    lang='en',
+    title=None,
+    api_choice='Anthropic',
+    use_cache=True,
+    max_workers=CHAPTER_MAX_WORKERS,
+):
+    """
+    챕터별 요약. 자막을 챕터 시작 시각 기준으로 잘라(align_chapters)
+    챕터마다 독립된 프롬프트를 만들어 동시에(max_workers) 요청한다.
+
+    Args:
+        transcript (Transcript): 타임스탬프가 있는 자막
+        chapters (list): [(start, title), ...] (start는 초 또는 "H:MM:SS")
+
+    Returns:
+        tuple: (챕터 요약을 이어 붙인 markdown, metadata)
+    """
+    jobs = _chapter_jobs(transcript, chapters, lang, title, api_choice, use_cache)
+    with tracing.span("summary.chapters", chapters=len(jobs)):
+        results = await _gather_bounded([coro for _, coro in jobs], max_workers)
+
+    sections = [f"{header}\n\n{summary}" for (header, _), (summary, _) in zip(jobs, results)]
+    metadata = {
+        "cached": bool(results) and all(meta["cached"] for _, meta in results),
+        "per_chapter": True,
+        "chapters": len(jobs),
+        "chapters_cached": sum(1 for _, meta in results if meta["cached"]),
+    }
+    return "\n\n".join(sections), metadata
+
+
+def summarize_chapters(transcript, chapters, **kwargs):
+    return providers.run(summarize_chapters_async(transcript, chapters, **kwargs))
+
+
+async def summarize_text_async(
+    text,
+    lang='en',
+    title=None,
+    chapters=None,
+    api_choice='Anthropic',
+    summarize_way='Summary',
+    use_cache=True,
+    video_id=None,
+    extractive_budget=None,
+):
+    """
+    summarize_text의 비동기 버전. 한 이벤트 루프에서 여러 요약을 동시에 실행할 수 있다:
+
+        results = await asyncio.gather(
+            summarize_text_async(t1, api_choice='OpenAI'),
+            summarize_text_async(t2, api_choice='Gemini'),
         )
-        summary_text = response.choices[0].message.content
 
-    print(summary_text)
+    Args:
+        video_id (str, optional): 주면 요약을 검색 색인(search_index)에 추가한다
+        extractive_budget (int, optional): 주면 자막이 이 토큰 수보다 길 때 로컬 추출 요약
+            (extractive.extract)으로 먼저 줄인다. metadata["extractive"]에 압축 비율 등
+
+    Returns:
+        tuple: (summary_text, metadata)
+    """
+    hedging.check_api_choice(api_choice)
+
+    with tracing.span("summarize", provider=api_choice, way=summarize_way) as attrs:
+        extraction = None
+        if extractive_budget:
+            text, extraction = await _extract(text, chapters, extractive_budget)
+        # 1) 타임스탬프가 있는 자막 + 챕터 모드면 챕터별로 나눠 병렬 요약
+        if isinstance(text, Transcript) and summarize_way == 'Chapters' and chapters and not isinstance(chapters, str):
+            summary_text, metadata = await summarize_chapters_async(
+                text, chapters, lang=lang, title=title, api_choice=api_choice, use_cache=use_cache,
+            )
+        else:
+            if isinstance(text, Transcript):
+                text = text.text
+
+            # 2) Prompt 결정
+            prompt = build_prompt(text, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way)
+
+            # 3) 컨텍스트 윈도를 넘으면 map-reduce, 아니면 한 번에 (같은 프롬프트/모델 요약은 캐시 재사용)
+            if estimate_tokens(prompt) > input_budget(api_choice):
+                summary_text, metadata = await summarize_map_reduce_async(
+                    text, lang=lang, title=title, chapters=chapters, api_choice=api_choice,
+                    summarize_way=summarize_way, use_cache=use_cache,
+                )
+            else:
+                summary_text, metadata = await complete_async(prompt, api_choice, use_cache)
+        attrs["cached"] = metadata["cached"]
+    if extraction is not None:
+        metadata["extractive"] = extraction
+    metadata.setdefault("provider", api_choice)
+    metadata.setdefault("model", MODELS.get(api_choice))
+    await _index_summary(video_id, summary_text, api_choice, summarize_way, lang)
+    return summary_text, metadata
+
+
+async def _extract(text, chapters, budget):
+    # CPU 작업이라 공용 이벤트 루프를 막지 않도록 스레드에서 (예산 안이면 원본 그대로)
+    return await asyncio.to_thread(extractive.extract, text, budget, chapters)
+
+
+async def _index_summary(video_id, summary_text, api_choice, summarize_way, lang):
+    # 같은 영상/공급자/방식/언어의 요약은 검색 색인에서 교체된다
+    index = search_index.get_index()
+    if index is None or not video_id or not summary_text:
+        return
+    label = f"{api_choice} · {summarize_way} · {lang}"
+    with tracing.span("search.index_summary"):
+        await asyncio.to_thread(index.add_summary, video_id, summary_text, label)
+
+
+def summarize_text(
+    text,              # 분석할 텍스트(예: 전체 자막, 또는 타임스탬프가 있는 Transcript)
+    lang='en',         # 요약 결과 언어
+    title=None,        # 영상 제목(또는 다른 제목)
+    chapters=None,     # 인식된 챕터 목록 (있다면 리스트로, 없으면 None)
+    api_choice='Anthropic', # 사용할 API 종류
+    summarize_way='Summary', # 요약 방식 (예: 'Chapters' vs. 'Title' 등)
+    use_cache=True,    # False면 요약 캐시를 건너뛰고 항상 API 호출
+    return_metadata=False, # True면 (summary, {"cached": ..., ...}) 반환
+    video_id=None,     # 주면 요약을 검색 색인에 추가
+    extractive_budget=None, # 주면 긴 자막을 이 토큰 수까지 로컬 추출 요약으로 먼저 줄임
+):
+    # 공용 백그라운드 이벤트 루프에서 summarize_text_async 실행
+    summary_text, metadata = providers.run(summarize_text_async(
+        text, lang=lang, title=title, chapters=chapters, api_choice=api_choice,
+        summarize_way=summarize_way, use_cache=use_cache, video_id=video_id,
+        extractive_budget=extractive_budget,
+    ))
+
+    if return_metadata:
+        return summary_text, metadata
     return summary_text
 
+async def stream_prompt_async(prompt, api_choice, use_cache=True, stats=None):
+    """
+    프롬프트 하나를 요약 캐시를 거쳐 스트리밍하는 비동기 제너레이터 (complete_async의 스트리밍 버전)
+
+    캐시에 있으면 한 번에, 없으면 공급자 스트림을 그대로 흘려보내고 끝나면 캐시에 저장.
+    같은 요청이 진행 중이면 그 스트림을 처음부터 같이 받는다
+
+    Args:
+        stats (dict, optional): cached, provider, model, hedge, coalesced가 채워진다
+    """
+    stats = {} if stats is None else stats
+    summary_cache = cache.get_summary_cache() if use_cache else None
+    key = summary_cache_key(prompt, api_choice)
+    entry = await _lookup(summary_cache, key)
+    if entry is not None:
+        stats.update(cached=True, provider=entry["provider"], model=entry["model"])
+        yield entry["text"]
+        return
+
+    shared = _share(prompt, api_choice, use_cache, summary_cache, key, stream=True)
+    streamed = False
+    async for delta in shared:
+        streamed = True
+        yield delta
+    entry = shared.value
+    if not streamed and entry["text"]:
+        # 다른 프로세스가 만든 결과 (조각 없이 캐시에서 읽음)
+        yield entry["text"]
+    metadata = _fresh_metadata(key, entry, shared)
+    stats.update((name, metadata[name]) for name in ("provider", "model", "hedge", "coalesced") if name in metadata)
+
+
+async def summarize_text_stream_async(
+    text,
+    lang='en',
+    title=None,
+    chapters=None,
+    api_choice='Anthropic',
+    summarize_way='Summary',
+    use_cache=True,
+    stats=None,
+    video_id=None,
+    extractive_budget=None,
+):
+    """
+    요약 텍스트 조각(delta)을 도착하는 대로 yield 하는 비동기 제너레이터.
+
+    - 일반 모드: 공급자 스트리밍 API의 delta를 그대로 전달
+    - 긴 자막: map 단계는 한 번에 처리하고 reduce 응답을 스트리밍
+    - 타임스탬프가 있는 Chapters 모드: 챕터 요약을 동시에 요청하고 챕터 순서대로 전달
+
+    Args:
+        stats (dict, optional): 채워지는 지표
+            ttft (첫 조각까지 걸린 초), total (전체 초), cached, provider, model ...
+        video_id (str, optional): 주면 스트림이 끝난 뒤 전체 요약을 검색 색인에 추가한다
+        extractive_budget (int, optional): 주면 긴 자막을 로컬 추출 요약으로 먼저 줄인다
+            (stats["extractive"]에 압축 비율 등)
+    """
+    hedging.check_api_choice(api_choice)
+    stats = {} if stats is None else stats
+    stats.update(provider=api_choice, model=MODELS.get(api_choice), cached=False, ttft=None, total=None)
+    started = time.perf_counter()
+
+    async def deltas():
+        nonlocal text
+        if extractive_budget:
+            text, stats["extractive"] = await _extract(text, chapters, extractive_budget)
+        if isinstance(text, Transcript):
+            if summarize_way == 'Chapters' and chapters and not isinstance(chapters, str):
+                async for section in _stream_chapters(text, chapters, lang, title, api_choice, use_cache, stats):
+                    yield section
+                return
+            text = text.text
+
+        prompt = build_prompt(text, lang=lang, title=title, chapters=chapters, summarize_way=summarize_way)
+        if estimate_tokens(prompt) > input_budget(api_choice):
+            prompt, map_meta = await map_phase_async(
+                text, lang=lang, title=title, chapters=chapters, api_choice=api_choice,
+                summarize_way=summarize_way, use_cache=use_cache,
+            )
+            stats.update(map_meta)
+        async for delta in stream_prompt_async(prompt, api_choice, use_cache, stats):
+            yield delta
+
+    parts = []
+    with tracing.span("summarize", provider=api_choice, way=summarize_way, stream=True) as attrs:
+        async for delta in deltas():
+            if stats["ttft"] is None:
+                stats["ttft"] = time.perf_counter() - started
+            parts.append(delta)
+            yield delta
+        stats["total"] = time.perf_counter() - started
+        attrs.update(ttft=stats["ttft"], cached=stats["cached"])
+    await _index_summary(video_id, "".join(parts), api_choice, summarize_way, lang)
+
+
+async def _stream_chapters(transcript, chapters, lang, title, api_choice, use_cache, stats,
+                           max_workers=CHAPTER_MAX_WORKERS):
+    jobs = _chapter_jobs(transcript, chapters, lang, title, api_choice, use_cache)
+    semaphore = asyncio.Semaphore(max_workers)
+    tasks = [asyncio.ensure_future(_bounded(semaphore, coro)) for _, coro in jobs]
+    cached = []
+    try:
+        for (header, _), task in zip(jobs, tasks):
+            summary, meta = await task
+            cached.append(meta["cached"])
+            yield f"{header}\n\n{summary}\n\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+    stats.update(per_chapter=True, chapters=len(jobs), cached=bool(cached) and all(cached))
+
+
+def summarize_text_stream(
+    text,
+    lang='en',
+    title=None,
+    chapters=None,
+    api_choice='Anthropic',
+    summarize_way='Summary',
+    use_cache=True,
+    stats=None,
+    video_id=None,
+    extractive_budget=None,
+):
+    """
+    summarize_text_stream_async의 동기 제너레이터 버전 (st.write_stream에 바로 넘길 수 있음)
+    """
+    return providers.iterate(summarize_text_stream_async(
+        text, lang=lang, title=title, chapters=chapters, api_choice=api_choice,
+        summarize_way=summarize_way, use_cache=use_cache, stats=stats, video_id=video_id,
+        extractive_budget=extractive_budget,
+    ))
+
 if __name__ == "__main__":
     text_to_summarize = input("Enter the text to summarize: ")
     lang = input("Enter the language for the summary: ")
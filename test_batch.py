@@ -0,0 +1,103 @@
+import json
+import threading
+
+import batch
+from transcript import Transcript
+
+
+def _fake_stages(monkeypatch, fail=()):
+    scraped = []
+
+    def fake_scrape(url, remove_fillers=False):
+        video_id = batch.extract_video_id(url)
+        scraped.append(video_id)
+        if video_id in fail:
+            raise RuntimeError("no transcript")
+        transcript = Transcript([0.0], [1.0], [f"words of {video_id}"])
+        return {"video_id": video_id, "title": f"title {video_id}", "channel": "c",
+                "transcript": transcript, "chapters": []}
+
+    async def fake_summarize(scraped_video, semaphore, lang, api_choice, summarize_way, use_cache):
+        async with semaphore:
+            return f"summary of {scraped_video['video_id']}", {"cached": False}
+
+    monkeypatch.setattr(batch, "scrape_video", fake_scrape)
+    monkeypatch.setattr(batch, "summarize_video", fake_summarize)
+    return scraped
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_batch_writes_jsonl_and_reports(monkeypatch, tmp_path):
+    _fake_stages(monkeypatch, fail={"bad"})
+    out = tmp_path / "out.jsonl"
+    urls = [f"https://www.youtube.com/watch?v=v{i}" for i in range(20)] + ["https://www.youtube.com/watch?v=bad"]
+
+    report = batch.run_batch(urls, str(out), io_workers=4, llm_workers=2)
+
+    records = _records(out)
+    assert len(records) == 21
+    assert {r["video_id"] for r in records if r["status"] == "ok"} == {f"v{i}" for i in range(20)}
+    failed = [r for r in records if r["status"] == "error"]
+    assert failed[0]["stage"] == "scrape"
+    assert report["ok"] == 20 and report["failed"] == 1
+    assert report["videos_per_min"] > 0 and report["tokens_per_min"] > 0
+
+
+def test_batch_resumes_from_checkpoint(monkeypatch, tmp_path):
+    out = tmp_path / "out.jsonl"
+    # 이전 실행: v0 성공, v1 실패, 마지막 줄은 충돌로 잘림
+    out.write_text(
+        json.dumps({"video_id": "v0", "status": "ok"}) + "\n"
+        + json.dumps({"video_id": "v1", "status": "error"}) + "\n"
+        + '{"video_id": "v2", "sta'
+    )
+    scraped = _fake_stages(monkeypatch)
+    urls = [f"https://www.youtube.com/watch?v=v{i}" for i in range(3)] + ["https://www.youtube.com/watch?v=v2"]
+
+    report = batch.run_batch(urls, str(out), io_workers=2, llm_workers=1)
+
+    assert sorted(scraped) == ["v1", "v2"]
+    assert report["skipped"] == 2
+    ok = {r["video_id"] for r in _records_lenient(out) if r.get("status") == "ok"}
+    assert ok == {"v0", "v1", "v2"}
+
+
+def _records_lenient(path):
+    records = []
+    for line in path.read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass
+    return records
+
+
+def test_writer_syncs_off_the_calling_thread(monkeypatch, tmp_path):
+    synced = []
+    fsync = batch.os.fsync
+    monkeypatch.setattr(batch.os, "fsync", lambda fd: synced.append(threading.current_thread().name) or fsync(fd))
+
+    path = tmp_path / "out.jsonl"
+    writer = batch.JsonlWriter(str(path))
+    for i in range(3):
+        writer.write({"n": i})
+    writer.close()  # 남은 줄을 모두 쓰고 닫는다
+
+    assert [json.loads(line)["n"] for line in path.read_text().splitlines()] == [0, 1, 2]
+    assert synced == ["batch-writer"] * 3
+
+
+def test_read_urls_skips_comments(tmp_path):
+    src = tmp_path / "urls.txt"
+    src.write_text("# nightly\nhttps://www.youtube.com/watch?v=a\n\n  https://www.youtube.com/watch?v=b  \n")
+    assert batch.read_urls(str(src)) == ["https://www.youtube.com/watch?v=a", "https://www.youtube.com/watch?v=b"]
+
+
+def test_cli_rejects_unknown_provider(tmp_path):
+    import pytest
+
+    with pytest.raises(SystemExit):
+        batch.main(["-", "-o", str(tmp_path / "o.jsonl"), "--api", "Nope"])
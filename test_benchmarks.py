@@ -0,0 +1,65 @@
+import requests
+
+import scrape_youtube
+from benchmarks import bench_suite
+from benchmarks.fake_youtube_server import FakeYouTubeServer
+from benchmarks.fixtures import load_transcripts, load_watch_pages
+
+
+def test_fixture_corpus_covers_page_shapes():
+    pages = load_watch_pages()
+    transcripts = load_transcripts()
+    assert set(pages) == set(transcripts) == {"chaptered", "description", "korean", "long", "markers", "short"}
+    assert len(pages["long"]) > len(pages["chaptered"]) > len(pages["short"])
+    assert transcripts["long"][-1]["start"] > 3 * 3600 - 10
+    assert "금리" in " ".join(s["text"] for s in transcripts["korean"][:50])
+
+
+def test_micro_benchmarks_report_every_stage():
+    pages = {name: html for name, html in load_watch_pages().items() if name in ("short", "korean")}
+    transcripts = {name: t for name, t in load_transcripts().items() if name in pages}
+    results = bench_suite.run_micro(repeat=2, pages=pages, transcripts=transcripts)
+    assert set(results) == {
+        "extract_metadata", "extract_chapters_from_html", "extract_chapters_from_description",
+        "transcript_from_segments", "compact_transcript",
+        "build_prompt[syukaworld]", "build_prompt[Detailed]", "build_prompt[Chapters]",
+    }
+    assert all(set(rows) == {"short", "korean"} for rows in results.values())
+    assert results["extract_metadata"]["korean"]["runs"] == 2
+
+
+def test_fake_youtube_server_replays_fixtures(monkeypatch):
+    with FakeYouTubeServer() as server:
+        server.patch(scrape_youtube, monkeypatch)
+        monkeypatch.setattr(scrape_youtube, "_watch_pages", scrape_youtube.OrderedDict())
+        url = scrape_youtube.WATCH_URL.format(video_id="korean_0001")
+        transcript, chapters = scrape_youtube.get_transcript_segments("korean_0001", url)
+        assert len(transcript) == len(load_transcripts()["korean"])
+        assert chapters[1] == (195.0, "금리 인하")
+
+        thumb = requests.get(server.url + "/vi/korean_0001/maxresdefault.jpg")
+        again = requests.get(server.url + "/vi/korean_0001/maxresdefault.jpg",
+                             headers={"If-None-Match": thumb.headers["ETag"]})
+        assert thumb.status_code == 200 and again.status_code == 304
+        assert requests.get(server.url + "/watch?v=unknown").status_code == 404
+
+
+def test_end_to_end_with_fake_llm():
+    results = bench_suite.run_e2e(concurrency=(1, 2), videos=3, api_choice="Gemini",
+                                  youtube_latency=0.0, llm_latency=0.01, chunk_delay=0.0)
+    for level in ("1", "2"):
+        r = results[level]
+        assert r["videos"] == 3 and r["llm_requests"] == 3
+        assert r["latency_ms"]["p50"] > 0 and r["ttft_ms"]["p50"] > 0
+        assert "prefetch.transcript" in r["spans_median_ms"] and "llm.request" in r["spans_median_ms"]
+
+
+def test_compare_flags_regressions():
+    old = {"micro": {"compact_transcript": {"long": {"median_ms": 10.0}}},
+           "e2e": {"4": {"latency_ms": {"p50": 100.0}, "videos_per_sec": 10.0}}}
+    new = {"micro": {"compact_transcript": {"long": {"median_ms": 15.0}}},
+           "e2e": {"4": {"latency_ms": {"p50": 101.0}, "videos_per_sec": 5.0}}}
+    assert bench_suite.compare(old, new) == [
+        ("micro.compact_transcript.long.median_ms", 10.0, 15.0, 0.5),
+        ("e2e.c4.videos_per_sec", 10.0, 5.0, 0.5),
+    ]
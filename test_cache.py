@@ -0,0 +1,165 @@
+import multiprocessing
+import sqlite3
+import time
+
+from cache import DiskCache, make_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_key():
+    assert make_key("transcript", "abc", ("en", "ko")) == "transcript:abc:en,ko"
+
+
+def test_roundtrip_and_counters(tmp_path):
+    c = DiskCache(str(tmp_path / "c.sqlite3"))
+    assert c.get("k") is None
+    c.set("k", {"text": "안녕", "n": [1, 2]})
+    assert c.get("k") == {"text": "안녕", "n": [1, 2]}
+    stats = c.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_bytes_roundtrip(tmp_path):
+    c = DiskCache(str(tmp_path / "c.sqlite3"))
+    c.set_bytes("b", b"\x00YTST\xff")
+    assert c.get_bytes("b") == b"\x00YTST\xff"
+    assert c.get_bytes("missing", b"") == b""
+    assert c.stats()["bytes"] == 6
+
+
+def test_ttl_expiry(tmp_path):
+    clock = FakeClock()
+    c = DiskCache(str(tmp_path / "c.sqlite3"), ttl=10, clock=clock)
+    c.set("k", "v")
+    clock.now += 9
+    assert c.get("k") == "v"
+    clock.now += 2
+    assert c.get("k") is None
+    assert c.stats()["entries"] == 0
+
+
+def test_lru_eviction_by_bytes(tmp_path):
+    clock = FakeClock()
+    value = "x" * 98  # JSON으로 100 bytes
+    c = DiskCache(str(tmp_path / "c.sqlite3"), max_bytes=300, clock=clock, touch_interval=0)
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        c.set(key, value)
+    clock.now += 1
+    c.get("a")  # a를 최근 사용으로
+    clock.now += 1
+    c.set("d", value)
+    assert c.get("b") is None
+    assert c.get("a") == value and c.get("c") == value and c.get("d") == value
+    assert c.stats()["bytes"] <= 300
+
+
+def test_reads_do_not_take_the_write_lock(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    c = DiskCache(path)
+    c.set("k", "v")
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        assert c.get("k") == "v"  # 방금 쓴 항목이라 사용 시각 갱신도 없다
+        assert time.perf_counter() - started < 1.0
+    finally:
+        writer.execute("ROLLBACK")
+
+
+def test_access_time_is_touched_at_most_every_interval(tmp_path):
+    clock = FakeClock()
+    c = DiskCache(str(tmp_path / "c.sqlite3"), clock=clock, touch_interval=60)
+    c.set("k", "v")
+
+    def accessed():
+        return c._connect().conn.execute("SELECT accessed FROM entries WHERE key = 'k'").fetchone()[0]
+
+    clock.now += 30
+    c.get("k")
+    assert accessed() == 1000.0
+    clock.now += 30
+    c.get("k")
+    assert accessed() == 1060.0
+
+
+def test_byte_total_is_kept_without_rescanning(tmp_path):
+    clock = FakeClock()
+    c = DiskCache(str(tmp_path / "c.sqlite3"), ttl=10, clock=clock)
+
+    def scanned():
+        return c._connect().conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    c.set_bytes("a", b"x" * 10)
+    c.set_bytes("b", b"x" * 20)
+    c.set_bytes("a", b"x" * 5)  # 덮어쓰기
+    assert c.stats()["bytes"] == scanned() == 25
+    c.delete("b")
+    assert c.stats()["bytes"] == scanned() == 5
+    clock.now += 11
+    c.set_bytes("c", b"x" * 7)  # 만료된 a는 제거된다
+    assert c.stats()["bytes"] == scanned() == 7
+    c.clear()
+    assert c.stats()["bytes"] == 0
+    assert DiskCache(c.path).stats()["bytes"] == 0  # 다시 열어도 그대로
+
+
+def test_get_or_set_computes_once(tmp_path):
+    c = DiskCache(str(tmp_path / "c.sqlite3"))
+    calls = []
+    for _ in range(3):
+        assert c.get_or_set("k", lambda: calls.append(1) or [1, "a"]) == [1, "a"]
+    assert len(calls) == 1
+
+
+def _writer(path, prefix):
+    c = DiskCache(path)
+    for i in range(50):
+        c.set(f"{prefix}{i}", i)
+
+
+def test_concurrent_processes(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    DiskCache(path)
+    procs = [multiprocessing.Process(target=_writer, args=(path, p)) for p in "xyz"]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    assert DiskCache(path).stats()["entries"] == 150
+
+
+def test_pluggable_count_eviction(tmp_path):
+    from cache import ExpiredEviction, LRUCountEviction
+
+    clock = FakeClock()
+    c = DiskCache(str(tmp_path / "c.sqlite3"), clock=clock, eviction=[ExpiredEviction(), LRUCountEviction(2)])
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        c.set(key, key)
+    assert c.get("a") is None
+    assert c.stats()["entries"] == 2
+
+
+def test_memory_lru_cache_bounded_by_bytes():
+    from cache import MemoryLRUCache
+
+    c = MemoryLRUCache(10)
+    c.set("a", b"xxxx")
+    c.set("b", b"xxxx")
+    c.get("a")
+    c.set("c", b"xxxx")
+    assert c.get("b") is None
+    assert c.get("a") == b"xxxx" and c.get("c") == b"xxxx"
+    assert c.bytes == 8
+    c.set("huge", b"x" * 11)
+    assert c.get("huge") is None and len(c) == 2
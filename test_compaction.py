@@ -0,0 +1,78 @@
+import time
+
+from compaction import clean_text, compact_transcript, overlap_length
+from transcript import Transcript
+
+
+def _transcript(texts, step=2.0):
+    return Transcript([i * step for i in range(len(texts))], [step] * len(texts), texts)
+
+
+def test_rolling_caption_overlap_is_merged():
+    transcript = _transcript([
+        "so today we are going",
+        "we are going to talk about",
+        "to talk about caching and",
+        "caching and why it matters",
+    ])
+    compacted, stats = compact_transcript(transcript)
+
+    assert compacted.text == "so today we are going to talk about caching and why it matters"
+    assert list(compacted.starts) == [0.0, 2.0, 4.0, 6.0]
+    assert stats["tokens_saved"] > 0
+    assert stats["tokens_after"] < stats["tokens_before"]
+
+
+def test_fully_repeated_segment_is_dropped_and_time_kept():
+    transcript = _transcript(["hello there world", "there world", "next line here"])
+    compacted, stats = compact_transcript(transcript)
+
+    assert compacted.texts == ["hello there world", "next line here"]
+    assert compacted.durations[0] == 4.0
+    assert stats["segments_before"] == 3 and stats["segments_after"] == 2
+
+
+def test_markers_and_whitespace_removed():
+    assert clean_text("[Music]  hello\n  world [Applause] ♪") == "hello world"
+    compacted, _ = compact_transcript(_transcript(["[Music]", "[음악] 안녕하세요  여러분", ">> next"]))
+    assert compacted.texts == ["안녕하세요 여러분", "next"]
+
+
+def test_short_real_repetition_is_kept():
+    compacted, _ = compact_transcript(_transcript(["I said no", "no way"]))
+    assert compacted.text == "I said no no way"
+
+
+def test_fillers_removed_only_when_requested():
+    transcript = _transcript(["um, so uh this is, eh, bueno", "음 그래서 어 오늘은 umbrella"])
+    kept, _ = compact_transcript(transcript)
+    assert "um," in kept.text
+
+    compacted, _ = compact_transcript(transcript, remove_fillers=True)
+    assert compacted.texts == ["so this is, bueno", "그래서 오늘은 umbrella"]
+
+    english_only, _ = compact_transcript(transcript, remove_fillers=True, languages=("en",))
+    assert english_only.texts[0] == "so this is, eh, bueno"
+
+
+def test_overlap_length():
+    assert overlap_length(["a", "b", "c"], ["b", "c", "d"]) == 2
+    assert overlap_length(["a", "b", "a"], ["a", "b", "a", "x"]) == 3
+    assert overlap_length(["a"], ["b"]) == 0
+    assert overlap_length([], ["a"]) == 0
+
+
+def test_compaction_is_linear():
+    def build(n):
+        return _transcript([f"w{i} w{i + 1} w{i + 2} w{i + 3}" for i in range(0, n, 2)])
+
+    small, large = build(2_000), build(20_000)
+    started = time.perf_counter()
+    compact_transcript(small)
+    small_time = time.perf_counter() - started
+    started = time.perf_counter()
+    compacted, _ = compact_transcript(large)
+    large_time = time.perf_counter() - started
+
+    assert compacted.text == " ".join(f"w{i}" for i in range(20_002))
+    assert large_time < small_time * 30
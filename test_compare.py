@@ -0,0 +1,81 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import compare
+import providers
+from transcript import Transcript
+
+DELAYS = {"OpenAI": 0.1, "Gemini": 0.3, "x.ai": 0.2}
+
+
+def _fake_stream(prompts, fail=()):
+    async def fake_stream(api_choice, prompt):
+        prompts.append((api_choice, prompt))
+        if api_choice in fail:
+            raise RuntimeError("provider down")
+        for part in ("Hello ", api_choice):
+            await asyncio.sleep(DELAYS[api_choice] / 2)
+            yield part
+        if api_choice == "OpenAI":
+            providers.record_usage(api_choice, SimpleNamespace(
+                usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=200, prompt_tokens_details=None)))
+    return fake_stream
+
+
+def test_providers_run_concurrently_with_one_prompt(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(providers, "stream", _fake_stream(prompts))
+    stats = {}
+    started = time.perf_counter()
+    events = list(compare.compare_stream("some transcript", list(DELAYS), title="Title", use_cache=False, stats=stats))
+    elapsed = time.perf_counter() - started
+
+    # 전체 시간은 합(0.6s)이 아니라 가장 느린 공급자(0.3s)
+    assert elapsed < 0.5
+    assert len({prompt for _, prompt in prompts}) == 1
+    texts = {}
+    for api_choice, delta in events:
+        texts[api_choice] = texts.get(api_choice, "") + delta
+    assert texts == {name: f"Hello {name}" for name in DELAYS}
+    # 빠른 공급자의 조각이 느린 공급자보다 먼저 온다
+    assert events[-1][0] == "Gemini"
+
+    results = stats["providers"]
+    assert results["OpenAI"]["ttft"] < results["Gemini"]["ttft"] <= results["Gemini"]["total"] <= stats["total"]
+    assert results["OpenAI"]["prompt_tokens"] == 1000 and not results["OpenAI"]["estimated"]
+    assert results["OpenAI"]["cost"] == pytest.approx((1000 * 0.15 + 200 * 0.60) / 1_000_000)
+    assert results["Gemini"]["estimated"] and results["Gemini"]["cost"] > 0
+
+
+def test_failed_provider_does_not_stop_the_others(monkeypatch):
+    monkeypatch.setattr(providers, "stream", _fake_stream([], fail=("x.ai",)))
+    stats = {}
+    events = list(compare.compare_stream("text", ["OpenAI", "x.ai"], use_cache=False, stats=stats))
+    assert {api_choice for api_choice, _ in events} == {"OpenAI"}
+    assert stats["providers"]["x.ai"]["error"] == "RuntimeError: provider down"
+    assert stats["providers"]["x.ai"]["cost"] == 0.0
+    assert stats["providers"]["OpenAI"]["error"] is None
+
+
+def test_prompt_is_condensed_to_fit_the_smallest_window(monkeypatch):
+    monkeypatch.setattr(compare, "input_budget", lambda api_choice: 3000 if api_choice == "OpenAI" else 10**6)
+    words = "cache latency model tokens provider stream chapter budget summary video".split()
+    texts = [" ".join(words[(i + j) % len(words)] for j in range(12)) + "." for i in range(1500)]
+    transcript = Transcript([2.0 * i for i in range(1500)], [2.0] * 1500, texts)
+
+    prompt, extraction = compare.prepare_prompt(transcript, ["Gemini", "OpenAI"], title="Title")
+    assert compare.estimate_tokens(prompt) <= 3000
+    assert extraction["tokens_before"] > extraction["tokens_after"]
+
+    prompt, extraction = compare.prepare_prompt(transcript, ["Gemini"], title="Title")
+    assert extraction is None and transcript.text in prompt
+
+
+def test_rejects_unknown_providers():
+    with pytest.raises(ValueError):
+        list(compare.compare_stream("text", ["Nope"]))
+    with pytest.raises(ValueError):
+        list(compare.compare_stream("text", []))
@@ -0,0 +1,96 @@
+import random
+import time
+
+import extractive
+import providers
+import summarize_text
+from chunking import estimate_tokens
+from transcript import Transcript, align_chapters
+
+TOPICS = {
+    'en': ("The cache keeps every summary so the provider is not called again.",
+           "My cat likes warm boxes."),
+    'es': ("La caché guarda cada resumen para no llamar otra vez al proveedor.",
+           "Mi gato duerme en cajas calientes."),
+    'ko': ("캐시는 요약을 저장해서 공급자를 다시 호출하지 않습니다.",
+           "고양이는 따뜻한 상자를 좋아합니다."),
+}
+
+
+def _synthetic(segments, seed=0):
+    rng = random.Random(seed)
+    words = ("cache latency model tokens provider stream chapter budget summary video transcript "
+             "search index queue worker lease python numpy vector graph rank the a of and").split()
+    texts = [" ".join(rng.choice(words) for _ in range(12)) + rng.choice([".", "", ""]) for _ in range(segments)]
+    return Transcript([3.0 * i for i in range(segments)], [3.0] * segments, texts)
+
+
+def test_keeps_budget_order_and_timestamps():
+    transcript = _synthetic(2000)
+    condensed, stats = extractive.extract(transcript, budget=3000)
+    assert stats["tokens_after"] <= 3000 < stats["tokens_before"]
+    assert stats["ratio"] == round(stats["tokens_after"] / stats["tokens_before"], 4)
+    assert estimate_tokens(condensed.text) <= 3000
+    starts = list(condensed.starts)
+    assert starts == sorted(starts) and len(starts) < len(transcript)
+    original = dict(zip(transcript.starts, transcript.iter_texts()))
+    assert all(original[start] == text for start, text in zip(starts, condensed.iter_texts()))
+
+
+def test_short_text_is_returned_unchanged():
+    transcript = Transcript([0.0, 2.0], [2.0, 2.0], ["hello", "world"])
+    condensed, stats = extractive.extract(transcript, budget=1000)
+    assert condensed is transcript and stats["ratio"] == 1.0
+
+
+def test_chapter_boundaries_are_kept():
+    transcript = _synthetic(1200)
+    chapters = [(0, "Intro"), (600, "Middle"), (1200, "Short"), (1260, "Rest")]
+    units, groups = extractive._segment_units(transcript, chapters)
+    bounds = {transcript.index_at(start) for start, _ in chapters}
+    assert all(not any(lo < b < hi for b in bounds) for lo, hi in units)
+    assert groups == sorted(groups) and groups[-1] == len(chapters) - 1
+
+    condensed, _ = extractive.extract(transcript, budget=1500, chapters=chapters)
+    aligned = align_chapters(condensed, chapters)
+    # 모든 챕터가 남고, 긴 챕터가 더 많이 남는다
+    assert all(len(part) > 0 for _, _, _, part in aligned)
+    assert len(aligned[0][3]) > len(aligned[2][3])
+
+
+def test_central_sentences_win_in_each_language():
+    for lang, (central, outlier) in TOPICS.items():
+        text = " ".join([central] * 6 + [outlier])
+        condensed, stats = extractive.extract(text, budget=estimate_tokens(central) * 3)
+        assert central in condensed and outlier not in condensed, lang
+        assert stats["units_after"] < stats["units_before"]
+
+
+def test_three_hour_transcript_is_fast():
+    # 3시간 = 3초 세그먼트 3600개
+    transcript = _synthetic(3600, seed=1)
+    chapters = [(i * 600, f"Chapter {i}") for i in range(18)]
+    extractive.extract(transcript, budget=4000, chapters=chapters)  # import/캐시 워밍업
+    started = time.perf_counter()
+    _, stats = extractive.extract(transcript, budget=4000, chapters=chapters)
+    assert time.perf_counter() - started < 1.0
+    assert stats["tokens_after"] <= 4000
+
+
+def test_summarize_stream_uses_extractive_budget(monkeypatch):
+    prompts = []
+
+    async def fake_stream(api_choice, prompt):
+        prompts.append(prompt)
+        yield "ok"
+
+    monkeypatch.setattr(providers, "stream", fake_stream)
+    transcript = _synthetic(2000)
+    stats = {}
+    deltas = list(summarize_text.summarize_text_stream(
+        transcript, api_choice="Anthropic", summarize_way="syukaworld", use_cache=False,
+        stats=stats, extractive_budget=2000,
+    ))
+    assert deltas == ["ok"]
+    assert stats["extractive"]["tokens_after"] <= 2000
+    assert estimate_tokens(prompts[0]) < estimate_tokens(transcript.text)
@@ -0,0 +1,165 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+import cache
+import hedging
+import providers
+import summarize_text
+from benchmarks.fake_llm_server import FakeLLMServer
+
+
+def _fake_providers(monkeypatch, behaviour):
+    """
+    behaviour: {provider: (latency, error or None)}
+    """
+    events = []
+
+    async def fake_complete(api_choice, prompt):
+        latency, error = behaviour[api_choice]
+        events.append(("start", api_choice))
+        try:
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            events.append(("cancelled", api_choice))
+            raise
+        if error:
+            raise error
+        return f"from {api_choice}"
+
+    async def fake_stream(api_choice, prompt):
+        latency, error = behaviour[api_choice]
+        events.append(("start", api_choice))
+        try:
+            await asyncio.sleep(latency)
+            if error:
+                raise error
+            for delta in (f"{api_choice}:", "a", "b"):
+                yield delta
+        finally:
+            events.append(("closed", api_choice))
+
+    monkeypatch.setattr(providers, "complete", fake_complete)
+    monkeypatch.setattr(providers, "stream", fake_stream)
+    return events
+
+
+def test_primary_answers_without_hedge(monkeypatch):
+    events = _fake_providers(monkeypatch, {"OpenAI": (0.01, None), "Gemini": (0.01, None)})
+    text, info = asyncio.run(hedging.complete_fastest(
+        "p", candidates=["OpenAI", "Gemini"], hedge_after=0.5, stats=hedging.ProviderStats(),
+    ))
+    assert text == "from OpenAI"
+    assert info["hedged"] is False and info["attempts"] == ["OpenAI"]
+    assert events == [("start", "OpenAI")]
+
+
+def test_slow_primary_is_hedged_and_cancelled(monkeypatch):
+    events = _fake_providers(monkeypatch, {"OpenAI": (1.0, None), "Gemini": (0.02, None)})
+    stats = hedging.ProviderStats()
+    text, info = asyncio.run(hedging.complete_fastest(
+        "p", candidates=["OpenAI", "Gemini"], hedge_after=0.05, stats=stats,
+    ))
+    assert text == "from Gemini"
+    assert info["provider"] == "Gemini" and info["hedged"] is True
+    assert info["cancelled"] == ["OpenAI"]
+    assert ("cancelled", "OpenAI") in events
+    assert stats.summary("Gemini")["samples"] == 1
+    assert stats.summary("OpenAI")["samples"] == 0  # 취소된 시도는 지연 표본이 아니다
+
+
+def test_error_fails_over_immediately(monkeypatch):
+    _fake_providers(monkeypatch, {"x.ai": (0.01, RuntimeError("503")), "Anthropic": (0.01, None)})
+    stats = hedging.ProviderStats()
+    text, info = asyncio.run(hedging.complete_fastest(
+        "p", candidates=["x.ai", "Anthropic"], hedge_after=10.0, stats=stats,
+    ))
+    assert text == "from Anthropic"
+    assert "x.ai" in info["errors"]
+    assert stats.summary("x.ai")["error_rate"] == 1.0
+
+
+def test_all_failures_raise_last_error(monkeypatch):
+    _fake_providers(monkeypatch, {"OpenAI": (0.01, RuntimeError("a")), "Gemini": (0.02, ValueError("b"))})
+    with pytest.raises(ValueError):
+        asyncio.run(hedging.complete_fastest(
+            "p", candidates=["OpenAI", "Gemini"], hedge_after=10.0, stats=hedging.ProviderStats(),
+        ))
+
+
+def test_rolling_stats_pick_primary_and_threshold():
+    now = [0.0]
+    stats = hedging.ProviderStats(window_size=10, window_seconds=60, clock=lambda: now[0])
+    for latency in (1.0, 1.1, 1.2, 1.3, 3.0):
+        stats.record("OpenAI", latency)
+    for latency in (0.5, 0.6):
+        stats.record("Gemini", latency)
+    for _ in range(3):
+        stats.record("Gemini", 0.5, ok=False)
+
+    assert stats.hedge_after("OpenAI") == 3.0
+    assert stats.hedge_after("Gemini") == hedging.DEFAULT_HEDGE_AFTER  # 성공 표본 부족
+    # Gemini는 빠르지만 오류율 60% -> 0.6 * (1 + 4 * 0.6) = 2.04 > 1.2
+    assert stats.rank(["Gemini", "OpenAI", "x.ai"]) == ["OpenAI", "Gemini", "x.ai"]
+
+    now[0] = 120.0  # 창 밖으로 밀려나면 다시 탐색 대상
+    assert stats.summary("OpenAI")["samples"] == 0
+
+
+def test_stream_races_on_first_delta(monkeypatch):
+    events = _fake_providers(monkeypatch, {"OpenAI": (1.0, None), "Anthropic": (0.02, None)})
+
+    async def consume():
+        info = {}
+        deltas = [d async for d in hedging.stream_fastest(
+            "p", candidates=["OpenAI", "Anthropic"], hedge_after=0.05, stats=hedging.ProviderStats(), info=info,
+        )]
+        return deltas, info
+
+    deltas, info = asyncio.run(consume())
+    assert deltas == ["Anthropic:", "a", "b"]
+    assert info["provider"] == "Anthropic"
+    assert ("closed", "OpenAI") in events and ("closed", "Anthropic") in events
+
+
+def test_summarize_text_fastest_mode(monkeypatch, tmp_path):
+    _fake_providers(monkeypatch, {"OpenAI": (1.0, None), "Gemini": (0.01, None)})
+    monkeypatch.setattr(hedging, "available_providers", lambda: ["OpenAI", "Gemini"])
+    monkeypatch.setattr(hedging, "DEFAULT_HEDGE_AFTER", 0.05)
+    monkeypatch.setattr(hedging, "_stats", hedging.ProviderStats())
+    cache.set_summary_cache(cache.DiskCache(str(tmp_path / "s.sqlite3")))
+
+    summary, meta = summarize_text.summarize_text("text", api_choice=hedging.FASTEST, return_metadata=True)
+    assert summary == "from Gemini"
+    assert meta["provider"] == "Gemini" and meta["hedge"]["hedged"] is True
+
+    summary, meta = summarize_text.summarize_text("text", api_choice=hedging.FASTEST, return_metadata=True)
+    assert meta["cached"] is True and meta["provider"] == "Gemini"
+
+    stats = {}
+    deltas = list(summarize_text.summarize_text_stream("other", api_choice=hedging.FASTEST, stats=stats))
+    assert deltas == ["Gemini:", "a", "b"] and stats["provider"] == "Gemini"
+
+
+def test_fake_server_speaks_openai_and_anthropic():
+    with FakeLLMServer(latency=0.0, text="hello world", chunks=3) as server:
+        r = requests.post(server.openai_base_url + "/chat/completions", json={"model": "m", "messages": []})
+        assert r.json()["choices"][0]["message"]["content"] == "hello world"
+
+        r = requests.post(server.openai_base_url + "/chat/completions", json={"model": "m", "stream": True})
+        lines = [line[6:] for line in r.text.splitlines() if line.startswith("data: ")]
+        assert lines[-1] == "[DONE]"
+        text = "".join(json.loads(line)["choices"][0]["delta"].get("content", "") for line in lines[:-1])
+        assert text == "hello world"
+
+        r = requests.post(server.anthropic_base_url + "/v1/messages", json={"model": "m", "stream": True})
+        deltas = [json.loads(line[6:])["delta"]["text"] for line in r.text.splitlines()
+                  if line.startswith("data: ") and "text_delta" in line]
+        assert "".join(deltas) == "hello world"
+        assert len(server.requests) == 3
+
+    with FakeLLMServer(status=503, headers={"retry-after": "2"}) as server:
+        r = requests.post(server.anthropic_base_url + "/v1/messages", json={})
+        assert r.status_code == 503 and r.headers["retry-after"] == "2"
@@ -0,0 +1,106 @@
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        server.hits[self.path] = server.hits.get(self.path, 0) + 1
+        if self.path == "/flaky":
+            if server.hits[self.path] < 3:
+                return self._send(503, b"busy")
+            return self._send(200, b"ok")
+        if self.path == "/throttled":
+            if server.hits[self.path] == 1:
+                return self._send(429, b"slow down", [("Retry-After", "0")])
+            return self._send(200, b"ok")
+        if self.path == "/slow":
+            time.sleep(1)
+            return self._send(200, b"late")
+        if self.path == "/gzip":
+            assert "gzip" in self.headers.get("Accept-Encoding", "")
+            return self._send(200, gzip.compress(b"compressed body"), [("Content-Encoding", "gzip")])
+        return self._send(200, b"hello")
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    httpd.connections = set()
+    httpd.hits = {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def session():
+    s = http_client.build_session(backoff_factor=0.01, backoff_jitter=0.01)
+    yield s
+    s.close()
+
+
+def test_keep_alive_reuses_connection(server, session):
+    httpd, base = server
+    for _ in range(5):
+        assert session.get(base + "/").text == "hello"
+    assert len(httpd.connections) == 1
+
+
+def test_retries_5xx_then_succeeds(server, session):
+    httpd, base = server
+    r = session.get(base + "/flaky")
+    assert r.status_code == 200
+    assert httpd.hits["/flaky"] == 3
+
+
+def test_retries_429_with_retry_after(server, session):
+    httpd, base = server
+    assert session.get(base + "/throttled").status_code == 200
+    assert httpd.hits["/throttled"] == 2
+
+
+def test_default_read_timeout(server):
+    _, base = server
+    s = http_client.build_session(timeout=(1, 0.2), retries=0)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        s.get(base + "/slow")
+    s.close()
+
+
+def test_gzip_negotiated_and_decoded(server, session):
+    _, base = server
+    assert session.get(base + "/gzip").text == "compressed body"
+
+
+def test_module_get_uses_shared_session(server, session):
+    _, base = server
+    http_client.set_session(session)
+    try:
+        assert http_client.get_session() is session
+        assert http_client.get(base + "/").text == "hello"
+    finally:
+        http_client.set_session(None)
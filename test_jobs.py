@@ -0,0 +1,254 @@
+import threading
+import time
+
+import pytest
+
+import http_client
+import jobs
+import pipeline
+import summarize_text
+import tracing
+from transcript import Transcript
+
+URL = "https://www.youtube.com/watch?v=abc123"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_claim_is_fifo_and_exclusive(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"))
+    first = queue.submit({"url": "a"})
+    second = queue.submit({"url": "b"})
+
+    job = queue.claim("w1")
+    assert job["id"] == first and job["params"] == {"url": "a"} and job["attempts"] == 1
+    assert queue.claim("w2")["id"] == second
+    assert queue.claim("w3") is None
+    assert queue.counts() == {"queued": 0, "running": 2, "done": 0, "error": 0}
+
+    assert queue.heartbeat(first, "w1", {"stage": "summarizing", "partial": "Hel"})
+    assert queue.get(first)["progress"] == {"stage": "summarizing", "partial": "Hel"}
+    assert queue.complete(first, "w1", {"summary": "Hello"})
+    assert queue.fail(second, "w2", "boom")
+    assert queue.get(first, with_result=True)["result"] == {"summary": "Hello"}
+    assert queue.get(second)["status"] == "error" and queue.get(second)["error"] == "boom"
+    assert queue.get("0" * 32) is None
+
+
+def test_stale_lease_is_reclaimed_then_given_up(tmp_path):
+    clock = FakeClock()
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), clock=clock)
+    job_id = queue.submit({"url": "a"})
+
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        job = queue.claim(f"w{attempt}")
+        assert job["id"] == job_id and job["attempts"] == attempt
+        # heartbeat가 있는 동안에는 다른 워커가 가져가지 못한다
+        clock.now += jobs.LEASE_SECONDS / 2
+        assert queue.heartbeat(job_id, f"w{attempt}")
+        assert queue.claim("other") is None
+        clock.now += jobs.LEASE_SECONDS + 1
+
+    assert queue.claim("last") is None
+    job = queue.get(job_id)
+    assert job["status"] == "error" and job["error"] == "worker lost"
+
+
+def test_metrics_from_all_workers_are_summed(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"))
+    for worker, seconds in (("w1", 0.02), ("w2", 3.0)):
+        metrics = tracing.Metrics()
+        metrics.inc("jobs", status="done")
+        metrics.observe("prefetch.transcript", seconds)
+        queue.record_metrics(worker, metrics.snapshot())
+    queue.record_metrics("w1", metrics.snapshot())  # 워커마다 최신 값 하나만 남는다
+
+    merged = queue.metrics()
+    assert merged.value("jobs", status="done") == 2
+    assert 'yts_span_seconds_count{span="prefetch.transcript"} 2' in merged.render()
+
+
+def test_reclaimed_job_ignores_the_old_worker(tmp_path):
+    clock = FakeClock()
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), clock=clock)
+    job_id = queue.submit({"url": "a"})
+    queue.claim("slow")
+    clock.now += jobs.LEASE_SECONDS + 1
+    assert queue.claim("fast")["id"] == job_id
+
+    # 늦게 끝난 첫 워커의 heartbeat/결과는 반영되지 않는다
+    assert not queue.heartbeat(job_id, "slow")
+    assert not queue.complete(job_id, "slow", {"summary": "stale"})
+    assert not queue.fail(job_id, "slow", "boom")
+    assert queue.get(job_id)["status"] == "running"
+
+    assert queue.complete(job_id, "fast", {"summary": "fresh"})
+    assert queue.get(job_id, with_result=True)["result"] == {"summary": "fresh"}
+    assert not queue.complete(job_id, "fast", {"summary": "again"})
+
+
+def test_worker_drops_result_of_a_reclaimed_job(tmp_path, monkeypatch):
+    clock = FakeClock()
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), clock=clock)
+    job_id = queue.submit({"url": "a"})
+    lost = tracing.get_metrics().value("jobs", status="lost")
+
+    def slow_run(params, report):
+        # 실행 중에 lease가 끝나 다른 워커가 가져가서 먼저 끝낸다
+        clock.now += jobs.LEASE_SECONDS + 1
+        assert queue.claim("fast")["id"] == job_id
+        queue.complete(job_id, "fast", {"summary": "fresh"})
+        return {"summary": "stale"}
+
+    monkeypatch.setattr(jobs, "run_job", slow_run)
+    assert jobs.work_one(queue, "slow") == job_id
+    assert queue.get(job_id, with_result=True)["result"] == {"summary": "fresh"}
+    assert tracing.get_metrics().value("jobs", status="lost") == lost + 1
+
+
+def test_prune_removes_old_finished_jobs(tmp_path):
+    clock = FakeClock()
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), clock=clock)
+    done = queue.submit({})
+    queue.complete(queue.claim("w")["id"], "w", {})
+    pending = queue.submit({})
+    clock.now += jobs.JOB_TTL + 1
+    queue.prune()
+    assert queue.get(done) is None
+    assert queue.get(pending)["status"] == "queued"
+
+
+def test_validate():
+    params = jobs.validate({"url": URL, "api_choice": "Fastest"})
+    assert params["summarize_way"] == "syukaworld" and params["lang"] == "English" and params["use_cache"]
+    assert params["extractive_budget"] is None
+    for bad in ({}, {"url": "not a url"}, {"url": URL, "api_choice": "Nope"}, {"url": URL, "summarize_way": "x"},
+                {"url": URL, "extractive_budget": "lots"}):
+        with pytest.raises(ValueError):
+            jobs.validate(bad)
+
+
+def test_run_job_reports_progress(monkeypatch):
+    transcript = Transcript([0.0, 5.0], [5.0, 5.0], ["hello", "world"])
+    monkeypatch.setattr(pipeline, "extract_metadata", lambda url: ("Title", "Channel"))
+    thumbnails = []
+    monkeypatch.setattr(pipeline, "get_thumbnail", thumbnails.append)
+    monkeypatch.setattr(pipeline, "_transcript_stage", lambda video_id, url: (transcript, [(0.0, "Intro")]))
+    seen = {}
+
+    def fake_stream(transcript, lang, title, chapters, api_choice, summarize_way, use_cache, stats, video_id,
+                    extractive_budget):
+        seen.update(lang=lang, chapters=chapters, video_id=video_id, extractive_budget=extractive_budget)
+        stats.update(cached=False, provider="Gemini", model="m", ttft=0.1, total=0.2)
+        yield "Hello, "
+        yield "world"
+
+    monkeypatch.setattr(summarize_text, "summarize_text_stream", fake_stream)
+    reports = []
+    params = jobs.validate({"url": URL, "lang": "Korean", "extractive_budget": 8000})
+    result = jobs.run_job(params, lambda stage, parts=None, **info: reports.append((stage, "".join(parts or []), info)))
+
+    assert result["summary"] == "Hello, world"
+    assert (result["title"], result["channel"], result["video_id"]) == ("Title", "Channel", "abc123")
+    assert result["chapters"] == [[0.0, "Intro"]] and result["metadata"]["provider"] == "Gemini"
+    assert seen == {"lang": "Korean", "chapters": [(0.0, "Intro")], "video_id": "abc123", "extractive_budget": 8000}
+    assert reports[1] == ("fetching", "", {"title": "Title", "channel": "Channel", "video_id": "abc123"})
+    assert reports[-1][:2] == ("summarizing", "Hello, world")
+    names = [span["name"] for span in result["trace"]["spans"]]
+    assert "prefetch.metadata" in names and result["trace"]["duration"] is not None
+    assert "prefetch.thumbnail" not in names and thumbnails == []
+    assert tracing.Trace.from_dict(result["trace"]).breakdown()[0]["depth"] == 0
+
+
+def test_progress_is_throttled(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.submit({})
+    queue.claim("w")
+    progress = jobs.Progress(queue, job_id, "w", interval=60)
+    parts = []
+    progress("summarizing", parts=parts)
+    parts.append("Hi")
+    progress("summarizing", parts=parts)   # 간격 안: 기록하지 않음
+    assert queue.get(job_id)["progress"] == {"stage": "summarizing", "partial": ""}
+    progress("done", parts=parts)           # 단계가 바뀌면 바로 기록
+    assert queue.get(job_id)["progress"] == {"stage": "done", "partial": "Hi"}
+
+
+def test_http_api_and_client(tmp_path, monkeypatch):
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"))
+    release = threading.Event()
+
+    def fake_run(params, report):
+        report("summarizing", parts=["partial"])
+        release.wait(5)
+        if params["lang"] == "Broken":
+            raise RuntimeError("no transcript")
+        return {"summary": f"summary of {params['url']}"}
+
+    monkeypatch.setattr(jobs, "run_job", fake_run)
+    httpd = jobs.make_server(queue, port=0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    client = jobs.JobClient(f"http://127.0.0.1:{httpd.server_address[1]}/")
+    try:
+        with pytest.raises(ValueError):
+            client.submit("not a url")
+        job_id = client.submit(URL, lang="Korean")
+        assert client.status(job_id)["status"] == "queued"
+        assert client.result(job_id) is None
+
+        worker = threading.Thread(target=jobs.work_one, args=(queue, "test"))
+        worker.start()
+        deadline = time.monotonic() + 5
+        while client.status(job_id)["progress"].get("partial") != "partial":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert client.status(job_id)["status"] == "running"
+        release.set()
+        worker.join()
+
+        states = [job["status"] for job in client.wait(job_id, poll_interval=0.01, timeout=5)]
+        assert states[-1] == "done"
+        assert client.result(job_id) == {"summary": f"summary of {URL}"}
+
+        broken = client.submit(URL, lang="Broken")
+        jobs.work_one(queue, "test")
+        with pytest.raises(RuntimeError, match="no transcript"):
+            client.result(broken)
+        failed = http_client.get(f"{client.base_url}/jobs/{broken}/result")
+        assert failed.status_code == 409 and failed.json()["status"] == "error"
+        with pytest.raises(KeyError):
+            client.status("f" * 32)
+        metrics = http_client.get(client.base_url + "/metrics")
+        assert metrics.status_code == 200 and 'yts_jobs_total{status="error"}' in metrics.text
+        assert http_client.get(client.base_url + "/healthz").json()["done"] == 1
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_worker_process_records_failures(tmp_path):
+    # 실제 워커 프로세스 (spawn): 잘못된 URL은 네트워크 없이 바로 실패한다
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = jobs.JobQueue(path)
+    job_id = queue.submit(dict(jobs.validate({"url": URL}), url="not a url"))
+    processes = jobs.start_workers(1, path)
+    try:
+        deadline = time.monotonic() + 30
+        while queue.get(job_id)["status"] in ("queued", "running"):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        # 워커 프로세스의 지표는 큐 DB를 거쳐 API 서버의 /metrics에 합쳐진다
+        while not queue.metrics().value("jobs", status="error"):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        for process in processes:
+            process.terminate()
+    job = queue.get(job_id)
+    assert job["status"] == "error" and "ValueError" in job["error"]
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pipeline
+import tracing
+from transcript import Transcript
+
+URL = "https://www.youtube.com/watch?v=abc123"
+
+
+def _fake_stages(monkeypatch, delays, fail=()):
+    calls = []
+    lock = threading.Lock()
+
+    def stage(name, value):
+        def run(*args):
+            with lock:
+                calls.append(name)
+            time.sleep(delays[name])
+            if name in fail:
+                raise RuntimeError(f"{name} failed")
+            return value
+        return run
+
+    transcript = Transcript([0.0, 5.0], [5.0, 5.0], ["hello", "world"])
+    monkeypatch.setattr(pipeline, "extract_metadata", stage("metadata", ("Title", "Channel")))
+    monkeypatch.setattr(pipeline, "get_thumbnail", stage("thumbnail", b"jpeg"))
+    monkeypatch.setattr(pipeline, "_transcript_stage", stage("transcript", (transcript, [(0.0, "Intro")])))
+    return calls
+
+
+def test_prefetch_runs_stages_concurrently(monkeypatch):
+    _fake_stages(monkeypatch, {"metadata": 0.2, "thumbnail": 0.2, "transcript": 0.2})
+    started = time.perf_counter()
+    prefetch = pipeline.Prefetch(URL)
+
+    assert prefetch.result("metadata") == ("Title", "Channel")
+    assert prefetch.result("thumbnail") == b"jpeg"
+    transcript, chapters = prefetch.result("transcript")
+
+    assert time.perf_counter() - started < 0.5  # 순차 실행이면 0.6초 이상
+    assert transcript.text == "hello world"
+    assert chapters == [(0.0, "Intro")]
+    assert set(prefetch.timings) == set(pipeline.STAGES)
+    assert all(t >= 0.15 for t in prefetch.timings.values())
+
+
+def test_prefetch_yields_stages_in_completion_order(monkeypatch):
+    _fake_stages(monkeypatch, {"metadata": 0.05, "thumbnail": 0.3, "transcript": 0.15})
+    prefetch = pipeline.Prefetch(URL)
+
+    order = []
+    for stage in prefetch.as_completed():
+        order.append(stage)
+        if prefetch.done("metadata") and prefetch.done("transcript"):
+            break
+    # 썸네일을 기다리지 않고 요약을 시작할 수 있다
+    assert order == ["metadata", "transcript"]
+    assert "thumbnail" not in prefetch.timings
+
+    assert list(prefetch.as_completed()) == ["thumbnail"]
+    assert prefetch.ready() == []
+
+
+def test_prefetch_ready_does_not_block(monkeypatch):
+    _fake_stages(monkeypatch, {"metadata": 0.0, "thumbnail": 0.5, "transcript": 0.0})
+    prefetch = pipeline.Prefetch(URL)
+    prefetch.result("metadata")
+    prefetch.result("transcript")
+
+    started = time.perf_counter()
+    assert prefetch.ready() == ["metadata", "transcript"]
+    assert prefetch.ready() == []
+    assert time.perf_counter() - started < 0.1
+
+
+def test_prefetch_runs_only_requested_stages(monkeypatch):
+    calls = _fake_stages(monkeypatch, {"metadata": 0.0, "thumbnail": 0.0, "transcript": 0.0})
+    prefetch = pipeline.Prefetch(URL, stages=("metadata", "transcript"))
+    assert sorted(prefetch.as_completed()) == ["metadata", "transcript"]
+    assert "thumbnail" not in calls and set(prefetch.futures) == {"metadata", "transcript"}
+
+
+def test_prefetch_stage_error_is_raised_from_result(monkeypatch):
+    _fake_stages(monkeypatch, {"metadata": 0.0, "thumbnail": 0.0, "transcript": 0.0}, fail={"transcript"})
+    prefetch = pipeline.Prefetch(URL)
+
+    assert prefetch.result("metadata") == ("Title", "Channel")
+    try:
+        prefetch.result("transcript")
+    except RuntimeError as e:
+        assert "transcript failed" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
+    assert "transcript" in prefetch.timings
+
+
+def test_prefetch_stages_are_traced(monkeypatch):
+    _fake_stages(monkeypatch, {"metadata": 0.01, "thumbnail": 0.01, "transcript": 0.01})
+    with tracing.trace("request") as t:
+        prefetch = pipeline.Prefetch(URL)
+        for stage in pipeline.STAGES:
+            prefetch.result(stage)
+
+    names = {row["name"] for row in t.breakdown() if row["depth"] == 0}
+    assert {"prefetch.metadata", "prefetch.thumbnail", "prefetch.transcript"} <= names
+    assert "transcript.compact" in t.totals()
+
+
+def test_prefetch_indexes_after_transcript_without_refetching(monkeypatch):
+    calls = _fake_stages(monkeypatch, {"metadata": 0.0, "thumbnail": 0.0, "transcript": 0.0})
+    indexed = []
+    release = threading.Event()
+
+    def fake_index(video_id, transcript, chapters, title, channel, compacted):
+        release.wait(5)
+        indexed.append((video_id, transcript.text, title, channel, compacted))
+
+    monkeypatch.setattr(pipeline, "index_transcript", fake_index)
+    prefetch = pipeline.Prefetch(URL)
+    # 색인이 끝나지 않아도 자막은 바로 받는다
+    transcript, _ = prefetch.result("transcript")
+    assert not prefetch.indexing.done()
+    release.set()
+    prefetch.indexing.result(5)
+    assert indexed == [("abc123", transcript.text, "Title", "Channel", True)]
+    assert calls.count("metadata") == 1
@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import providers
+import tracing
+from providers import Prompt
+
+
+def test_prompt_is_a_plain_string():
+    prompt = Prompt("prefix ", "suffix")
+    assert prompt == "prefix suffix" and isinstance(prompt, str)
+    assert (prompt.prefix, prompt.suffix) == ("prefix ", "suffix")
+
+
+def test_anthropic_prefix_gets_cache_control(monkeypatch):
+    sent = {}
+
+    async def create(**kwargs):
+        sent.update(kwargs)
+        usage = SimpleNamespace(input_tokens=10, output_tokens=5, cache_read_input_tokens=900,
+                                cache_creation_input_tokens=0)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="ok")], usage=usage)
+
+    client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    monkeypatch.setattr(providers, "get_client", lambda api_choice: client)
+
+    with tracing.trace("request") as t:
+        assert providers.run(providers.complete("Anthropic", Prompt("transcript", " task"))) == "ok"
+    assert sent["messages"][0]["content"] == [
+        {"type": "text", "text": "transcript", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": " task"},
+    ]
+    assert t.counters['llm_prompt_tokens{provider="Anthropic"}'] == 910
+    assert t.counters['llm_cached_prompt_tokens{provider="Anthropic"}'] == 900
+
+    # 나눌 수 없는 일반 문자열은 그대로
+    providers.run(providers.complete("Anthropic", "plain"))
+    assert sent["messages"][0]["content"] == "plain"
+
+
+def test_cached_tokens_from_usage():
+    openai = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=3,
+                                                   prompt_tokens_details=SimpleNamespace(cached_tokens=64)))
+    assert providers.cached_tokens("OpenAI", openai) == 64
+    gemini = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=50, candidates_token_count=2,
+                                                            cached_content_token_count=40))
+    assert providers.cached_tokens("Gemini", gemini) == 40
+    assert providers.cached_tokens("x.ai", SimpleNamespace(usage=SimpleNamespace(prompt_tokens=1))) is None
+    assert providers.cached_tokens("Gemini", SimpleNamespace()) is None
+
+
+def test_gemini_long_prefix_uses_cached_content(monkeypatch):
+    created = []
+    models = []
+
+    class FakeModel:
+        @staticmethod
+        def from_cached_content(cached):
+            models.append(cached)
+            return "cached-model"
+
+    def fake_cached_content(prefix):
+        created.append(prefix)
+        return "cache-1"
+
+    monkeypatch.setattr(providers, "_gemini_cached_content", fake_cached_content)
+    monkeypatch.setattr(providers, "load_sdk", lambda api_choice: SimpleNamespace(GenerativeModel=FakeModel))
+    monkeypatch.setattr(providers, "GEMINI_CACHE_MIN_TOKENS", 10)
+
+    long_prompt = Prompt("word " * 100, "task")
+    assert asyncio.run(providers._gemini_target("client", long_prompt)) == ("cached-model", "task")
+    assert created == ["word " * 100] and models == ["cache-1"]
+    # 짧은 앞부분이나 일반 문자열은 캐시 없이 전체를 보낸다
+    assert asyncio.run(providers._gemini_target("client", Prompt("short", "task"))) == ("client", "shorttask")
+    assert asyncio.run(providers._gemini_target("client", "plain")) == ("client", "plain")
+
+
+def test_gemini_cache_failure_is_remembered(monkeypatch):
+    import google.generativeai.caching as caching
+
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise RuntimeError("caching not supported")
+
+    monkeypatch.setattr(caching.CachedContent, "create", create)
+    monkeypatch.setattr(providers, "_gemini_caches", {})
+    assert providers._gemini_cached_content("prefix") is None
+    assert providers._gemini_cached_content("prefix") is None
+    assert len(calls) == 1 and calls[0]["model"] == providers.GEMINI_CACHE_MODEL
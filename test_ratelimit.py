@@ -0,0 +1,194 @@
+import asyncio
+import threading
+
+import pytest
+
+import providers
+import ratelimit
+from chunking import input_budget
+from ratelimit import AdaptiveConcurrency, MemoryBackend, RateLimiter, SQLiteBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_request_bucket_waits_after_burst():
+    clock = FakeClock()
+    limiter = RateLimiter("p:m", rpm=60, tpm=1_000_000, clock=clock)  # 초당 1개, 용량 10
+    waits = [limiter.reserve(1) for _ in range(12)]
+    assert waits[:10] == [0.0] * 10
+    assert waits[10] == pytest.approx(1.0) and waits[11] == pytest.approx(2.0)
+
+    clock.now += 5.0
+    assert limiter.reserve(1) == pytest.approx(0.0)
+
+
+def test_token_bucket_reserves_prompt_tokens():
+    clock = FakeClock()
+    limiter = RateLimiter("p:m", rpm=1000, tpm=600, clock=clock)  # 초당 10토큰, 용량 600 (1분치)
+    assert limiter.reserve(500) == 0.0
+    assert limiter.reserve(120) == pytest.approx(2.0)  # 잔량 -20 -> 2초
+    clock.now += 2.0
+    assert limiter.reserve(0) == pytest.approx(0.0)
+
+
+def test_single_request_under_budget_does_not_wait():
+    # 한가한 프로세스: 분당 한도 안의 요청, 그리고 용량보다 큰 프롬프트(용량만큼만 뺀다)도 바로 나간다
+    clock = FakeClock()
+    limiter = RateLimiter("p:m", rpm=50, tpm=40_000, clock=clock)
+    assert limiter.reserve(39_000) == 0.0
+
+    for api_choice in ratelimit.RATE_LIMITS:
+        ratelimit.set_backend(MemoryBackend())
+        limiter = ratelimit.get_limiter(api_choice, "m")
+        limiter.clock = clock
+        assert limiter.token_capacity == ratelimit.limits_for(api_choice)["tpm"]
+        assert limiter.reserve(input_budget(api_choice)) == 0.0, api_choice
+    ratelimit.set_backend(None)
+
+
+def test_concurrent_large_requests_are_spread_out():
+    # 1분치(40,000) 용량에 24,000토큰 요청 여러 개: 한꺼번에 들어가지 않고 분당 한도에 맞춰 퍼진다
+    clock = FakeClock()
+    limiter = RateLimiter("Anthropic:m", rpm=50, tpm=40_000, clock=clock)
+    waits = [limiter.reserve(24_000) for _ in range(5)]
+    assert waits[0] == 0.0
+    assert all(0 < wait for wait in waits[1:])
+    assert waits == sorted(waits)
+    assert waits[1] == pytest.approx(12.0)          # 잔량 -8,000 / 초당 666.7
+    assert waits[4] == pytest.approx(120.0)          # 5 * 24,000 - 40,000 = 80,000토큰 밀림
+
+    # 용량보다 큰 요청은 용량만큼만 빼서 다음 요청이 영원히 밀리지 않는다
+    clock.now += 600
+    assert limiter.reserve(192_000) == 0.0
+    assert limiter.reserve(6_000) == pytest.approx(9.0)
+
+
+def test_sqlite_acquire_runs_in_a_thread(tmp_path, monkeypatch):
+    limiter = RateLimiter("p:m", 600, 600_000, SQLiteBackend(str(tmp_path / "limits.sqlite3")))
+    threads = []
+    reserve = limiter.reserve
+
+    def spy(tokens):
+        threads.append(threading.current_thread())
+        return reserve(tokens)
+
+    monkeypatch.setattr(limiter, "reserve", spy)
+    assert asyncio.run(limiter.acquire(10)) == 0.0
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_pause_is_shared_through_sqlite(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "limits.sqlite3")
+    first = RateLimiter("OpenAI:m", 600, 600_000, SQLiteBackend(path), clock=clock)
+    second = RateLimiter("OpenAI:m", 600, 600_000, SQLiteBackend(path), clock=clock)
+
+    assert first.reserve(10) == 0.0
+    first.pause(3.0)
+    assert second.reserve(10) == pytest.approx(3.0)
+
+    clock.now += 3.0
+    assert second.reserve(10) == 0.0
+
+
+def test_aimd_halves_on_throttle_and_recovers():
+    concurrency = AdaptiveConcurrency(8)
+    concurrency.on_throttle()
+    assert concurrency.limit == 4
+    concurrency.on_throttle()
+    concurrency.on_throttle()
+    concurrency.on_throttle()
+    assert concurrency.limit == 1  # min_limit
+    for _ in range(20):
+        concurrency.on_success()
+    assert 5 < concurrency.limit < 8
+    for _ in range(100):
+        concurrency.on_success()
+    assert concurrency.limit == 8
+
+
+def test_aimd_bounds_in_flight():
+    concurrency = AdaptiveConcurrency(3)
+    concurrency.on_throttle()  # 1.5 -> 동시 1개
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        async with concurrency:
+            peak = max(peak, concurrency.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(job() for _ in range(4)))
+
+    asyncio.run(main())
+    assert peak == 1
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after}})()
+
+
+def test_complete_retries_after_429(monkeypatch):
+    calls = []
+    sleeps = []
+
+    async def fake_request(api_choice, prompt):
+        calls.append(api_choice)
+        if len(calls) == 1:
+            raise FakeRateLimitError("0.05")
+        return "ok"
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(providers, "_request", fake_request)
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", fake_sleep)
+
+    async def main():
+        text = await providers.complete("OpenAI", "hello")
+        return text, providers.get_semaphore("OpenAI").limit
+
+    reserved = []
+    limiter = ratelimit.get_limiter("OpenAI", providers.MODELS["OpenAI"])
+    reserve = limiter.reserve
+    monkeypatch.setattr(limiter, "reserve", lambda tokens: reserved.append(tokens) or reserve(tokens))
+
+    text, limit = asyncio.run(main())
+    assert text == "ok" and len(calls) == 2
+    assert reserved == [providers.estimate_tokens("hello"), 0]  # 재시도는 토큰을 다시 빼지 않는다
+    assert sleeps and 0 < sleeps[0] <= 0.05  # retry-after만큼 기다렸다
+    assert limit < providers.MAX_CONCURRENCY["OpenAI"]
+
+
+def test_complete_gives_up_after_retries(monkeypatch):
+    async def always_limited(api_choice, prompt):
+        raise FakeRateLimitError("0")
+
+    monkeypatch.setattr(providers, "_request", always_limited)
+    with pytest.raises(FakeRateLimitError):
+        asyncio.run(providers.complete("Gemini", "hello"))
+
+
+def test_non_rate_limit_errors_are_not_retried(monkeypatch):
+    calls = []
+
+    async def broken(api_choice, prompt):
+        calls.append(1)
+        raise RuntimeError("500")
+
+    monkeypatch.setattr(providers, "_request", broken)
+    with pytest.raises(RuntimeError):
+        asyncio.run(providers.complete("Gemini", "hello"))
+    assert calls == [1]
+    assert ratelimit.rate_limit_info(RuntimeError()) == (False, None)
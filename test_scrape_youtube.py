@@ -0,0 +1,246 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import scrape_youtube
+import tracing
+from scrape_youtube import WatchPage, get_watch_page, extract_metadata, get_transcript
+
+
+PLAYER_RESPONSE = {
+    "videoDetails": {
+        "shortDescription": "Intro text\n0:00 Intro\n1:24 Main topic\n10:11 Outro",
+    },
+    "playerOverlays": {"playerOverlayRenderer": {"decoratedPlayerBarRenderer": {"decoratedPlayerBarRenderer": {
+        "playerBar": {"chapteredPlayerBarRenderer": {"chapters": [
+            {"title": {"simpleText": "Intro"}, "timeRangeStartMillis": 0},
+            {"title": {"simpleText": "Main"}, "timeRangeStartMillis": 84000},
+        ]}}
+    }}}},
+}
+
+WATCH_HTML = f"""<html><head>
+<title>Test video - YouTube</title>
+<link itemprop="name" content="Test Channel">
+<meta itemprop="description" content="short">
+</head><body>
+<script>var ytInitialPlayerResponse = {json.dumps(PLAYER_RESPONSE)};</script>
+</body></html>"""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+def test_watch_page_parses_all_sources():
+    page = WatchPage("https://www.youtube.com/watch?v=abc", html=WATCH_HTML)
+    assert page.title == "Test video - YouTube"
+    assert page.channel == "Test Channel"
+    assert page.chapters_from_player_response() == [(0.0, "Intro"), (84.0, "Main")]
+    assert page.chapters_from_description() == [
+        (0.0, "Intro"), (84.0, "Main topic"), (611.0, "Outro"),
+    ]
+
+
+def test_watch_page_fetched_once_per_video(monkeypatch):
+    calls = []
+
+    def fake_get(url, *args, **kwargs):
+        calls.append(url)
+        return FakeResponse(WATCH_HTML)
+
+    monkeypatch.setattr(scrape_youtube.http_client, "get", fake_get)
+    monkeypatch.setattr(scrape_youtube, "_watch_pages", scrape_youtube.OrderedDict())
+    monkeypatch.setattr(
+        scrape_youtube, "fetch_transcript",
+        lambda video_id, languages=None, page=None: [{"text": "hello"}, {"text": "world"}],
+    )
+
+    url = "https://www.youtube.com/watch?v=abc&t=10"
+    extract_metadata(url)
+    transcript, chapters = get_transcript("abc", url)
+
+    assert transcript == "hello world"
+    assert chapters == [(0.0, "Intro"), (84.0, "Main")]
+    assert get_watch_page(url) is get_watch_page("https://www.youtube.com/watch?v=abc")
+    assert calls == ["https://www.youtube.com/watch?v=abc"]
+
+
+def test_watch_page_concurrent_access_fetches_once(monkeypatch):
+    calls = []
+    barrier = threading.Barrier(4)
+
+    def fake_get(url, *args, **kwargs):
+        calls.append(url)
+        return FakeResponse(WATCH_HTML)
+
+    monkeypatch.setattr(scrape_youtube.http_client, "get", fake_get)
+    page = WatchPage("https://www.youtube.com/watch?v=abc")
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append((page.title, page.chapters_from_player_response()))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [("Test video - YouTube", [(0.0, "Intro"), (84.0, "Main")])] * 4
+
+
+def test_extract_initial_json_ignores_brace_semicolon_in_strings():
+    player = {"videoDetails": {"shortDescription": "code: function(){};"}}
+    data = {"playerOverlays": {"playerOverlayRenderer": {"decoratedPlayerBarRenderer": {"decoratedPlayerBarRenderer": {
+        "playerBar": {"multiMarkersPlayerBarRenderer": {"markersMap": [{"key": "DESCRIPTION_CHAPTERS", "value": {
+            "chapters": [{"chapterRenderer": {"title": {"simpleText": "Start"}, "timeRangeStartMillis": 0}},
+                         {"chapterRenderer": {"title": {"simpleText": "End"}, "timeRangeStartMillis": 3723000}}],
+        }}]}}
+    }}}}}
+    html = (
+        f"<script>var ytInitialPlayerResponse = {json.dumps(player)};var x = 1;</script>"
+        f'<script>window["ytInitialData"] = {json.dumps(data)};</script>'
+    )
+
+    found = scrape_youtube.extract_initial_json(html)
+    assert found["ytInitialPlayerResponse"] == player
+    assert found["ytInitialData"] == data
+
+    page = WatchPage("https://www.youtube.com/watch?v=abc", html=html)
+    assert page.description == "code: function(){};"
+    assert page.chapters() == [(0.0, "Start"), (3723.0, "End")]
+
+
+def test_disk_cache_skips_network_on_rerun(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_get(url, *args, **kwargs):
+        calls.append(url)
+        return FakeResponse(WATCH_HTML)
+
+    def fake_fetch_transcript(video_id, languages=None, page=None):
+        page.html
+        return [{"text": "hello", "start": 0.0, "duration": 1.0}]
+
+    monkeypatch.setattr(scrape_youtube.http_client, "get", fake_get)
+    monkeypatch.setattr(scrape_youtube, "fetch_transcript", fake_fetch_transcript)
+    scrape_youtube.cache.set_cache(scrape_youtube.cache.DiskCache(str(tmp_path / "c.sqlite3")))
+
+    url = "https://www.youtube.com/watch?v=abc"
+    for _ in range(2):
+        monkeypatch.setattr(scrape_youtube, "_watch_pages", scrape_youtube.OrderedDict())
+        assert extract_metadata(url) == ("Test video - YouTube", "Test Channel")
+        assert get_transcript("abc", url) == ("hello", [(0.0, "Intro"), (84.0, "Main")])
+    assert len(calls) == 1
+
+
+def test_failed_metadata_lookup_is_cached_briefly(monkeypatch, tmp_path):
+    now = [1000.0]
+    pages = ["<html><body>consent</body></html>", WATCH_HTML]
+    monkeypatch.setattr(scrape_youtube.http_client, "get", lambda url, *args, **kwargs: FakeResponse(pages.pop(0)))
+    monkeypatch.setattr(scrape_youtube.cache, "_default_cache",
+                        scrape_youtube.cache.DiskCache(str(tmp_path / "c.sqlite3"), clock=lambda: now[0]))
+
+    url = "https://www.youtube.com/watch?v=abc"
+    for _ in range(2):
+        monkeypatch.setattr(scrape_youtube, "_watch_pages", scrape_youtube.OrderedDict())
+        assert extract_metadata(url) == (None, None)  # 실패도 잠깐은 캐시에서
+    now[0] += scrape_youtube.FAILED_LOOKUP_TTL + 1
+    monkeypatch.setattr(scrape_youtube, "_watch_pages", scrape_youtube.OrderedDict())
+    assert extract_metadata(url) == ("Test video - YouTube", "Test Channel")
+    assert pages == []
+
+
+class FakeTranscriptList:
+    def find_transcript(self, languages):
+        return self
+
+    def fetch(self):
+        return [{"text": "fallback", "start": 0.0, "duration": 1.0}]
+
+
+def test_fetch_transcript_falls_back_only_for_consent_or_library_changes(monkeypatch):
+    from youtube_transcript_api._errors import TranscriptsDisabled
+    from youtube_transcript_api._transcripts import TranscriptListFetcher
+
+    fetched = []
+    monkeypatch.setattr(
+        TranscriptListFetcher, "fetch", lambda self, video_id: fetched.append(video_id) or FakeTranscriptList(),
+    )
+    page = WatchPage("https://www.youtube.com/watch?v=abc", html=WATCH_HTML)
+
+    # 진짜 오류는 숨기지 않는다 (페이지를 다시 받지도 않는다)
+    def disabled(self, html, video_id):
+        raise TranscriptsDisabled(video_id)
+
+    monkeypatch.setattr(TranscriptListFetcher, "_extract_captions_json", disabled)
+    with pytest.raises(TranscriptsDisabled):
+        scrape_youtube.fetch_transcript("abc", page=page)
+    assert fetched == []
+
+    # 라이브러리 내부 API가 바뀌면 기본 경로로 (지표에 남김)
+    monkeypatch.delattr(TranscriptListFetcher, "_extract_captions_json")
+    before = tracing.get_metrics().value("transcript_shared_page_unsupported")
+    assert scrape_youtube.fetch_transcript("abc", page=page)[0]["text"] == "fallback"
+    assert tracing.get_metrics().value("transcript_shared_page_unsupported") == before + 1
+
+    # 동의 페이지는 라이브러리가 쿠키를 만들어 다시 받는다
+    consent = WatchPage("https://www.youtube.com/watch?v=abc", html=f"<form {scrape_youtube.CONSENT_FORM}></form>")
+    assert scrape_youtube.fetch_transcript("abc", page=consent)[0]["text"] == "fallback"
+    assert fetched == ["abc", "abc"]
+
+
+class ThumbnailHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if "maxresdefault" in self.path:
+            status, body, headers = 404, b"", []
+        elif self.headers.get("If-None-Match") == '"v1"':
+            status, body, headers = 304, b"", [("ETag", '"v1"')]
+        else:
+            status, body, headers = 200, b"\xff\xd8jpeg-bytes", [("ETag", '"v1"')]
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_thumbnail_bytes_fallback_and_revalidation(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ThumbnailHandler)
+    httpd.requests = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        base = f"http://127.0.0.1:{httpd.server_address[1]}"
+        monkeypatch.setattr(scrape_youtube, "THUMBNAIL_URL", base + "/vi/{video_id}/{name}.jpg")
+        monkeypatch.setattr(scrape_youtube, "_thumbnails", scrape_youtube.cache.MemoryLRUCache(1024, scrape_youtube._thumbnail_size))
+
+        assert scrape_youtube.get_thumbnail("abc") == b"\xff\xd8jpeg-bytes"
+        assert [path for path, _ in httpd.requests] == ["/vi/abc/maxresdefault.jpg", "/vi/abc/hqdefault.jpg"]
+
+        # 신선한 동안은 네트워크 요청 없음
+        assert scrape_youtube.get_thumbnail("abc") == b"\xff\xd8jpeg-bytes"
+        assert len(httpd.requests) == 2
+
+        # 만료 후에는 ETag로 조건부 요청 -> 304 -> 캐시된 bytes 재사용
+        monkeypatch.setattr(scrape_youtube, "THUMBNAIL_FRESH", 0)
+        assert scrape_youtube.get_thumbnail("abc") == b"\xff\xd8jpeg-bytes"
+        assert httpd.requests[-1] == ("/vi/abc/hqdefault.jpg", '"v1"')
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,113 @@
+import sqlite3
+import time
+
+import pytest
+
+import scrape_youtube
+import search_index
+from search_index import SearchIndex, build_query, tokenize
+from transcript import Transcript
+
+
+def _transcript(texts, step=10.0):
+    return Transcript([i * step for i in range(len(texts))], [step] * len(texts), texts)
+
+
+def test_tokenize_uses_bigrams_for_korean():
+    assert tokenize("캐시를 Caching 돈") == ["캐시", "시를", "caching", "돈"]
+    assert build_query("캐시 latency") == '"캐시" AND "latency"'
+    assert build_query("돈") == '"돈"*'
+    assert build_query("  ") == ""
+
+
+def test_search_returns_video_chapter_and_timestamp(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    transcript = _transcript([
+        "welcome to the show", "today we talk about latency", "and some numbers",
+        "이번에는 캐시를 설명합니다", "캐시와 데이터베이스", "마무리",
+    ])
+    index.add_transcript("vid1", transcript, [(0.0, "Intro"), (30.0, "캐시 이야기")],
+                         title="Caching deep dive", channel="Ch")
+
+    results = index.search("캐시")
+    segments = [r for r in results if r["kind"] == "segment"]
+    assert segments and segments[0]["label"] == "캐시 이야기"
+    assert segments[0]["start"] == 30.0
+    assert segments[0]["link"] == "https://www.youtube.com/watch?v=vid1&t=30s"
+    assert segments[0]["title"] == "Caching deep dive"
+    assert {r["kind"] for r in results} == {"segment", "chapter"}
+
+    latency = index.search("latency", kinds=["segment"])
+    assert [(r["label"], r["timestamp"]) for r in latency] == [("Intro", "0:00")]
+    assert index.search("데이터베이스")[0]["text"] == "이번에는 캐시를 설명합니다 캐시와 데이터베이스 마무리"
+    assert index.search("nothing here") == []
+
+
+def test_reindex_replaces_postings_and_summaries(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.add_transcript("vid1", _transcript(["old words"]))
+    index.add_transcript("vid1", _transcript(["new words"]))
+    assert index.search("old") == []
+    assert len(index.search("new")) == 1
+
+    index.add_summary("vid1", "first summary about budgets", label="Gemini")
+    index.add_summary("vid1", "second summary about budgets", label="Gemini")
+    index.add_summary("vid1", "third summary about budgets", label="OpenAI")
+    summaries = index.search("budgets", kinds=["summary"])
+    assert sorted(r["text"] for r in summaries) == ["second summary about budgets", "third summary about budgets"]
+    assert index.stats() == {"videos": 1, "postings": {"segment": 1, "summary": 2}}
+
+
+def test_index_transcript_adds_each_video_once(monkeypatch, tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    search_index.set_index(index)
+    monkeypatch.setattr(scrape_youtube, "_watch_pages", scrape_youtube.OrderedDict())
+    monkeypatch.setattr(scrape_youtube, "extract_metadata", lambda url: pytest.fail("metadata fetched"))
+    monkeypatch.setattr(scrape_youtube, "extract_chapters_from_html", lambda url: [])
+    monkeypatch.setattr(scrape_youtube, "extract_chapters_from_description", lambda url: [])
+    def fake_fetch(video_id, languages=None, page=None):
+        return [{"text": "searchable sentence", "start": 0.0, "duration": 2.0}]
+
+    monkeypatch.setattr(scrape_youtube, "fetch_transcript", fake_fetch)
+
+    # 호환용 get_transcript는 호출한 스레드에서 메타데이터를 받거나 색인하지 않는다
+    url = "https://www.youtube.com/watch?v=abc"
+    assert scrape_youtube.get_transcript("abc", url)[0] == "searchable sentence"
+    assert index.search("searchable") == []
+
+    transcript, chapters = scrape_youtube.get_transcript_segments("abc", url)
+    scrape_youtube.index_transcript("abc", transcript, chapters, "Title", "Channel")
+    scrape_youtube.index_transcript("abc", transcript, chapters, "Title", "Channel")
+    results = index.search("searchable")
+    assert len(results) == 1 and results[0]["title"] == "Title"
+
+
+def test_search_is_fast_on_large_index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    words = ["alpha", "beta", "gamma", "delta", "캐시", "지연", "서버", "요약"]
+    for v in range(200):
+        texts = [f"{words[(v + i) % 8]} {words[(v * i) % 8]} segment {i}" for i in range(200)]
+        index.add_transcript(f"v{v}", _transcript(texts, step=3.0))
+    index.add_transcript("needle", _transcript(["a unique zeppelin mention"]))
+
+    started = time.perf_counter()
+    results = index.search("zeppelin")
+    assert time.perf_counter() - started < 0.05
+    assert results[0]["video_id"] == "needle"
+
+
+def test_reads_do_not_wait_for_writers(tmp_path):
+    path = str(tmp_path / "search.sqlite3")
+    index = SearchIndex(path)
+    index.add_transcript("vid1", _transcript(["hello world"]))
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")  # 다른 프로세스가 쓰는 중
+    try:
+        started = time.perf_counter()
+        assert index.has_transcript("vid1") and not index.has_transcript("vid2")
+        assert index.search("hello")[0]["video_id"] == "vid1"
+        assert index.stats()["videos"] == 1
+        assert time.perf_counter() - started < 1.0
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
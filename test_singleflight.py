@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cache
+import providers
+import scrape_youtube
+import singleflight
+import summarize_text
+
+
+def test_concurrent_callers_share_one_call():
+    group = singleflight.Group()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: group.do("k", compute), range(8)))
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    assert group.in_flight() == 0
+    # 끝난 뒤의 호출은 다시 실행한다 (결과 보관은 캐시의 몫)
+    assert group.do("k", compute) == "value" and len(calls) == 2
+
+
+def test_error_is_shared_and_not_remembered():
+    group = singleflight.Group()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            group.do("k", fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert errors == ["boom", "boom"]
+    assert group.do("k", lambda: "ok") == "ok"
+
+
+def test_processes_coalesce_through_lease_and_shared_cache(tmp_path):
+    # 같은 lease 파일과 디스크 캐시를 쓰는 두 Group = 두 프로세스
+    leases = str(tmp_path / "leases.sqlite3")
+    disk_cache = cache.DiskCache(str(tmp_path / "c.sqlite3"))
+    first = singleflight.Group(singleflight.LeaseStore(leases), poll_interval=0.01)
+    second = singleflight.Group(singleflight.LeaseStore(leases), poll_interval=0.01)
+    lookup = lambda: disk_cache.get("k", singleflight.MISSING)
+    entered = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute(name):
+        def run():
+            calls.append(name)
+            entered.set()
+            release.wait(5)
+            disk_cache.set("k", f"from {name}")
+            return f"from {name}"
+        return run
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        a = pool.submit(first.do, "k", compute("first"), lookup)
+        entered.wait(5)
+        b = pool.submit(second.do, "k", compute("second"), lookup)
+        time.sleep(0.1)
+        assert not b.done()
+        release.set()
+        assert a.result() == b.result() == "from first"
+    assert calls == ["first"]
+    assert not singleflight.LeaseStore(leases).held("k")
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    now = [1000.0]
+    leases = singleflight.LeaseStore(str(tmp_path / "leases.sqlite3"), clock=lambda: now[0])
+    assert leases.acquire("k", "dead-process", ttl=60)
+    assert not leases.acquire("k", "other", ttl=60)
+    assert leases.held("k")
+    now[0] += 61
+    assert not leases.held("k")
+    assert leases.acquire("k", "other", ttl=60)
+    leases.release("k", "dead-process")  # 이미 넘어간 lease는 지우지 않는다
+    assert leases.held("k")
+
+
+def test_share_streams_parts_to_late_joiners():
+    group = singleflight.Group()
+    calls = []
+
+    async def produce(publish):
+        calls.append(1)
+        for part in ("a", "b", "c"):
+            await asyncio.sleep(0.02)
+            publish(part)
+        return "abc"
+
+    async def consume(delay):
+        await asyncio.sleep(delay)
+        shared = group.share("k", produce)
+        parts = [part async for part in shared]
+        return parts, shared.value, shared.coalesced
+
+    async def main():
+        return await asyncio.gather(consume(0), consume(0.03), consume(0.05))
+
+    leader, *followers = asyncio.run(main())
+    assert leader == (["a", "b", "c"], "abc", False)
+    assert followers == [(["a", "b", "c"], "abc", True)] * 2
+    assert len(calls) == 1
+
+
+def test_share_keeps_leader_task_until_done():
+    group = singleflight.Group()
+
+    async def produce(publish):
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        shared = group.share("k", produce)
+        running = len(group._tasks)
+        parts = [part async for part in shared]
+        await asyncio.sleep(0)
+        return running, parts, shared.value
+
+    assert asyncio.run(main()) == (1, [], "done")
+    assert not group._tasks
+
+
+def test_identical_summary_requests_make_one_llm_call(monkeypatch, tmp_path):
+    calls = []
+
+    async def fake_stream(api_choice, prompt):
+        calls.append(prompt)
+        for delta in ("Hel", "lo"):
+            await asyncio.sleep(0.05)
+            yield delta
+
+    monkeypatch.setattr(providers, "stream", fake_stream)
+    cache.set_summary_cache(cache.DiskCache(str(tmp_path / "s.sqlite3")))
+
+    def session(_):
+        stats = {}
+        deltas = list(summarize_text.summarize_text_stream("text", api_choice="Anthropic", stats=stats))
+        return "".join(deltas), stats.get("coalesced", False)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(session, range(4)))
+    assert [text for text, _ in results] == ["Hello"] * 4
+    assert sorted(coalesced for _, coalesced in results) == [False, True, True, True]
+    assert len(calls) == 1
+
+
+def test_identical_scrapes_fetch_once(monkeypatch):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return ["Title", "Channel"]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: scrape_youtube._cached("metadata", "vid", compute), range(4)))
+    assert results == [["Title", "Channel"]] * 4
+    assert len(calls) == 1
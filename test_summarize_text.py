@@ -0,0 +1,289 @@
+import asyncio
+
+import cache
+import providers
+import summarize_text
+from summarize_text import summarize_text as summarize, summary_cache_key
+
+
+def _fake_provider(monkeypatch):
+    calls = []
+
+    async def fake_complete(api_choice, prompt):
+        calls.append((api_choice, prompt))
+        return f"summary #{len(calls)}"
+
+    monkeypatch.setattr(providers, "complete", fake_complete)
+    return calls
+
+
+def test_summary_cache_hit_and_metadata(monkeypatch, tmp_path):
+    calls = _fake_provider(monkeypatch)
+    cache.set_summary_cache(cache.DiskCache(str(tmp_path / "s.sqlite3")))
+
+    first, meta1 = summarize("text", lang="ko", title="t", api_choice="OpenAI", return_metadata=True)
+    second, meta2 = summarize("text", lang="ko", title="t", api_choice="OpenAI", return_metadata=True)
+
+    assert first == second == "summary #1"
+    assert (meta1["cached"], meta2["cached"]) == (False, True)
+    assert meta2["model"] == summarize_text.MODELS["OpenAI"]
+    assert len(calls) == 1
+
+
+def test_summary_cache_keyed_on_prompt_and_provider(monkeypatch, tmp_path):
+    calls = _fake_provider(monkeypatch)
+    cache.set_summary_cache(cache.DiskCache(str(tmp_path / "s.sqlite3")))
+
+    summarize("text", lang="en", api_choice="OpenAI")
+    summarize("text", lang="ko", api_choice="OpenAI")
+    summarize("text", lang="en", api_choice="Gemini")
+    summarize("text", lang="en", api_choice="OpenAI", summarize_way="Detailed")
+    assert len(calls) == 4
+
+
+def test_template_change_invalidates(monkeypatch):
+    before = summary_cache_key(summarize_text.build_prompt("text"), "OpenAI")
+    monkeypatch.setattr(summarize_text, "prompt_syukaworld", lambda text, lang, title: "new template " + text)
+    after = summary_cache_key(summarize_text.build_prompt("text"), "OpenAI")
+    assert before != after
+
+
+def test_use_cache_false_opts_out(monkeypatch, tmp_path):
+    calls = _fake_provider(monkeypatch)
+    cache.set_summary_cache(cache.DiskCache(str(tmp_path / "s.sqlite3")))
+
+    summarize("text", api_choice="OpenAI")
+    _, meta = summarize("text", api_choice="OpenAI", use_cache=False, return_metadata=True)
+    assert meta["cached"] is False
+    assert len(calls) == 2
+
+
+def test_prompts_share_a_cacheable_prefix():
+    transcript = "the full transcript " * 50
+    prompts = [
+        summarize_text.build_prompt(transcript, lang="ko", title="[채널] A / B"),
+        summarize_text.build_prompt(transcript, lang="en", summarize_way="Detailed"),
+        summarize_text.build_prompt(transcript, lang="es", chapters=[(0.0, "Intro")], summarize_way="Chapters"),
+        summarize_text.build_prompt(transcript, lang="en", summarize_way="Detailed", chapters="1. Intro"),
+    ]
+    # 모드/언어/챕터가 달라도 앞부분(지시 + 자막)은 같고, 바뀌는 부분은 모두 뒤에 있다
+    assert len({p.prefix for p in prompts}) == 1
+    assert prompts[0].prefix.endswith(f'"""{transcript}"""\n')
+    assert all(p == p.prefix + p.suffix for p in prompts)
+    assert "ko" in prompts[0].suffix and "[A] [B]" in prompts[0].suffix and "ko" not in prompts[0].prefix
+    assert "[0:00] Intro" in prompts[2].suffix and "es" in prompts[2].suffix
+    chunk = summarize_text.chunk_prompt("part text", 0, 3, lang="ko")
+    assert chunk.prefix == summarize_text.transcript_prefix("part text") and "part 1 of 3" in chunk.suffix
+
+
+def test_detailed_prompt_accepts_chapter_tuples():
+    prompt = summarize_text.detailed_prompt("text", chapters=[(0.0, "Intro"), (84.0, "Main")])
+    assert "[0:00] Intro" in prompt and "[1:24] Main" in prompt
+
+
+def test_long_transcript_uses_map_reduce(monkeypatch, tmp_path):
+    import chunking
+
+    calls = _fake_provider(monkeypatch)
+    monkeypatch.setitem(chunking.CONTEXT_TOKENS, "OpenAI", chunking.RESERVED_TOKENS + 2_000)
+    cache.set_summary_cache(cache.DiskCache(str(tmp_path / "s.sqlite3")))
+    text = " ".join(f"sentence number {i}." for i in range(3000))
+
+    summary, meta = summarize(text, api_choice="OpenAI", return_metadata=True)
+    assert meta["map_reduce"] is True
+    assert meta["chunks"] > 1
+    map_calls = [p for _, p in calls if "these notes will be merged" in p]
+    assert len(map_calls) == meta["chunks"]
+    assert all(chunking.estimate_tokens(p) < 2_000 for p in map_calls)
+    assert "Task: Provide the output in this language" in calls[-1][1]
+
+    # reduce 재시도 시 map 단계는 캐시에서
+    calls.clear()
+    _, meta = summarize(text, api_choice="OpenAI", use_cache=True, return_metadata=True)
+    assert meta["cached"] is True
+
+
+def test_map_phase_stops_when_notes_do_not_shrink(monkeypatch):
+    import chunking
+
+    calls = []
+
+    async def echo(api_choice, prompt):
+        # 입력을 그대로 돌려주는 모델: 접어도 메모가 줄지 않는다
+        calls.append(prompt)
+        return str(prompt)
+
+    monkeypatch.setattr(providers, "complete", echo)
+    monkeypatch.setitem(chunking.CONTEXT_TOKENS, "OpenAI", chunking.RESERVED_TOKENS + 2_000)
+    text = " ".join(f"sentence number {i}." for i in range(3000))
+
+    prompt, meta = asyncio.run(summarize_text.map_phase_async(text, api_choice="OpenAI", use_cache=False))
+    assert meta["notes_truncated"] is True and meta["map_rounds"] <= summarize_text.MAP_MAX_ROUNDS
+    assert len(calls) == meta["chunks"] < 50
+    assert chunking.estimate_tokens(prompt) <= 2_000
+    # 앞부분만 남기지 않는다: 청크 메모마다 앞머리가 남는다 (+1은 reduce 프롬프트 자체)
+    assert prompt.count("You are an expert analyst") == meta["chunks"] + 1
+    assert "sentence number 0." in prompt
+
+
+def test_split_text_respects_budget():
+    from chunking import estimate_tokens, split_text
+
+    text = "가나다라마바사 " * 5000 + "word " * 5000
+    chunks = split_text(text, 1000)
+    assert all(estimate_tokens(c) <= 1000 for c in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_chapters_mode_summarizes_each_chapter(monkeypatch):
+    from transcript import Transcript
+
+    calls = _fake_provider(monkeypatch)
+    transcript = Transcript.from_segments([
+        {"text": "intro words", "start": 0.0, "duration": 5.0},
+        {"text": "rates words", "start": 95.0, "duration": 5.0},
+        {"text": "housing words", "start": 1300.0, "duration": 5.0},
+    ])
+    chapters = [(0.0, "Intro"), (95.0, "Rates"), (1260.0, "Housing")]
+
+    summary, meta = summarize(transcript, chapters=chapters, api_choice="OpenAI",
+                              summarize_way="Chapters", return_metadata=True)
+
+    assert meta["per_chapter"] is True and meta["chapters"] == 3
+    assert len(calls) == 3
+    prompts = sorted(p for _, p in calls)
+    assert any("rates words" in p and "intro words" not in p and "[1:35] Rates" in p for p in prompts)
+    assert summary.index("Intro") < summary.index("Rates") < summary.index("Housing")
+    assert "### [21:00 - 21:45] Housing" in summary
+
+
+def test_async_api_runs_summaries_concurrently(monkeypatch):
+    active = []
+    peak = []
+
+    async def slow_complete(api_choice, prompt):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.05)
+        active.pop()
+        return "ok"
+
+    monkeypatch.setattr(providers, "complete", slow_complete)
+
+    async def main():
+        return await asyncio.gather(*(
+            summarize_text.summarize_text_async(f"text {i}", api_choice="OpenAI") for i in range(5)
+        ))
+
+    results = asyncio.run(main())
+    assert [text for text, _ in results] == ["ok"] * 5
+    assert max(peak) == 5
+
+
+def test_provider_semaphore_bounds_concurrency(monkeypatch):
+    active = []
+    peak = []
+
+    async def fake_request(api_choice, prompt):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.02)
+        active.pop()
+        return prompt
+
+    monkeypatch.setattr(providers, "_request", fake_request)
+    monkeypatch.setitem(providers.MAX_CONCURRENCY, "Gemini", 2)
+
+    async def main():
+        return await asyncio.gather(*(providers.complete("Gemini", str(i)) for i in range(6)))
+
+    assert asyncio.run(main()) == [str(i) for i in range(6)]
+    assert max(peak) == 2
+
+
+def test_clients_are_reused_per_loop(monkeypatch):
+    created = []
+    monkeypatch.setattr(providers, "_loop_state", providers.weakref.WeakKeyDictionary())
+    monkeypatch.setattr(providers, "_make_client", lambda api_choice: created.append(api_choice) or object())
+
+    async def get_twice():
+        return providers.get_client("OpenAI") is providers.get_client("OpenAI")
+
+    assert providers.run(get_twice())
+    assert providers.run(get_twice())
+    assert created == ["OpenAI"]
+
+
+def _fake_stream(monkeypatch, deltas=("Hel", "lo", "!")):
+    calls = []
+
+    async def fake_stream(api_choice, prompt):
+        calls.append((api_choice, prompt))
+        for delta in deltas:
+            await asyncio.sleep(0.01)
+            yield delta
+
+    monkeypatch.setattr(providers, "stream", fake_stream)
+    return calls
+
+
+def test_stream_yields_deltas_and_measures_ttft(monkeypatch, tmp_path):
+    calls = _fake_stream(monkeypatch)
+    cache.set_summary_cache(cache.DiskCache(str(tmp_path / "s.sqlite3")))
+
+    stats = {}
+    assert list(summarize_text.summarize_text_stream("text", api_choice="Anthropic", stats=stats)) == ["Hel", "lo", "!"]
+    assert stats["cached"] is False
+    assert 0 < stats["ttft"] <= stats["total"]
+
+    # 스트리밍 결과도 캐시에 저장되어 다음 요청은 한 번에
+    stats = {}
+    assert list(summarize_text.summarize_text_stream("text", api_choice="Anthropic", stats=stats)) == ["Hello!"]
+    assert stats["cached"] is True
+    assert len(calls) == 1
+    assert summarize_text.summarize_text("text", api_choice="Anthropic") == "Hello!"
+
+
+def test_summaries_are_added_to_search_index(monkeypatch, tmp_path):
+    import search_index
+
+    _fake_provider(monkeypatch)
+    _fake_stream(monkeypatch, deltas=("streamed ", "notes"))
+    index = search_index.SearchIndex(str(tmp_path / "search.sqlite3"))
+    search_index.set_index(index)
+
+    summarize("text", api_choice="OpenAI", video_id="vid1")
+    list(summarize_text.summarize_text_stream("text", api_choice="Anthropic", video_id="vid2"))
+    summarize("other", api_choice="OpenAI")
+
+    assert [r["video_id"] for r in index.search("summary")] == ["vid1"]
+    assert [(r["video_id"], r["text"]) for r in index.search("notes")] == [("vid2", "streamed notes")]
+
+
+def test_stream_chapters_in_order(monkeypatch):
+    from transcript import Transcript
+
+    _fake_provider(monkeypatch)
+    transcript = Transcript.from_segments([
+        {"text": "a", "start": 0.0, "duration": 5.0},
+        {"text": "b", "start": 60.0, "duration": 5.0},
+    ])
+    stats = {}
+    sections = list(summarize_text.summarize_text_stream(
+        transcript, chapters=[(0.0, "One"), (60.0, "Two")], api_choice="OpenAI",
+        summarize_way="Chapters", stats=stats,
+    ))
+    assert [s.splitlines()[0] for s in sections] == ["### [0:00 - 1:00] One", "### [1:00 - 1:05] Two"]
+    assert stats["per_chapter"] is True
+
+
+def test_provider_sdks_are_imported_lazily():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, app, summarize_text, batch; "
+        "print(','.join(m for m in ('anthropic', 'openai', 'google.generativeai') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
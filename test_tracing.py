@@ -0,0 +1,143 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import http_client
+import providers
+import tracing
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = tracing.Metrics()
+    monkeypatch.setattr(tracing, "_metrics", metrics)
+    return metrics
+
+
+def test_spans_nest_and_record_errors(metrics, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    with tracing.trace("request", path=str(path), url="u") as t:
+        with tracing.span("fetch") as attrs:
+            attrs["bytes"] = 10
+            with tracing.span("parse"):
+                pass
+        with pytest.raises(ValueError):
+            with tracing.span("llm"):
+                raise ValueError("boom")
+        tracing.count("bytes_fetched", 10, host="example.com")
+        tracing.count("bytes_fetched", 5, host="example.com")
+
+    rows = t.breakdown()
+    assert [(r["name"], r["depth"]) for r in rows] == [("fetch", 0), ("parse", 1), ("llm", 0)]
+    assert rows[0]["attrs"] == {"bytes": 10} and rows[2]["error"] == "ValueError"
+    assert t.counters == {'bytes_fetched{host="example.com"}': 15}
+    assert tracing.current_trace() is None
+
+    [line] = path.read_text(encoding="utf-8").splitlines()
+    exported = json.loads(line)
+    assert exported["trace_id"] == t.trace_id and exported["attrs"] == {"url": "u"}
+    assert [s["name"] for s in exported["spans"]] == ["fetch", "parse", "llm"]
+    assert metrics.value("bytes_fetched", host="example.com") == 15
+
+
+def test_context_follows_threads_and_tasks(metrics):
+    async def llm_call():
+        with tracing.span("llm.request"):
+            await asyncio.sleep(0)
+        await asyncio.to_thread(lambda: tracing.count("in_thread"))
+
+    def scrape():
+        with tracing.span("scrape"):
+            pass
+
+    with tracing.trace("request") as t:
+        with ThreadPoolExecutor(2) as pool:
+            pool.submit(tracing.wrap(scrape)).result()
+            pool.submit(scrape).result()  # 감싸지 않으면 트레이스 밖 (누적 지표에만 기록)
+        with tracing.span("summarize"):
+            providers.run(llm_call())
+
+    assert [(r["name"], r["depth"]) for r in t.breakdown()] == [
+        ("scrape", 0), ("summarize", 0), ("llm.request", 1),
+    ]
+    assert t.counters == {"in_thread": 1}
+    assert "scrape" in metrics.render()
+
+
+def test_start_and_finish_for_callbacks(tmp_path, monkeypatch):
+    monkeypatch.setenv("YTS_TRACE_FILE", str(tmp_path / "t.jsonl"))
+    t, context = tracing.start("batch.video", url="u")
+    context.run(tracing.count, "transcript_chars", 42)
+    tracing.count("transcript_chars", 1)  # 다른 컨텍스트
+    tracing.finish(t)
+    assert t.counters == {"transcript_chars": 42}
+    assert json.loads((tmp_path / "t.jsonl").read_text())["name"] == "batch.video"
+
+
+def test_prometheus_text_and_endpoint(metrics):
+    metrics.inc("llm_prompt_tokens", 120, provider="OpenAI")
+    metrics.inc("llm_prompt_tokens", 30, provider='we"ird')
+    metrics.observe("youtube.fetch_watch_page", 0.2)
+    metrics.observe("youtube.fetch_watch_page", 3.0, error="HTTPError")
+
+    text = metrics.render()
+    assert "# TYPE yts_llm_prompt_tokens_total counter" in text
+    assert 'yts_llm_prompt_tokens_total{provider="OpenAI"} 120' in text
+    assert 'yts_llm_prompt_tokens_total{provider="we\\"ird"} 30' in text
+    assert 'yts_span_seconds_bucket{le="0.25",span="youtube.fetch_watch_page"} 1' in text
+    assert 'yts_span_seconds_bucket{le="+Inf",span="youtube.fetch_watch_page"} 2' in text
+    assert 'yts_span_seconds_count{span="youtube.fetch_watch_page"} 2' in text
+    assert 'yts_span_errors_total{error="HTTPError",span="youtube.fetch_watch_page"} 1' in text
+
+    server = tracing.serve_metrics(0)
+    try:
+        r = requests.get(f"http://127.0.0.1:{server.server_address[1]}/metrics")
+        assert r.status_code == 200 and r.headers["Content-Type"].startswith("text/plain")
+        assert r.text == metrics.render()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_provider_usage_is_counted(metrics, monkeypatch):
+    usage = SimpleNamespace(prompt_tokens=11, completion_tokens=7)
+    message = SimpleNamespace(content="notes")
+    response = SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    async def create(**kwargs):
+        return response
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(providers, "get_client", lambda api_choice: client)
+
+    with tracing.trace("request") as t:
+        assert providers.run(providers.complete("OpenAI", "hello")) == "notes"
+
+    assert t.counters == {
+        'llm_prompt_tokens{provider="OpenAI"}': 11,
+        'llm_completion_tokens{provider="OpenAI"}': 7,
+    }
+    [request] = t.breakdown()
+    assert request["name"] == "llm.request" and request["attrs"]["attempts"] == 1
+
+    gemini = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=3, candidates_token_count=4))
+    assert providers.usage_tokens("Gemini", gemini) == (3, 4)
+    anthropic = SimpleNamespace(usage=SimpleNamespace(input_tokens=5, output_tokens=6))
+    assert providers.usage_tokens("Anthropic", anthropic) == (5, 6)
+    assert providers.usage_tokens("x.ai", SimpleNamespace()) is None
+
+
+def test_http_hook_counts_bytes(metrics):
+    response = SimpleNamespace(url="https://www.youtube.com/watch?v=x", status_code=200, content=b"12345")
+    with tracing.trace("request") as t:
+        http_client.count_response(response)
+        http_client.count_response(response, stream=True)
+    assert t.counters == {
+        'bytes_fetched{host="www.youtube.com"}': 5,
+        'http_requests{host="www.youtube.com",status="200"}': 2,
+    }
+    assert http_client.count_response in http_client.build_session().hooks["response"]
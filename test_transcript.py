@@ -0,0 +1,68 @@
+from transcript import Transcript, align_chapters, format_timestamp, normalize_chapters, parse_timestamp
+
+
+def _transcript():
+    return Transcript.from_segments([
+        {"text": f"s{i}", "start": i * 10.0, "duration": 10.0} for i in range(12)
+    ])
+
+
+def test_parse_and_format_timestamp():
+    assert parse_timestamp("0:05") == 5
+    assert parse_timestamp("12:34") == 754
+    assert parse_timestamp("1:02:03") == 3723
+    assert parse_timestamp(84.5) == 84.5
+    assert format_timestamp(3723) == "1:02:03"
+    assert format_timestamp(84) == "1:24"
+
+
+def test_normalize_chapters_sorts_and_converts():
+    assert normalize_chapters([("1:00", "b"), (0.0, "a"), ("bad", "x")]) == [(0.0, "a"), (60.0, "b")]
+
+
+def test_align_chapters_slices_by_start_time():
+    aligned = align_chapters(_transcript(), [("0:35", "middle"), ("0:00", "intro"), ("1:30", "end")])
+    assert [(start, end, title) for start, end, title, _ in aligned] == [
+        (0.0, 35.0, "intro"), (35.0, 90.0, "middle"), (90.0, 120.0, "end"),
+    ]
+    assert [piece.texts for *_, piece in aligned] == [
+        ["s0", "s1", "s2", "s3"], ["s4", "s5", "s6", "s7", "s8"], ["s9", "s10", "s11"],
+    ]
+
+
+def test_segments_before_first_chapter_belong_to_it():
+    aligned = align_chapters(_transcript(), [("0:20", "late start")])
+    assert aligned[0][3].texts[0] == "s0"
+    assert len(aligned[0][3]) == 12
+
+
+def test_text_buffer_and_slice_views():
+    transcript = Transcript([0.0, 1.0, 2.0], [1.0, 1.0, 1.0], ["a b", "안녕", "c"])
+    assert transcript.text == "a b 안녕 c"
+    assert transcript.texts == ["a b", "안녕", "c"]
+
+    view = transcript.slice(1.0, 3.0)
+    assert view._buffer is transcript._buffer and view._starts is transcript._starts
+    assert len(view) == 2
+    assert view.text == "안녕 c"
+    assert list(view.starts) == [1.0, 2.0]
+    assert view.segment_text(0) == "안녕"
+    assert view.end == 3.0
+    assert view.index_at(2.0) == 1
+    assert view.slice(2.0).texts == ["c"]
+    assert transcript.slice(5.0).text == ""
+
+
+def test_bytes_roundtrip():
+    transcript = _transcript()
+    restored = Transcript.from_bytes(transcript.to_bytes())
+    assert restored.to_segments() == transcript.to_segments()
+    assert restored.text == transcript.text
+
+    view = transcript.slice(30.0, 60.0)
+    restored = Transcript.from_bytes(view.to_bytes())
+    assert restored.texts == ["s3", "s4", "s5"]
+    assert list(restored.starts) == [30.0, 40.0, 50.0]
+
+    empty = Transcript.from_bytes(Transcript([], [], []).to_bytes())
+    assert len(empty) == 0 and empty.text == ""
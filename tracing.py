@@ -0,0 +1,426 @@
+# tracing.py
+"""
+가벼운 단계별 트레이싱과 지표.
+
+    with tracing.trace("summarize", url=url) as t:       # 요청 하나 (루트)
+        with tracing.span("youtube.fetch_watch_page") as attrs:
+            ...
+            attrs["status"] = 200                        # span 속성 추가
+        tracing.count("bytes_fetched", 1234, host="www.youtube.com")
+    t.breakdown()    # [{"name", "start", "duration", "depth", "attrs", "error"}, ...]
+    t.counters       # {'bytes_fetched{host="www.youtube.com"}': 1234, ...}
+
+- 현재 트레이스와 부모 span은 contextvars로 전파된다 (asyncio 태스크, asyncio.to_thread,
+  providers.run/iterate 포함). ThreadPoolExecutor에 넘길 때는 tracing.wrap(func)로 감싼다
+- 트레이스가 끝나면 YTS_TRACE_FILE(또는 trace(path=...))에 JSONL 한 줄로 기록한다
+- span 소요 시간과 카운터는 프로세스 전체 누적값(Metrics)에도 더해진다 (트레이스 밖의 호출 포함).
+  render_prometheus()가 Prometheus 텍스트 형식으로 내보내고, serve_metrics(port) /
+  YTS_METRICS_PORT로 /metrics 엔드포인트를 띄운다 (app.py, batch.py)
+"""
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = "yts"
+
+# span 소요 시간 히스토그램 버킷 (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (Trace, 부모 span id) 또는 None
+_current = contextvars.ContextVar("yts_trace", default=None)
+
+_export_lock = threading.Lock()
+_server = None
+_server_lock = threading.Lock()
+
+
+def _label_key(name, labels):
+    if not labels:
+        return name
+    inner = ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Trace:
+    """
+    요청 하나의 span과 카운터. 스레드 안전.
+
+    Attributes:
+        trace_id (str): 무작위 ID
+        spans (list): 끝난 span 기록 (dict)
+        counters (dict): 'name{label="..."}' -> 누적값
+        duration (float | None): 트레이스가 끝나면 채워지는 전체 소요 시간 (초)
+    """
+
+    def __init__(self, name, **attrs):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.duration = None
+        self.spans = []
+        self.counters = {}
+        self._t0 = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def _add_span(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def _add(self, key, value):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def elapsed(self):
+        return time.perf_counter() - self._t0
+
+    def breakdown(self):
+        """
+        시작 순서로 정렬한 span 목록 (depth: 루트 바로 아래가 0)
+
+        Returns:
+            list: [{"name", "start", "duration", "depth", "attrs", "error"}, ...]
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: (s["start"], s["id"]))
+        depth = {}
+        rows = []
+        for s in spans:
+            depth[s["id"]] = depth.get(s["parent"], -1) + 1
+            rows.append({
+                "name": s["name"], "start": s["start"], "duration": s["duration"],
+                "depth": depth[s["id"]], "attrs": s["attrs"], "error": s["error"],
+            })
+        return rows
+
+    def totals(self):
+        """
+        span 이름별 소요 시간 합계 (초). 동시에 실행된 span은 겹쳐서 더해진다
+        """
+        totals = {}
+        with self._lock:
+            for s in self.spans:
+                totals[s["name"]] = totals.get(s["name"], 0.0) + s["duration"]
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "trace_id": self.trace_id,
+                "name": self.name,
+                "attrs": self.attrs,
+                "started_at": self.started_at,
+                "duration": self.duration,
+                "spans": sorted(self.spans, key=lambda s: s["start"]),
+                "counters": dict(self.counters),
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        to_dict()의 역 (다른 프로세스에서 기록한 트레이스를 breakdown/totals로 보기 위해)
+        """
+        current = cls(data["name"], **data.get("attrs", {}))
+        current.trace_id = data["trace_id"]
+        current.started_at = data["started_at"]
+        current.duration = data["duration"]
+        current.spans = list(data["spans"])
+        current.counters = dict(data["counters"])
+        return current
+
+
+class Metrics:
+    """
+    프로세스 전체 누적값: 카운터와 span 소요 시간 히스토그램. 스레드 안전.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # span name -> [bucket counts..., sum, count]
+        self._errors = {}      # (span name, error) -> count
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, span_name, seconds, error=None):
+        with self._lock:
+            row = self._histograms.get(span_name)
+            if row is None:
+                row = self._histograms[span_name] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    row[i] += 1
+            row[-2] += seconds
+            row[-1] += 1
+            if error:
+                self._errors[(span_name, error)] = self._errors.get((span_name, error), 0) + 1
+
+    def value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def snapshot(self):
+        """
+        누적값을 JSON으로 저장할 수 있는 dict로 (다른 프로세스에서 merge()로 합친다)
+        """
+        with self._lock:
+            return {
+                "counters": [[name, [list(label) for label in labels], value]
+                             for (name, labels), value in self._counters.items()],
+                "histograms": {name: list(row) for name, row in self._histograms.items()},
+                "errors": [[name, error, value] for (name, error), value in self._errors.items()],
+            }
+
+    def merge(self, snapshot):
+        """
+        snapshot()의 값을 더한다 (버킷 경계가 같아야 한다)
+        """
+        with self._lock:
+            for name, labels, value in snapshot.get("counters", ()):
+                key = (name, tuple(tuple(label) for label in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, row in snapshot.get("histograms", {}).items():
+                mine = self._histograms.get(name)
+                if mine is None:
+                    self._histograms[name] = list(row)
+                else:
+                    self._histograms[name] = [a + b for a, b in zip(mine, row)]
+            for name, error, value in snapshot.get("errors", ()):
+                self._errors[(name, error)] = self._errors.get((name, error), 0) + value
+
+    def render(self, prefix=METRIC_PREFIX):
+        """
+        Prometheus 텍스트 노출 형식 (version 0.0.4)
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((name, list(row)) for name, row in self._histograms.items())
+            errors = sorted(self._errors.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{_label_key(metric, dict(labels))} {value}")
+
+        metric = f"{prefix}_span_seconds"
+        if histograms:
+            lines.append(f"# HELP {metric} Duration of traced stages.")
+            lines.append(f"# TYPE {metric} histogram")
+        for name, row in histograms:
+            for bound, bucket in zip(self.buckets, row):
+                lines.append(f"{_label_key(metric + '_bucket', {'span': name, 'le': repr(bound)})} {bucket}")
+            lines.append(f"{_label_key(metric + '_bucket', {'span': name, 'le': '+Inf'})} {row[-1]}")
+            lines.append(f"{_label_key(metric + '_sum', {'span': name})} {row[-2]}")
+            lines.append(f"{_label_key(metric + '_count', {'span': name})} {row[-1]}")
+
+        metric = f"{prefix}_span_errors_total"
+        if errors:
+            lines.append(f"# TYPE {metric} counter")
+        for (name, error), value in errors:
+            lines.append(f"{_label_key(metric, {'span': name, 'error': error})} {value}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+def set_metrics(metrics):
+    global _metrics
+    _metrics = metrics
+
+
+def current_trace():
+    """
+    현재 컨텍스트의 Trace (없으면 None)
+    """
+    state = _current.get()
+    return state[0] if state is not None else None
+
+
+@contextlib.contextmanager
+def trace(name, path=None, **attrs):
+    """
+    루트 트레이스를 시작한다. 끝나면 path(기본값 YTS_TRACE_FILE)에 JSONL로 기록.
+    이미 트레이스 안이면 새 트레이스를 만들지 않고 span으로 기록한다.
+
+    Yields:
+        Trace
+    """
+    state = _current.get()
+    if state is not None:
+        with span(name, **attrs):
+            yield state[0]
+        return
+    current = Trace(name, **attrs)
+    _current.set((current, None))
+    try:
+        yield current
+    finally:
+        _current.set(None)
+        finish(current, path)
+
+
+def start(name, **attrs):
+    """
+    with 블록으로 묶을 수 없는 요청(콜백으로 이어지는 배치 작업 등)의 트레이스를 시작한다.
+    반환된 컨텍스트에서 실행한 코드(context.run(func, ...))가 이 트레이스에 기록된다.
+    끝나면 finish(trace)를 호출한다.
+
+    Returns:
+        tuple: (Trace, contextvars.Context)
+    """
+    current = Trace(name, **attrs)
+    context = contextvars.copy_context()
+    context.run(_current.set, (current, None))
+    return current, context
+
+
+def finish(current, path=None):
+    """
+    트레이스를 끝내고 JSONL로 내보낸다
+    """
+    current.duration = current.elapsed()
+    export(current, path)
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """
+    구간 하나를 잰다. 트레이스 밖에서도 누적 지표(Metrics)에는 반영된다.
+
+    Yields:
+        dict: span 속성 (호출자가 값을 추가할 수 있다)
+    """
+    state = _current.get()
+    started = time.perf_counter()
+    record = {"name": name, "attrs": attrs, "error": None}
+    if state is not None:
+        current, parent = state
+        record.update(id=current._next_id(), parent=parent)
+        _current.set((current, record["id"]))
+    try:
+        yield attrs
+    except BaseException as exc:
+        record["error"] = type(exc).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        if state is not None:
+            # ContextVar.reset 대신 set: 비동기 제너레이터는 단계마다 다른 컨텍스트에서 재개될 수 있다
+            _current.set(state)
+            record.update(start=started - current._t0, duration=duration)
+            current._add_span(record)
+        _metrics.observe(name, duration, record["error"])
+
+
+def count(name, value=1, **labels):
+    """
+    카운터를 더한다 (현재 트레이스 + 누적 지표)
+    """
+    if not value:
+        return
+    state = _current.get()
+    if state is not None:
+        state[0]._add(_label_key(name, labels), value)
+    _metrics.inc(name, value, **labels)
+
+
+def wrap(func):
+    """
+    현재 컨텍스트(트레이스/부모 span)에서 func를 실행하는 함수. 스레드 풀에 넘길 때 사용.
+    submit할 때마다 새로 감싼다 (컨텍스트 하나는 한 스레드에서만 실행할 수 있다)
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return run
+
+
+def export(current, path=None):
+    """
+    트레이스를 JSONL 한 줄로 추가 기록 (path와 YTS_TRACE_FILE이 모두 없으면 아무것도 하지 않음)
+    """
+    path = path or os.getenv("YTS_TRACE_FILE")
+    if not path:
+        return
+    line = json.dumps(current.to_dict(), ensure_ascii=False, default=str) + "\n"
+    with _export_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def render_prometheus():
+    return _metrics.render()
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """
+    /metrics 에서 Prometheus 텍스트를 내보내는 HTTP 서버를 데몬 스레드로 띄운다.
+
+    Returns:
+        ThreadingHTTPServer: server_address로 실제 포트를 알 수 있다 (port=0이면 임의 포트)
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            data = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics", daemon=True).start()
+    return httpd
+
+
+def serve_metrics_from_env():
+    """
+    YTS_METRICS_PORT가 있으면 프로세스당 한 번 /metrics 서버를 띄운다 (Streamlit 재실행에도 안전)
+    """
+    global _server
+    port = os.getenv("YTS_METRICS_PORT")
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = serve_metrics(int(port), os.getenv("YTS_METRICS_HOST", "127.0.0.1"))
+        return _server
+
@@ -0,0 +1,251 @@
+# transcript.py
+"""
+타임스탬프를 유지하는 자막 모델과 챕터 정렬(alignment).
+
+- Transcript: 세그먼트별 시작 시각/길이/텍스트 (배열 + 단일 텍스트 버퍼, 구간 뷰, 바이너리 직렬화)
+- parse_timestamp / normalize_chapters: "H:MM:SS", "MM:SS", 초(float) -> 초
+- align_chapters: 챕터 시작 시각을 이분 탐색으로 세그먼트 인덱스에 매핑해 챕터별로 자막을 자른다
+"""
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+# to_bytes() 형식: 헤더(magic, version, 세그먼트 수 n, 텍스트 바이트 수) +
+# starts(float64 x n) + durations(float64 x n) + offsets(int64 x n+1) + UTF-8 텍스트. 리틀 엔디언
+_MAGIC = b"YTST"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHIQ")
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class Transcript:
+    """
+    시작 시각 순으로 정렬된 자막 세그먼트 모음.
+
+    시작 시각/길이는 array('d')에, 텍스트는 세그먼트를 공백으로 이어 붙인 문자열 하나와
+    세그먼트별 시작 오프셋 array('q')에 저장한다. 세그먼트마다 dict/str 객체를 두지 않으므로
+    긴 라이브(수 시간) 자막도 메모리를 적게 쓰고, text는 새로 join 하지 않고 버퍼를 그대로 쓴다.
+
+    slice()/align_chapters()가 만드는 Transcript는 같은 배열/버퍼를 공유하는 뷰(view)이다.
+
+    Args:
+        starts (iterable): 세그먼트 시작 시각 (초)
+        durations (iterable): 세그먼트 길이 (초)
+        texts (iterable): 세그먼트 텍스트
+    """
+
+    __slots__ = ("_starts", "_durations", "_offsets", "_buffer", "_lo", "_hi")
+
+    def __init__(self, starts, durations, texts):
+        starts = array('d', starts)
+        durations = array('d', durations)
+        texts = list(texts)
+        if not (len(starts) == len(durations) == len(texts)):
+            raise ValueError("starts, durations and texts must have the same length")
+        # offsets[i]: 세그먼트 i의 시작 위치, offsets[n]: len(buffer) + 1 (구분 공백 포함)
+        offsets = array('q', bytes(8 * (len(texts) + 1)))
+        position = 0
+        for i, text in enumerate(texts):
+            offsets[i] = position
+            position += len(text) + 1
+        offsets[len(texts)] = position
+        self._init(starts, durations, offsets, " ".join(texts), 0, len(texts))
+
+    def _init(self, starts, durations, offsets, buffer, lo, hi):
+        self._starts = starts
+        self._durations = durations
+        self._offsets = offsets
+        self._buffer = buffer
+        self._lo = lo
+        self._hi = hi
+
+    def _view(self, lo, hi):
+        # 배열과 버퍼를 복사하지 않고 [lo, hi) 구간만 가리키는 Transcript
+        view = Transcript.__new__(Transcript)
+        view._init(self._starts, self._durations, self._offsets, self._buffer, self._lo + lo, self._lo + hi)
+        return view
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        YouTubeTranscriptApi 형식 [{'text', 'start', 'duration'}, ...] 에서 생성
+        """
+        segments = sorted(segments, key=lambda s: s.get('start', 0.0))
+        return cls(
+            (float(s.get('start', 0.0)) for s in segments),
+            (float(s.get('duration', 0.0)) for s in segments),
+            (s['text'] for s in segments),
+        )
+
+    def to_segments(self):
+        return [
+            {'text': text, 'start': start, 'duration': duration}
+            for start, duration, text in zip(self.starts, self.durations, self.iter_texts())
+        ]
+
+    def to_bytes(self):
+        """
+        캐시 저장용 바이너리 직렬화 (뷰이면 해당 구간만)
+        """
+        lo, hi = self._lo, self._hi
+        base = self._offsets[lo]
+        offsets = array('q', (offset - base for offset in self._offsets[lo:hi + 1]))
+        data = self.text.encode("utf-8")
+        return b"".join((
+            _HEADER.pack(_MAGIC, _VERSION, hi - lo, len(data)),
+            _little_endian(self._starts[lo:hi]).tobytes(),
+            _little_endian(self._durations[lo:hi]).tobytes(),
+            _little_endian(offsets).tobytes(),
+            data,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        to_bytes()의 역변환
+        """
+        data = memoryview(data)
+        magic, version, n, size = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a serialized Transcript")
+        position = _HEADER.size
+        arrays = []
+        for typecode, count in (('d', n), ('d', n), ('q', n + 1)):
+            values = array(typecode)
+            values.frombytes(data[position:position + 8 * count])
+            arrays.append(_little_endian(values))
+            position += 8 * count
+        buffer = str(data[position:position + size], "utf-8")
+        transcript = cls.__new__(cls)
+        transcript._init(arrays[0], arrays[1], arrays[2], buffer, 0, n)
+        return transcript
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    @property
+    def starts(self):
+        """
+        시작 시각 (복사 없는 읽기 전용 memoryview)
+        """
+        return memoryview(self._starts)[self._lo:self._hi].toreadonly()
+
+    @property
+    def durations(self):
+        return memoryview(self._durations)[self._lo:self._hi].toreadonly()
+
+    def segment_text(self, i):
+        i += self._lo
+        return self._buffer[self._offsets[i]:self._offsets[i + 1] - 1]
+
+    def iter_texts(self):
+        buffer, offsets = self._buffer, self._offsets
+        for i in range(self._lo, self._hi):
+            yield buffer[offsets[i]:offsets[i + 1] - 1]
+
+    @property
+    def texts(self):
+        """
+        세그먼트 텍스트 리스트 (새 리스트를 만든다. 순회만 하면 iter_texts()를 쓸 것)
+        """
+        return list(self.iter_texts())
+
+    @property
+    def text(self):
+        if self._lo == 0 and self._hi == len(self._offsets) - 1:
+            return self._buffer
+        if self._hi == self._lo:
+            return ""
+        return self._buffer[self._offsets[self._lo]:self._offsets[self._hi] - 1]
+
+    def __str__(self):
+        return self.text
+
+    @property
+    def end(self):
+        if not len(self):
+            return 0.0
+        return self._starts[self._hi - 1] + self._durations[self._hi - 1]
+
+    def index_at(self, seconds):
+        """
+        시작 시각이 seconds 이상인 첫 세그먼트 인덱스 (이분 탐색)
+        """
+        return bisect_left(self._starts, seconds, self._lo, self._hi) - self._lo
+
+    def slice(self, start=None, end=None):
+        """
+        [start, end) 구간에서 시작하는 세그먼트만 담은 Transcript (복사 없는 뷰)
+        """
+        lo = 0 if start is None else self.index_at(start)
+        hi = len(self) if end is None else self.index_at(end)
+        return self._view(lo, max(lo, hi))
+
+
+def parse_timestamp(value):
+    """
+    "1:02:03" / "12:34" / "0:05" / 84.0 -> 초(float)
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    seconds = 0.0
+    for part in str(value).strip().split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds):
+    """
+    초 -> "M:SS" 또는 "H:MM:SS"
+    """
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+def normalize_chapters(chapters):
+    """
+    (timestamp, title) 리스트의 시작 시각을 초로 바꾸고 시간순으로 정렬
+    """
+    normalized = []
+    for start, title in chapters or []:
+        try:
+            normalized.append((parse_timestamp(start), title))
+        except ValueError:
+            continue
+    return sorted(normalized, key=lambda ch: ch[0])
+
+
+def align_chapters(transcript, chapters):
+    """
+    챕터별로 자막을 자른다. 챕터 k는 [start_k, start_{k+1}) 구간의 세그먼트를 가진다.
+    첫 챕터보다 앞선 세그먼트는 첫 챕터에 붙인다.
+
+    정렬 O(c log c) + 챕터마다 이분 탐색 O(log n). 챕터별 Transcript는 원본을 공유하는 뷰.
+
+    Returns:
+        list: [(start_sec, end_sec, title, Transcript), ...]
+    """
+    chapters = normalize_chapters(chapters)
+    if not chapters:
+        return []
+    bounds = [transcript.index_at(start) for start, _ in chapters]
+    bounds[0] = 0
+    bounds.append(len(transcript))
+
+    aligned = []
+    for k, (start, title) in enumerate(chapters):
+        lo, hi = bounds[k], bounds[k + 1]
+        end = chapters[k + 1][0] if k + 1 < len(chapters) else max(transcript.end, start)
+        aligned.append((start, end, title, transcript._view(lo, hi)))
+    return aligned